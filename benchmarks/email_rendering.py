@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Benchmark: notification emails rendered per second.
+
+Compares three ways of rendering the event update email for a fan-out:
+
+  inline    - the f-string bodies the tasks used to build (text only)
+  per-user  - a full template render (subject, text, HTML) per recipient
+  prepared  - notifications.emails.prepare() once per event, then
+              for_recipient() per recipient
+
+    python benchmarks/email_rendering.py --recipients 20000
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipients', type=int, default=10000)
+    options = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'event_management.settings')
+    import django
+    django.setup()
+    from notifications import emails
+
+    event = SimpleNamespace(
+        id=1,
+        title='Annual Conference <2025>',
+        date=datetime.date(2025, 9, 1),
+        time=datetime.time(14, 0),
+        location='Main Hall',
+    )
+    update_message = 'The keynote moved to 15:00.'
+    users = [
+        SimpleNamespace(email=f'user{i}@example.com', first_name=f'User{i}', last_name='Example')
+        for i in range(options.recipients)
+    ]
+    context = {'event': event, 'update_message': update_message}
+
+    # Every strategy keeps what it renders, so none is timed doing less work.
+    def inline():
+        rendered = []
+        for user in users:
+            subject = f'Event Update - {event.title}'
+            message = f"""
+            Hello {user.first_name},
+            
+            There has been an update to the event "{event.title}":
+            
+            {update_message}
+            
+            Event Details:
+            - Date: {event.date}
+            - Time: {event.time}
+            - Location: {event.location}
+            """
+            rendered.append((user.email, subject, message))
+        return rendered
+
+    def per_user():
+        return [emails.render('event_update', context, user) for user in users]
+
+    def prepared():
+        email = emails.prepare('event_update', context)
+        return [email.for_recipient(user) for user in users]
+
+    # Compile the templates before timing.
+    emails.get_templates('event_update')
+
+    print(f"{'strategy':<10}{'seconds':>10}{'msg/s':>12}")
+    for name, run in (('inline', inline), ('per-user', per_user), ('prepared', prepared)):
+        started = time.perf_counter()
+        rendered = run()
+        elapsed = time.perf_counter() - started
+        assert len(rendered) == options.recipients
+        print(f'{name:<10}{elapsed:>10.3f}{options.recipients / elapsed:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
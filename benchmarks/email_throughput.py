@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Benchmark: email delivery throughput against a local SMTP stand-in.
+
+Starts a minimal threaded SMTP server on localhost that accepts every
+message (optionally after a per-message delay, or failing a fraction of them
+with a 451), points Django's SMTP backend at it and sends a batch through
+notifications.delivery.send_many(). Reports messages per second, and how
+many messages were retried or dead-lettered.
+
+    python benchmarks/email_throughput.py --messages 2000
+    python benchmarks/email_throughput.py --messages 500 --rate-limit 200
+    python benchmarks/email_throughput.py --messages 500 --failure-rate 0.05
+"""
+
+import argparse
+import os
+import random
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: accepts or temporarily rejects mail."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        self.reply('220 localhost SMTP stand-in')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 localhost')
+            elif command.startswith(('MAIL', 'RCPT', 'RSET', 'NOOP')):
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                if server.delay:
+                    time.sleep(server.delay)
+                with server.lock:
+                    if random.random() < server.failure_rate:
+                        server.rejected += 1
+                        self.reply('451 Try again later')
+                        continue
+                    server.accepted += 1
+                self.reply('250 OK queued')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, delay=0.0, failure_rate=0.0):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.accepted = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--rate-limit', type=int, default=0, help='EMAIL_RATE_LIMIT_PER_SECOND (0 = unlimited)')
+    parser.add_argument('--server-delay', type=float, default=0.0, help='Seconds the server spends per message')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of messages rejected with 451')
+    options = parser.parse_args()
+
+    server = SMTPStandIn(options.server_delay, options.failure_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    database = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False)
+    os.environ.update({
+        'DATABASE_URL': f'sqlite:///{database.name}',
+        'DJANGO_SETTINGS_MODULE': 'event_management.settings',
+        'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+        'EMAIL_HOST': '127.0.0.1',
+        'EMAIL_PORT': str(server.server_address[1]),
+        'EMAIL_RATE_LIMIT_PER_SECOND': str(options.rate_limit),
+        'EMAIL_RETRY_DELAY_SECONDS': '0',
+    })
+
+    import django
+    django.setup()
+    import logging
+    logging.disable(logging.WARNING)
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+    from notifications import delivery
+    from notifications.models import EmailDeadLetter
+
+    emails = [
+        delivery.make_email(f'user{i}@example.com', f'Benchmark {i}', 'Hello from the benchmark.')
+        for i in range(options.messages)
+    ]
+
+    started = time.perf_counter()
+    delivery.send_many(emails)
+    elapsed = time.perf_counter() - started
+
+    print(f'messages:      {options.messages}')
+    print(f'elapsed:       {elapsed:.2f} s')
+    print(f'throughput:    {options.messages / elapsed:.0f} msg/s')
+    print(f'accepted:      {server.accepted}')
+    print(f'rejected:      {server.rejected} (retried)')
+    print(f'dead-lettered: {EmailDeadLetter.objects.count()}')
+
+    server.shutdown()
+    os.unlink(database.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Benchmark: registration confirmation latency during a large fan-out.
+
+Runs two scenarios against an in-memory broker with in-process worker
+threads, using the task names and routes from event_management.celery:
+
+  shared  - every task goes to one queue served by one worker pool
+  routed  - transactional and bulk queues with their own worker profiles
+
+A burst of bulk cancellation fan-outs is queued first, then confirmations
+arrive at a steady rate. Queue wait (enqueue to start) of each confirmation
+is reported as p50/p95/p99. Task bodies only sleep, so the numbers measure
+scheduling, not email cost.
+
+    python benchmarks/queue_latency.py --fanouts 8 --fanout-seconds 2
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+
+from event_management.celery import (
+    BULK_QUEUE,
+    TASK_ROUTES,
+    TRANSACTIONAL_QUEUE,
+    WORKER_PROFILES,
+)
+
+CONFIRMATION = 'notifications.tasks.send_registration_confirmation'
+CANCELLATION = 'notifications.tasks.send_event_cancellation_notification'
+
+
+def percentile(values, fraction):
+    """Return the value at `fraction` of the sorted values."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def make_app(routed):
+    """Create a Celery app with simulated notification tasks."""
+    app = Celery('queue_latency_benchmark', broker='memory://', backend='cache+memory://')
+    app.conf.broker_transport_options = {'polling_interval': 0.005}
+    app.conf.broker_connection_retry_on_startup = True
+    app.conf.task_default_queue = TRANSACTIONAL_QUEUE if routed else 'celery'
+    if routed:
+        app.conf.task_routes = TASK_ROUTES
+    latencies = []
+    lock = threading.Lock()
+
+    @app.task(name=CONFIRMATION)
+    def confirmation(enqueued_at, work_seconds):
+        with lock:
+            latencies.append(time.time() - enqueued_at)
+        time.sleep(work_seconds)
+
+    @app.task(name=CANCELLATION)
+    def cancellation(work_seconds):
+        time.sleep(work_seconds)
+
+    return app, confirmation, cancellation, latencies
+
+
+def run_scenario(routed, options):
+    """Run one scenario and return its latency summary."""
+    app, confirmation, cancellation, latencies = make_app(routed)
+    total_concurrency = options.transactional_concurrency + options.bulk_concurrency
+
+    if routed:
+        workers = [
+            start_worker(
+                app, pool='threads', perform_ping_check=False, shutdown_timeout=60, loglevel='WARNING',
+                concurrency=options.transactional_concurrency, queues=[TRANSACTIONAL_QUEUE],
+                prefetch_multiplier=WORKER_PROFILES[TRANSACTIONAL_QUEUE]['prefetch_multiplier'],
+            ),
+            start_worker(
+                app, pool='threads', perform_ping_check=False, shutdown_timeout=60, loglevel='WARNING',
+                concurrency=options.bulk_concurrency, queues=[BULK_QUEUE],
+                prefetch_multiplier=WORKER_PROFILES[BULK_QUEUE]['prefetch_multiplier'],
+            ),
+        ]
+    else:
+        workers = [
+            start_worker(
+                app, pool='threads', perform_ping_check=False, shutdown_timeout=60, loglevel='WARNING',
+                concurrency=total_concurrency, queues=['celery'], prefetch_multiplier=4,
+            ),
+        ]
+
+    for worker in workers:
+        worker.__enter__()
+    try:
+        for _ in range(options.fanouts):
+            cancellation.delay(options.fanout_seconds)
+        for _ in range(options.confirmations):
+            confirmation.delay(time.time(), options.confirmation_seconds)
+            time.sleep(options.interval)
+
+        deadline = time.time() + options.fanouts * options.fanout_seconds + 60
+        while len(latencies) < options.confirmations and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        for worker in reversed(workers):
+            worker.__exit__(None, None, None)
+
+    return {
+        'scenario': 'routed' if routed else 'shared',
+        'confirmations': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'max_ms': round(max(latencies) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fanouts', type=int, default=8, help='Bulk fan-out tasks queued up front')
+    parser.add_argument('--fanout-seconds', type=float, default=2.0, help='Duration of one fan-out task')
+    parser.add_argument('--confirmations', type=int, default=100)
+    parser.add_argument('--confirmation-seconds', type=float, default=0.005)
+    parser.add_argument('--interval', type=float, default=0.02, help='Seconds between confirmations')
+    parser.add_argument('--transactional-concurrency', type=int, default=2)
+    parser.add_argument('--bulk-concurrency', type=int, default=2)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    options = parser.parse_args()
+
+    results = [run_scenario(False, options), run_scenario(True, options)]
+
+    if options.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scenario':<10}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for result in results:
+        print(
+            f"{result['scenario']:<10}{result['confirmations']:>6}{result['p50_ms']:>10}"
+            f"{result['p95_ms']:>10}{result['p99_ms']:>10}{result['max_ms']:>10}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+Benchmark: mixed reads and registrations against SQLite.
+
+Runs the same workload twice, each time in a fresh process on a fresh
+database file: once with Django's stock SQLite backend (SQLITE_TUNED=False)
+and once with the tuned profile from event_management/db/sqlite3. Worker
+threads loop for a fixed time. Each operation is either a read, which lists
+events with their participant counts, or a registration, which checks the
+event's capacity and inserts a participant and an outbox row in one
+transaction, like EventViewSet.register. Reports operations per second and
+how many registrations failed with "database is locked".
+
+    python benchmarks/sqlite_concurrency.py --threads 8 --seconds 5
+    python benchmarks/sqlite_concurrency.py --write-ratio 0.5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def workload(options):
+    """Run the workload in this process and return its counters."""
+    import django
+    django.setup()
+    import logging
+    logging.disable(logging.WARNING)
+    import random
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import OperationalError, connection
+    from django.db.models import Count, Q
+    from django.utils import timezone
+    from event_management.db.transactions import immediate
+    from events.models import Event, EventParticipant
+    from notifications import outbox
+
+    call_command('migrate', verbosity=0)
+    User = get_user_model()
+    creator = User.objects.create(username='creator', email='creator@example.com')
+    Event.objects.bulk_create([
+        Event(
+            title=f'Benchmark Event {i}',
+            description='SQLite concurrency benchmark',
+            date=timezone.now().date() + timezone.timedelta(days=7),
+            time=timezone.now().time(),
+            location='Benchmark Hall',
+            created_by=creator
+        )
+        for i in range(options.events)
+    ])
+    users_per_thread = 5000
+    User.objects.bulk_create([
+        User(username=f'user{i}', email=f'user{i}@example.com')
+        for i in range(options.threads * users_per_thread)
+    ], batch_size=500)
+    user_ids = list(User.objects.exclude(id=creator.id).order_by('id').values_list('id', flat=True))
+    event_ids = [event.id for event in Event.objects.order_by('id')]
+    connection.close()
+
+    counters = {'reads': 0, 'registrations': 0, 'locked': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + options.seconds
+
+    def read():
+        list(Event.objects.annotate(
+            active_participants=Count('participants', filter=Q(participants__is_active=True))
+        )[:20])
+
+    def register(user_id):
+        with immediate():
+            event = Event.objects.get(id=random.choice(event_ids))
+            if event.is_full:
+                return
+            participant = EventParticipant.objects.create(event=event, user_id=user_id)
+            outbox.enqueue('notifications.tasks.send_registration_confirmation', participant.id)
+
+    def work(index):
+        from django.db import connections
+        mine = iter(user_ids[index * users_per_thread:(index + 1) * users_per_thread])
+        local = {'reads': 0, 'registrations': 0, 'locked': 0}
+        while time.monotonic() < deadline:
+            try:
+                if random.random() < options.write_ratio:
+                    register(next(mine))
+                    local['registrations'] += 1
+                else:
+                    read()
+                    local['reads'] += 1
+            except OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                local['locked'] += 1
+        connections.close_all()
+        with lock:
+            for name, value in local.items():
+                counters[name] += value
+
+    threads = [threading.Thread(target=work, args=(index,)) for index in range(options.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--events', type=int, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.3, help='Fraction of operations that register')
+    parser.add_argument('--worker', choices=['stock', 'tuned'], help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.worker:
+        print(json.dumps(workload(options)))
+        return
+
+    for mode in ('stock', 'tuned'):
+        database = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False)
+        env = dict(
+            os.environ,
+            DATABASE_URL=f'sqlite:///{database.name}',
+            DJANGO_SETTINGS_MODULE='event_management.settings',
+            SQLITE_TUNED=str(mode == 'tuned'),
+            OUTBOX_RELAY_ON_COMMIT='False',
+            DEBUG='False',
+        )
+        output = subprocess.run(
+            [sys.executable, __file__, '--worker', mode] + sys.argv[1:],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True
+        ).stdout
+        counters = json.loads(output.strip().splitlines()[-1])
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(database.name + suffix):
+                os.unlink(database.name + suffix)
+
+        operations = counters['reads'] + counters['registrations']
+        print(f'{mode}')
+        print(f'  operations/s:    {operations / options.seconds:.0f}')
+        print(f'  reads/s:         {counters["reads"] / options.seconds:.0f}')
+        print(f'  registrations/s: {counters["registrations"] / options.seconds:.0f}')
+        print(f'  locked errors:   {counters["locked"]}')
+
+
+if __name__ == '__main__':
+    main()
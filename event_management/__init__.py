@@ -1 +1,16 @@
-# Event Management System 
\ No newline at end of file
+# Event Management System
+
+# Load the Celery app when Django starts so that shared tasks and the beat
+# schedule use the project configuration.
+from .celery import app as celery_app
+
+# Count database connections opened and reused by requests and tasks.
+from .db import stats as db_stats  # noqa: F401
+
+# Log slow SQL statements, see `manage.py slow_queries`.
+from .db import slow_queries  # noqa: F401
+
+# Time Celery tasks for the /metrics endpoint.
+from . import metrics  # noqa: F401
+
+__all__ = ('celery_app',)
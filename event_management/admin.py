@@ -0,0 +1,74 @@
+"""
+Shared admin behaviour.
+"""
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Upper
+
+# PostgreSQL collations that order text by code point
+CODE_POINT_COLLATIONS = ('C', 'POSIX', 'C.UTF-8', 'C.utf8', 'ucs_basic')
+
+_code_point_order = {}
+
+
+def sorts_by_code_point(using):
+    """
+    Check if the text of database `using` is ordered by code point, as the
+    prefix range of `PrefixAutocompleteMixin` requires. SQLite compares
+    with BINARY; PostgreSQL uses the database's collation, which is only
+    read once per alias.
+    """
+    if using not in _code_point_order:
+        connection = connections[using]
+        if connection.vendor == 'sqlite':
+            _code_point_order[using] = True
+        elif connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT datcollate FROM pg_database WHERE datname = current_database()')
+                _code_point_order[using] = cursor.fetchone()[0] in CODE_POINT_COLLATIONS
+        else:
+            _code_point_order[using] = False
+    return _code_point_order[using]
+
+
+class PrefixAutocompleteMixin:
+    """
+    Answer autocomplete widget searches with case-insensitive prefix matches
+    on `autocomplete_search_fields`, instead of the substring searches across
+    `search_fields` that the changelist uses.
+
+    The prefix is matched as a range on `UPPER(field)`, which an index on
+    `Upper(field)` serves on every backend; `UPPER(field) LIKE` cannot use
+    an index on SQLite, nor on PostgreSQL without a pattern operator class.
+    The range only holds when the database orders text by code point (the
+    "C" collation on PostgreSQL) and uppercases the term the way Python
+    does, which SQLite only does for ASCII. Otherwise the search falls back
+    to an unindexed `istartswith`.
+    """
+    autocomplete_search_fields = ()
+    
+    def is_autocomplete(self, request):
+        """Check if `request` is an autocomplete widget search."""
+        match = getattr(request, 'resolver_match', None)
+        return match is not None and match.url_name == 'autocomplete'
+    
+    def get_search_results(self, request, queryset, search_term):
+        if not self.autocomplete_search_fields or not self.is_autocomplete(request):
+            return super().get_search_results(request, queryset, search_term)
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        condition = Q()
+        if not term.isascii() or not sorts_by_code_point(queryset.db):
+            for field in self.autocomplete_search_fields:
+                condition |= Q(**{f'{field}__istartswith': term})
+            return queryset.filter(condition), False
+        prefix = term.upper()
+        # The first string after every string starting with `prefix`
+        bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        for field in self.autocomplete_search_fields:
+            alias = f'{field}_upper'
+            queryset = queryset.alias(**{alias: Upper(field)})
+            condition |= Q(**{f'{alias}__gte': prefix, f'{alias}__lt': bound})
+        return queryset.filter(condition), False
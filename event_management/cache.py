@@ -0,0 +1,38 @@
+"""
+Cache backends counting hits and misses for the metrics endpoint.
+"""
+
+from django.core.cache.backends import locmem, redis
+
+from .metrics import record_cache_lookups
+
+_missing = object()
+
+
+class InstrumentedCacheMixin:
+    """
+    Count `get()` lookups as hits or misses.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version)
+        if value is _missing:
+            record_cache_lookups(0, 1)
+            return default
+        record_cache_lookups(1, 0)
+        return value
+
+
+class LocMemCache(InstrumentedCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class RedisCache(InstrumentedCacheMixin, redis.RedisCache):
+
+    def get_many(self, keys, version=None):
+        # Unlike the base class, Redis fetches all keys in one round trip
+        # without going through get().
+        keys = list(keys)
+        values = super().get_many(keys, version)
+        record_cache_lookups(len(values), len(keys) - len(values))
+        return values
@@ -4,6 +4,8 @@ Celery configuration for event_management project.
 
 import os
 from celery import Celery
+from celery.schedules import crontab
+from kombu import Exchange, Queue
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'event_management.settings')
@@ -17,6 +19,126 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+# Queues. Transactional mail (one recipient, someone waiting for it) must
+# never sit behind bulk fan-outs, so each kind gets its own queue and its own
+# workers. Run one worker per profile:
+#
+#   celery -A event_management worker -Q transactional -n transactional@%h \
+#       --concurrency=8 --prefetch-multiplier=1
+#   celery -A event_management worker -Q bulk -n bulk@%h \
+#       --concurrency=2 --prefetch-multiplier=4
+#
+# Transactional tasks are short and safe to run twice, so they are
+# acknowledged late and prefetched one at a time: a lost worker re-runs them
+# and no idle worker waits behind a busy one. Bulk fan-outs are long and not
+# idempotent per recipient, so they are acknowledged on receipt and may
+# prefetch a few messages.
+TRANSACTIONAL_QUEUE = 'transactional'
+BULK_QUEUE = 'bulk'
+
+# Priorities follow the Redis transport: 0 is the most urgent.
+PRIORITY_HIGH = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_LOW = 9
+
+TASK_ROUTES = {
+    'notifications.tasks.send_registration_confirmation': {
+        'queue': TRANSACTIONAL_QUEUE, 'priority': PRIORITY_HIGH,
+    },
+    'notifications.tasks.send_scheduled_reminder': {
+        'queue': TRANSACTIONAL_QUEUE, 'priority': PRIORITY_DEFAULT,
+    },
+    'notifications.tasks.relay_outbox': {
+        'queue': TRANSACTIONAL_QUEUE, 'priority': PRIORITY_DEFAULT,
+    },
+    # Default for direct calls only: retries are sent back to the queue of
+    # the task that sent the email.
+    'notifications.tasks.deliver_email': {
+        'queue': TRANSACTIONAL_QUEUE, 'priority': PRIORITY_LOW,
+    },
+    'notifications.tasks.send_event_cancellation_notification': {
+        'queue': BULK_QUEUE, 'priority': PRIORITY_HIGH,
+    },
+    'notifications.tasks.send_event_update_notification': {
+        'queue': BULK_QUEUE, 'priority': PRIORITY_DEFAULT,
+    },
+    'notifications.tasks.flush_event_updates': {
+        'queue': BULK_QUEUE, 'priority': PRIORITY_DEFAULT,
+    },
+    'notifications.tasks.send_daily_digests': {
+        'queue': BULK_QUEUE, 'priority': PRIORITY_LOW,
+    },
+    'notifications.tasks.send_event_reminders': {
+        'queue': BULK_QUEUE, 'priority': PRIORITY_DEFAULT,
+    },
+    'notifications.tasks.cleanup_old_notifications': {
+        'queue': BULK_QUEUE, 'priority': PRIORITY_LOW,
+    },
+    'events.tasks.purge_deleted_event': {
+        'queue': BULK_QUEUE, 'priority': PRIORITY_LOW,
+    },
+    'events.tasks.purge_deleted_events': {
+        'queue': BULK_QUEUE, 'priority': PRIORITY_LOW,
+    },
+    'events.tasks.archive_events': {
+        'queue': BULK_QUEUE, 'priority': PRIORITY_LOW,
+    },
+}
+
+WORKER_PROFILES = {
+    TRANSACTIONAL_QUEUE: {'concurrency': 8, 'prefetch_multiplier': 1, 'acks_late': True},
+    BULK_QUEUE: {'concurrency': 2, 'prefetch_multiplier': 4, 'acks_late': False},
+}
+
+app.conf.task_queues = (
+    Queue(TRANSACTIONAL_QUEUE, Exchange(TRANSACTIONAL_QUEUE), routing_key=TRANSACTIONAL_QUEUE),
+    Queue(BULK_QUEUE, Exchange(BULK_QUEUE), routing_key=BULK_QUEUE),
+)
+app.conf.task_default_queue = TRANSACTIONAL_QUEUE
+app.conf.task_default_priority = PRIORITY_DEFAULT
+app.conf.task_routes = TASK_ROUTES
+app.conf.task_annotations = {
+    name: {'acks_late': WORKER_PROFILES[route['queue']]['acks_late']}
+    for name, route in TASK_ROUTES.items()
+}
+app.conf.broker_transport_options = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+}
+
+# Periodic tasks run by `celery -A event_management beat`.
+app.conf.beat_schedule = {
+    'relay-notification-outbox': {
+        'task': 'notifications.tasks.relay_outbox',
+        'schedule': 30.0,
+    },
+    'enqueue-event-reminders': {
+        'task': 'notifications.tasks.send_event_reminders',
+        'schedule': crontab(minute='*/5'),
+    },
+    'flush-event-updates': {
+        'task': 'notifications.tasks.flush_event_updates',
+        'schedule': 60.0,
+    },
+    'send-daily-digests': {
+        'task': 'notifications.tasks.send_daily_digests',
+        'schedule': crontab(hour=7, minute=0),
+    },
+    'cleanup-old-notifications': {
+        'task': 'notifications.tasks.cleanup_old_notifications',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'purge-deleted-events': {
+        'task': 'events.tasks.purge_deleted_events',
+        'schedule': crontab(minute='*/15'),
+    },
+    'archive-events': {
+        'task': 'events.tasks.archive_events',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
+
 
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
@@ -0,0 +1,455 @@
+"""
+Index advice from a query workload.
+
+A `Workload` groups SQL statements by fingerprint (see
+event_management.db.slow_queries) and keeps, for each one, how often it ran
+and its query plan, together with the indexes that exist on the tables it
+touches. It is filled either by replaying a slow query log against a
+database (run with SLOW_QUERY_THRESHOLD_MS=0 to log every statement) or by
+capturing the statements of a test run as they execute.
+
+`advise()` reads the filters and ordering of each statement from the
+Django-generated SQL and compares them with its plan. A table that is
+scanned, searched with fewer columns than the statement filters on, or
+sorted in a temporary B-tree gets a composite index recommendation:
+equality columns first, then the range or ordering columns. Constant
+predicates (`is_active`, `NOT is_read`, `deleted_at IS NULL`) become the
+condition of a partial index. Existing indexes are flagged when they index
+a boolean column on its own, repeat the leading columns of another index
+with the same condition or never appear in a plan of the workload. An
+expression index is only flagged as unused when the workload filters on its
+expression, e.g. `UPPER("events"."title")`.
+
+Plans are read in SQLite's EXPLAIN QUERY PLAN and PostgreSQL's EXPLAIN
+formats. The PostgreSQL planner prefers sequential scans on small tables,
+so advice for it is only meaningful on production-sized data (see
+`manage.py seed_data`).
+"""
+
+import re
+from contextlib import ExitStack, contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, models
+from django.db.backends.utils import names_digest
+from django.db.models.sql import Query
+
+from event_management.db.slow_queries import explain, fingerprint
+
+_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+"(\w+)"')
+_CLAUSE_END = re.compile(r'\s(?:ORDER BY|GROUP BY|LIMIT|OFFSET|HAVING)\s')
+_COLUMN = r'"(\w+)"\."(\w+)"'
+_EQUAL = re.compile(_COLUMN + r'\s*(?:=\s*(?:%s|\?|-?\d|\')|IN\s*\()')
+_RANGE = re.compile(_COLUMN + r'\s*(?:[<>]=?|BETWEEN\b|LIKE\b)')
+_NULL_TEST = re.compile(_COLUMN + r'\s+IS\s+(NOT\s+)?NULL')
+_BARE = re.compile(r'(?<![=<>] )(?<![=<>])(NOT\s+)?' + _COLUMN + r'(?=\s*(?:\)|AND\b|OR\b|$))')
+_ORDER = re.compile(_COLUMN + r'\s+(?:ASC|DESC)')
+
+_SQLITE_ACCESS = re.compile(
+    r'^(SCAN|SEARCH) (\w+)(?: AS \w+)?'
+    r'(?: USING (?:COVERING )?INDEX (\w+)| USING (?:INTEGER )?PRIMARY KEY)?(?: \((.*)\))?'
+)
+_SQLITE_USED_COLUMN = re.compile(r'(\w+)(?:=|>|<|\sIN\b)')
+_PG_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+_PG_INDEX_SCAN = re.compile(r'Index (?:Only )?Scan(?: Backward)? using (\w+) on (\w+)')
+_PG_BITMAP_SCAN = re.compile(r'Bitmap Index Scan on (\w+)')
+
+
+def tables(sql):
+    """Return the tables `sql` reads, in order of appearance."""
+    return list(dict.fromkeys(_TABLES.findall(sql)))
+
+
+def predicates(sql):
+    """
+    Return `{table: {'equal': [...], 'range': [...], 'order': [...],
+    'constant': {column: value}}}` for the filters and ordering of `sql`.
+    A constant is True/False for a boolean column tested on its own and
+    'null'/'not null' for an IS [NOT] NULL test.
+    """
+    result = {}
+
+    def table(name):
+        return result.setdefault(name, {'equal': [], 'range': [], 'order': [], 'constant': {}})
+
+    where_at = sql.find(' WHERE ')
+    if where_at != -1:
+        where = sql[where_at + 7:]
+        end = _CLAUSE_END.search(where)
+        where = where[:end.start()] if end else where
+        for name, column in _EQUAL.findall(where):
+            if column not in table(name)['equal']:
+                table(name)['equal'].append(column)
+        for name, column in _RANGE.findall(where):
+            if column not in table(name)['range']:
+                table(name)['range'].append(column)
+        for name, column, negated in _NULL_TEST.findall(where):
+            table(name)['constant'][column] = 'not null' if negated else 'null'
+        for negated, name, column in _BARE.findall(where):
+            table(name)['constant'][column] = not negated
+
+    order_at = sql.rfind(' ORDER BY ')
+    if order_at != -1:
+        for name, column in _ORDER.findall(sql[order_at:]):
+            if column not in table(name)['order']:
+                table(name)['order'].append(column)
+    return result
+
+
+def plan_access(plan, vendor):
+    """
+    Return `(access, used_indexes, sorts)` for a plan: `access` maps each
+    table to ('scan', None) or ('search', columns the index was searched
+    on, or None if the plan does not say), `used_indexes` is the set of
+    index names in the plan and `sorts` whether it sorts outside an index.
+    """
+    access = {}
+    used = set()
+    sorts = False
+    for line in plan or ():
+        if vendor == 'sqlite':
+            if 'USE TEMP B-TREE FOR ORDER BY' in line:
+                sorts = True
+            match = _SQLITE_ACCESS.match(line.strip())
+            if match is None:
+                continue
+            kind, name, index, condition = match.groups()
+            if index:
+                used.add(index)
+            if kind == 'SCAN':
+                access.setdefault(name, ('scan', None))
+            else:
+                access[name] = ('search', _SQLITE_USED_COLUMN.findall(condition or ''))
+        else:
+            if line.strip().startswith('Sort '):
+                sorts = True
+            for name in _PG_SEQ_SCAN.findall(line):
+                access.setdefault(name, ('scan', None))
+            for index, name in _PG_INDEX_SCAN.findall(line):
+                used.add(index)
+                access[name] = ('search', None)
+            used.update(_PG_BITMAP_SCAN.findall(line))
+    return access, used, sorts
+
+
+def introspect_indexes(connection, table):
+    """Return `{name: {'columns': [...], 'unique': bool}}` for a table's indexes."""
+    connection.ensure_connection()
+    cursor = connection.create_cursor()
+    try:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    finally:
+        cursor.close()
+    return {
+        name: {'columns': constraint['columns'], 'unique': constraint['unique']}
+        for name, constraint in constraints.items()
+        if (constraint['index'] or constraint['unique']) and not constraint['primary_key']
+        and constraint['columns']
+    }
+
+
+class Workload:
+    """
+    Statements grouped by fingerprint, with their plans and the indexes of
+    the tables they touch.
+    """
+
+    def __init__(self):
+        self.queries = {}
+        self.indexes = {}
+        self.vendor = None
+
+    def add(self, connection, sql, params, count=1, many=False):
+        """Count a statement, planning and introspecting it when first seen."""
+        key = fingerprint(sql)
+        query = self.queries.get(key)
+        if query is None:
+            query = self.queries[key] = {
+                'fingerprint': key,
+                'sql': sql,
+                'count': 0,
+                'plan': None if many else explain(connection, sql, params),
+            }
+            self.vendor = connection.vendor
+            if query['plan'] is not None:
+                # Read again for each new shape: tables may get their
+                # indexes after the first statements that touch them.
+                for table in tables(sql):
+                    self.indexes[table] = introspect_indexes(connection, table)
+        query['count'] += count
+
+    def replay(self, connection, entries):
+        """Add logged statements (see slow_queries.read_entries), planned on `connection`."""
+        for entry in entries:
+            self.add(connection, entry['sql'], entry.get('params') or (), many=entry.get('many', False))
+
+    @contextmanager
+    def capture(self):
+        """Add every statement run on this thread's connections while in the block."""
+        def wrapper(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            self.add(context['connection'], sql, params, many=many)
+            return result
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(wrapper))
+            yield self
+
+
+def table_models():
+    """Return `{db_table: model}` for the concrete models of the project's apps."""
+    base = str(settings.BASE_DIR)
+    return {
+        model._meta.db_table: model
+        for model in apps.get_models()
+        if not model._meta.proxy and model._meta.managed
+        and model._meta.app_config.path.startswith(base)
+        and 'site-packages' not in model._meta.app_config.path
+    }
+
+
+def _field(model, column):
+    for field in model._meta.concrete_fields:
+        if field.column == column:
+            return field
+    return None
+
+
+def _condition_q(model, constant):
+    q = models.Q()
+    for column, value in sorted(constant.items()):
+        name = _field(model, column).name
+        if value in ('null', 'not null'):
+            q &= models.Q(**{f'{name}__isnull': value == 'null'})
+        else:
+            q &= models.Q(**{name: value})
+    return q
+
+
+def index_name(table, columns, constant):
+    """Return a Django-style index name that also depends on the condition."""
+    condition = ','.join(f'{column}={value}' for column, value in sorted(constant.items()))
+    return f"{table[:11]}_{columns[0][:7]}_{names_digest(table, *columns, condition, length=6)}_idx"
+
+
+def _candidate(filters, is_main, sorts):
+    columns = list(filters['equal'])
+    order = filters['order'] if is_main else []
+    if filters['range'] and not (order and order[0] == filters['range'][0]):
+        columns.append(filters['range'][0])
+    else:
+        columns.extend(column for column in order if column not in columns)
+    if not filters['equal'] and not filters['range'] and not (is_main and sorts):
+        return None
+    return columns or None
+
+
+def _covered(columns, constant, existing):
+    # The plan already passed over an index with the same columns but a
+    # different condition, so only an exact match counts.
+    return any(
+        index['columns'][:len(columns)] == columns and index['constant'] == constant
+        for index in existing
+    )
+
+
+def _q_constant(model, condition):
+    """Return a Q of plain AND-ed lookups as a constant dict, or None."""
+    if condition.connector != 'AND' or condition.negated:
+        return None
+    constant = {}
+    for child in condition.children:
+        if not isinstance(child, tuple):
+            return None
+        lookup, value = child
+        name, _, suffix = lookup.partition('__')
+        column = model._meta.get_field(name).column
+        if suffix == 'isnull':
+            constant[column] = 'null' if value else 'not null'
+        elif not suffix and isinstance(value, bool):
+            constant[column] = value
+        else:
+            return None
+    return constant
+
+
+def _index_constant(declared, name):
+    """
+    Return the condition of an index as a constant dict: {} for a full
+    index, None for a condition other than AND-ed lookups.
+    """
+    if name in declared and declared[name][1].condition is not None:
+        return _q_constant(declared[name][0], declared[name][1].condition)
+    return {}
+
+
+def _existing(workload, table, declared):
+    return [
+        {'columns': index['columns'], 'constant': _index_constant(declared, name)}
+        for name, index in workload.indexes.get(table, {}).items()
+    ]
+
+
+def _leads(index, constant, other, other_constant):
+    # Expression indexes have no columns to compare, and a partial index
+    # only repeats another one with the same condition.
+    columns = index['columns']
+    return (
+        None not in columns and constant is not None and constant == other_constant
+        and other['columns'][:len(columns)] == columns
+    )
+
+
+def _expression_sql(model, index):
+    """
+    Return the SQL of the leading expression of a declared index as the
+    ORM writes it in a statement on the model's table, e.g.
+    `UPPER("events"."title")`.
+    """
+    query = Query(model, alias_cols=True)
+    expression = index.expressions[0].resolve_expression(query, allow_joins=False)
+    return query.get_compiler(connection=connections['default']).compile(expression)[0]
+
+
+def model_indexes():
+    """Return `{name: (model, Index)}` for the indexes declared in model Meta."""
+    return {
+        index.name: (model, index)
+        for model in apps.get_models()
+        for index in model._meta.indexes
+    }
+
+
+def advise(workload, min_count=1):
+    """
+    Return `(recommendations, flags)` for a workload.
+
+    Each recommendation has the `model`, the `index` to add, the `table`,
+    `columns` and `constant` it was built from and the `fingerprints` and
+    `count` of the statements it serves. Each flag has the `table`, index
+    `name`, `columns` (the expressions of an expression index), a `reason`
+    and, for indexes declared in model Meta, the `model` and `index`.
+    """
+    models_by_table = table_models()
+    declared = model_indexes()
+    candidates = {}
+    for query in workload.queries.values():
+        if query['count'] < min_count or query['plan'] is None:
+            continue
+        access, _, sorts = plan_access(query['plan'], workload.vendor)
+        main = (tables(query['sql']) or [None])[0]
+        for table, filters in predicates(query['sql']).items():
+            model = models_by_table.get(table)
+            if model is None or table not in access:
+                continue
+            if model._meta.pk.column in filters['equal']:
+                # Looked up by primary key
+                continue
+            kind, used = access[table]
+            is_main = table == main
+            needs = kind == 'scan' or (is_main and sorts and filters['order'])
+            if kind == 'search' and used is not None and not set(filters['equal']) <= set(used):
+                needs = True
+            if not needs:
+                continue
+            columns = _candidate(filters, is_main, sorts)
+            if columns is None or columns == [model._meta.pk.column]:
+                continue
+            if any(_field(model, column) is None for column in [*columns, *filters['constant']]):
+                # Aliased tables and raw SQL
+                continue
+            constant = {column: value for column, value in filters['constant'].items() if column not in columns}
+            candidate = candidates.setdefault((table, tuple(columns)), {
+                'table': table,
+                'model': model,
+                'columns': columns,
+                'constant': constant,
+                'fingerprints': [],
+                'count': 0,
+            })
+            # Only the conditions every statement shares can make the index partial
+            candidate['constant'] = {
+                column: value for column, value in candidate['constant'].items()
+                if constant.get(column) == value
+            }
+            candidate['fingerprints'].append(query['fingerprint'])
+            candidate['count'] += query['count']
+
+    recommendations = []
+    for candidate in sorted(candidates.values(), key=lambda candidate: -len(candidate['columns'])):
+        if _covered(candidate['columns'], candidate['constant'], _existing(workload, candidate['table'], declared)):
+            continue
+        wider = [
+            other for other in recommendations
+            if other['table'] == candidate['table'] and _covered(candidate['columns'], candidate['constant'], [other])
+        ]
+        if wider:
+            wider[0]['fingerprints'] += candidate['fingerprints']
+            wider[0]['count'] += candidate['count']
+            continue
+        model = candidate['model']
+        fields = [_field(model, column).name for column in candidate['columns']]
+        kwargs = {}
+        if candidate['constant']:
+            kwargs['condition'] = _condition_q(model, candidate['constant'])
+        candidate['index'] = models.Index(
+            fields=fields,
+            name=index_name(candidate['table'], candidate['columns'], candidate['constant']),
+            **kwargs
+        )
+        recommendations.append(candidate)
+    recommendations.sort(key=lambda recommendation: -recommendation['count'])
+    return recommendations, flag_indexes(workload, declared, models_by_table)
+
+
+def flag_indexes(workload, declared, models_by_table):
+    """Return the existing indexes that look useless for the workload."""
+    used = set()
+    for query in workload.queries.values():
+        used |= plan_access(query['plan'], workload.vendor)[1]
+    statements = [query['sql'] for query in workload.queries.values() if query['plan'] is not None]
+
+    flags = []
+    for table, indexes in sorted(workload.indexes.items()):
+        model = models_by_table.get(table)
+        if model is None:
+            continue
+        for name, index in sorted(indexes.items()):
+            if index['unique']:
+                continue
+            columns = index['columns']
+            judged = True
+            if None in columns:
+                # An expression index is only judged on statements that
+                # filter on its expression; its columns are shown as the
+                # expressions of the model Meta index.
+                if name in declared:
+                    columns = [str(expression) for expression in declared[name][1].expressions]
+                    leading = _expression_sql(*declared[name])
+                    judged = any(leading in sql for sql in statements)
+                else:
+                    columns = ['expression']
+                    judged = False
+            reason = None
+            field = _field(model, index['columns'][0])
+            if len(index['columns']) == 1 and isinstance(field, models.BooleanField):
+                reason = f'indexes the boolean {field.name} on its own'
+            else:
+                constant = _index_constant(declared, name)
+                for other_name, other in indexes.items():
+                    if other_name != name and _leads(index, constant, other, _index_constant(declared, other_name)) and (
+                        other['unique'] or len(other['columns']) > len(index['columns']) or other_name < name
+                    ):
+                        reason = f'its columns lead {other_name}'
+                        break
+            if reason is None and name not in used and judged:
+                reason = 'no plan of the workload uses it'
+            if reason is None:
+                continue
+            flag = {'table': table, 'name': name, 'columns': columns, 'reason': reason}
+            if name in declared:
+                flag['model'], flag['index'] = declared[name]
+            flags.append(flag)
+    return flags
@@ -0,0 +1,77 @@
+"""
+PostgreSQL backend with a per-process pool of idle connections.
+
+Under ASGI, requests run on short-lived threads, so CONN_MAX_AGE cannot keep
+their connections alive and every request would connect anew. With this
+backend (enabled by DB_POOL_SIZE), closing a connection that is idle and
+outside a transaction parks it in a pool instead, and the next connection
+of the process takes it from there. Up to DB_POOL_SIZE connections are kept
+per database alias; pooled connections are checked with `SELECT 1` before
+reuse when DB_CONN_HEALTH_CHECKS is on.
+"""
+
+import queue
+import threading
+
+from django.conf import settings
+from django.db.backends.postgresql import base
+
+from event_management.db import stats
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias):
+    """Return the idle connection pool of a database alias."""
+    with _pools_lock:
+        if alias not in _pools:
+            # Last in, first out: the most recently used connections are
+            # the least likely to have been dropped by the server.
+            _pools[alias] = queue.LifoQueue(maxsize=settings.DB_POOL_SIZE)
+        return _pools[alias]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL connection that returns to a pool when closed.
+    """
+
+    def _is_healthy(self, connection):
+        if connection.closed:
+            return False
+        if not settings.DB_CONN_HEALTH_CHECKS:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not connection.autocommit:
+                connection.rollback()
+            return True
+        except self.Database.Error:
+            connection.close()
+            return False
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias)
+        while True:
+            try:
+                connection = pool.get_nowait()
+            except queue.Empty:
+                break
+            if self._is_healthy(connection):
+                stats.record(self.alias, 'pool_hits')
+                return connection
+        stats.record(self.alias, 'pool_misses')
+        return super().get_new_connection(conn_params)
+
+    def _close(self):
+        connection = self.connection
+        # Only connections with no transaction in progress are reusable.
+        if connection is not None and not connection.closed and connection.info.transaction_status == 0:
+            try:
+                get_pool(self.alias).put_nowait(connection)
+                return
+            except queue.Full:
+                pass
+        super()._close()
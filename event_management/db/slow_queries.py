@@ -0,0 +1,276 @@
+"""
+Slow query log.
+
+Requests (`SlowQueryOriginMiddleware`), Celery tasks and management commands
+(manage.py) run their queries through `record_slow_queries`, installed with
+`recording()` for as long as they last. A statement taking
+SLOW_QUERY_THRESHOLD_MS or longer is written as a JSON line to the
+'event_management.slow_queries' logger, which LOGGING sends to a rotating
+file. Each line holds the SQL, its parameters with text values redacted
+(see `redact`), the query fingerprint (see
+event_management.middleware.query_shape), the duration, where it came from
+(the view, Celery task or management command), the innermost project frame
+and the library frames below it. A SLOW_QUERY_EXPLAIN_RATE fraction of
+slow SELECTs also records the plan from the backend's EXPLAIN (EXPLAIN
+QUERY PLAN on SQLite), run with the redacted parameters so that the plan
+cannot show them either. `manage.py slow_queries` aggregates the file by
+fingerprint.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import re
+import sys
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from event_management.middleware import query_shape
+
+logger = logging.getLogger('event_management.slow_queries')
+
+_origin = ContextVar('slow_query_origin', default=None)
+_task_recordings = {}
+
+# Frames of these files say nothing about where a query came from.
+_SKIPPED_FILES = (
+    __file__,
+    str(Path(__file__).parent.parent / 'metrics.py'),
+    str(Path(__file__).parent.parent / 'middleware.py'),
+    str(Path(__file__).parent.parent / 'profiling.py'),
+)
+_DB_LAYER = '/django/db/'
+_TIMESTAMP = re.compile(r'^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?([+-]\d{2}:?\d{2}|Z)?)?$')
+STACK_DEPTH = 8
+REDACTED = '<redacted>'
+
+
+def fingerprint(sql):
+    """Return a short stable id for the shape of `sql`."""
+    return hashlib.sha1(query_shape(sql).encode()).hexdigest()[:12]
+
+
+def current_origin():
+    """Return the view, task or command running the current query."""
+    origin = _origin.get()
+    if origin is not None:
+        return origin
+    if len(sys.argv) > 1 and sys.argv[0].endswith('manage.py'):
+        return f'command:{sys.argv[1]}'
+    return 'unknown'
+
+
+def _frame_name(frame, base):
+    filename = frame.filename
+    if 'site-packages' in filename:
+        filename = filename.split('site-packages/', 1)[-1]
+    elif filename.startswith(base):
+        filename = str(Path(filename).relative_to(base))
+    return f'{filename}:{frame.lineno} in {frame.name}'
+
+
+def caller_frames():
+    """
+    Return the innermost project frame and the innermost frames outside
+    Django's database layer, as `file:line in function`.
+    """
+    base = str(settings.BASE_DIR)
+    project_frame = None
+    stack = []
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename in _SKIPPED_FILES or _DB_LAYER in frame.filename:
+            continue
+        in_project = frame.filename.startswith(base) and 'site-packages' not in frame.filename
+        if len(stack) < STACK_DEPTH:
+            stack.append(_frame_name(frame, base))
+        if in_project:
+            project_frame = _frame_name(frame, base)
+            break
+    return project_frame, stack
+
+
+def redact(value):
+    """
+    Return a query parameter safe to log.
+
+    Numbers, booleans, NULL and timestamps are kept, since plans and index
+    advice depend on them. Other text (usernames, emails, password hashes)
+    is replaced with REDACTED.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (str, bytes, memoryview)):
+        if isinstance(value, str) and _TIMESTAMP.match(value):
+            return value
+        return REDACTED
+    text = str(value)
+    return text if len(text) <= 200 else text[:200] + '...'
+
+
+def explain(connection, sql, params):
+    """Return the backend's plan for a SELECT, or None."""
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    # A bare backend cursor, so the EXPLAIN is neither wrapped nor counted.
+    connection.ensure_connection()
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        rows = cursor.fetchall()
+    except DatabaseError as e:
+        return [f'EXPLAIN failed: {str(e)}']
+    finally:
+        cursor.close()
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [' '.join(str(column) for column in row) for row in rows]
+
+
+def record_slow_queries(execute, sql, params, many, context):
+    """Execution wrapper logging statements over the threshold."""
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+        log_slow_query(context['connection'], sql, params, many, duration_ms)
+    return result
+
+
+def log_slow_query(connection, sql, params, many, duration_ms):
+    frame, stack = caller_frames()
+    params = None if many else [redact(param) for param in params or ()]
+    entry = {
+        'time': time.time(),
+        'alias': connection.alias,
+        'vendor': connection.vendor,
+        'fingerprint': fingerprint(sql),
+        'duration_ms': round(duration_ms, 3),
+        'sql': sql,
+        'params': params,
+        'many': many,
+        'origin': current_origin(),
+        'frame': frame,
+        'stack': stack,
+    }
+    if not many and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE:
+        entry['plan'] = explain(connection, sql, params)
+    logger.warning(json.dumps(entry))
+
+
+def log_files(path):
+    """Return the slow query log at `path` and its rotated backups, oldest first."""
+    path = Path(path)
+    # RotatingFileHandler keeps `<name>.1` (newest) to `<name>.<backupCount>`
+    backups = [backup for backup in path.parent.glob(f'{path.name}.*') if backup.suffix[1:].isdigit()]
+    backups.sort(key=lambda backup: int(backup.suffix[1:]), reverse=True)
+    return backups + ([path] if path.exists() else [])
+
+
+def read_entries(path, since=None):
+    """Yield the logged slow queries, skipping lines that do not parse."""
+    for log_file in log_files(path):
+        with open(log_file) as lines:
+            for line in lines:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or entry.get('time', 0) >= since:
+                    yield entry
+
+
+def aggregate(entries):
+    """Group slow queries by fingerprint, slowest total time first."""
+    groups = {}
+    for entry in entries:
+        group = groups.get(entry['fingerprint'])
+        if group is None:
+            group = groups[entry['fingerprint']] = {
+                'fingerprint': entry['fingerprint'],
+                'shape': query_shape(entry['sql']),
+                'durations': [],
+                'origins': Counter(),
+                'slowest': entry,
+                'plan': None,
+                'last_seen': 0,
+            }
+        group['durations'].append(entry['duration_ms'])
+        group['origins'][entry.get('origin', 'unknown')] += 1
+        if entry['duration_ms'] > group['slowest']['duration_ms']:
+            group['slowest'] = entry
+        if entry.get('plan') and entry.get('time', 0) >= group['last_seen']:
+            group['plan'] = entry['plan']
+        group['last_seen'] = max(group['last_seen'], entry.get('time', 0))
+
+    summaries = []
+    for group in groups.values():
+        durations = sorted(group.pop('durations'))
+        group.update({
+            'count': len(durations),
+            'total_ms': round(sum(durations), 3),
+            'mean_ms': round(sum(durations) / len(durations), 3),
+            'p95_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+            'max_ms': durations[-1],
+        })
+        summaries.append(group)
+    return sorted(summaries, key=lambda group: -group['total_ms'])
+
+
+@contextmanager
+def recording(origin=None):
+    """
+    Log the slow queries run in the block on this thread's connections,
+    attributed to `origin` when given. Nested blocks only change the origin.
+    """
+    with ExitStack() as stack:
+        if settings.SLOW_QUERY_LOG:
+            for alias in connections:
+                connection = connections[alias]
+                if record_slow_queries not in connection.execute_wrappers:
+                    stack.enter_context(connection.execute_wrapper(record_slow_queries))
+        if origin is not None:
+            stack.callback(_origin.reset, _origin.set(origin))
+        yield
+
+
+def start_task_recording(sender=None, task_id=None, **kwargs):
+    if sender is not None:
+        stack = ExitStack()
+        stack.enter_context(recording(f'task:{sender.name}'))
+        _task_recordings[task_id] = stack
+
+
+def stop_task_recording(sender=None, task_id=None, **kwargs):
+    stack = _task_recordings.pop(task_id, None)
+    if stack is not None:
+        stack.close()
+
+
+class SlowQueryOriginMiddleware:
+    """
+    Log the slow queries of a request, attributed to its view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with recording(f'{request.method} {request.path}'):
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _origin.set(f'view:{request.resolver_match.view_name}')
+
+
+task_prerun.connect(start_task_recording, dispatch_uid='slow-queries-task-start')
+task_postrun.connect(stop_task_recording, dispatch_uid='slow-queries-task-end')
@@ -0,0 +1,54 @@
+"""
+SQLite backend tuned for single-node deployments.
+
+Stock SQLite settings serialize readers and writers and make a transaction
+that reads before writing fail with "database is locked" instead of
+waiting. This backend:
+
+- switches to WAL journaling, so readers no longer block the writer, with
+  `synchronous=NORMAL`, which is durable across application crashes in WAL
+  mode,
+- waits up to SQLITE_BUSY_TIMEOUT_MS for locks and sizes the page cache and
+  memory map from SQLITE_CACHE_SIZE_KB and SQLITE_MMAP_SIZE, and
+- starts the write transactions opened with
+  `event_management.db.transactions.immediate()` with `BEGIN IMMEDIATE`,
+  taking the write lock up front so concurrent writers queue on the busy
+  timeout rather than deadlocking when they upgrade from reading to
+  writing. Other transactions, read-only ones included, begin deferred and
+  only take the lock when they first write.
+
+Enabled for every SQLite database by SQLITE_TUNED.
+"""
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite connection with write transactions that lock immediately.
+    """
+
+    # Set by `immediate()` while it opens its transaction.
+    begin_immediate = False
+
+    def _start_transaction_under_autocommit(self):
+        if self.begin_immediate:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Apply the performance profile to a new SQLite connection."""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode = WAL')
+        cursor.execute('PRAGMA synchronous = NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}')
+        cursor.execute(f'PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KB)}')
+        cursor.execute(f'PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}')
+        cursor.execute('PRAGMA temp_store = MEMORY')
+
+
+connection_created.connect(apply_pragmas, sender=DatabaseWrapper, dispatch_uid='sqlite-profile')
@@ -0,0 +1,69 @@
+"""
+Database connection counters.
+
+`opened` counts new connections per database alias. `reused` counts web
+requests and Celery tasks that started with a connection already open, which
+only happens with persistent connections (CONN_MAX_AGE > 0). The pooled
+PostgreSQL backend adds `pool_hits` and `pool_misses`. The health check
+reports them per process.
+"""
+
+import threading
+from collections import Counter, defaultdict
+
+from celery.signals import task_prerun
+from django.core.signals import request_started
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+
+_counters = defaultdict(Counter)
+_lock = threading.Lock()
+
+
+def record(alias, name, count=1):
+    """Add `count` to a counter of a database alias."""
+    with _lock:
+        _counters[alias][name] += count
+
+
+def snapshot():
+    """Return `{alias: {counter: value}}`."""
+    with _lock:
+        return {alias: dict(counters) for alias, counters in _counters.items()}
+
+
+def reset():
+    """Clear every counter."""
+    with _lock:
+        _counters.clear()
+
+
+def _count_reused():
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None:
+            record(connection.alias, 'reused')
+
+
+def count_opened(sender, connection, **kwargs):
+    record(connection.alias, 'opened')
+
+
+def count_request_reuse(sender, **kwargs):
+    # Runs after Django's own request_started handler has closed
+    # connections that are obsolete or unusable.
+    _count_reused()
+
+
+def count_task_reuse(sender=None, task=None, **kwargs):
+    if task is not None and getattr(task.request, 'is_eager', False):
+        # Eager tasks run inside the caller's request or transaction.
+        return
+    # Drop obsolete or broken connections before the task, as Django does
+    # before each request.
+    close_old_connections()
+    _count_reused()
+
+
+connection_created.connect(count_opened, dispatch_uid='db-stats-opened')
+request_started.connect(count_request_reuse, dispatch_uid='db-stats-request')
+task_prerun.connect(count_task_reuse, dispatch_uid='db-stats-task')
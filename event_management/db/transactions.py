@@ -0,0 +1,33 @@
+"""
+Write transactions that lock up front.
+
+`immediate()` is `transaction.atomic()` for write transactions that read
+before they write. On the tuned SQLite backend (see
+event_management/db/sqlite3) the outermost block begins with
+`BEGIN IMMEDIATE`, so the transaction holds the write lock from its first
+read: concurrent writers wait on the busy timeout instead of failing with
+"database is locked" when they upgrade from a read lock. Nested blocks
+join the enclosing transaction, and other backends, which lock rows rather
+than the database, behave exactly as with `atomic()`.
+"""
+
+from django.db import transaction
+
+
+class Immediate(transaction.Atomic):
+
+    def __enter__(self):
+        connection = transaction.get_connection(self.using)
+        connection.begin_immediate = True
+        try:
+            super().__enter__()
+        finally:
+            connection.begin_immediate = False
+
+
+def immediate(using=None, savepoint=True):
+    """Open an atomic block that takes SQLite's write lock when it begins."""
+    # Used as a bare decorator, `using` is the decorated function.
+    if callable(using):
+        return Immediate(None, savepoint, False)(using)
+    return Immediate(using, savepoint, False)
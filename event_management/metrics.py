@@ -0,0 +1,288 @@
+"""
+Prometheus metrics for the API, the database, the cache and Celery tasks.
+
+`MetricsMiddleware` times every request and, with the query counts that
+`QueryCountMiddleware` records, labels them by view and action: the DRF
+viewset class and its action (`list`, `register`, `unread_count`, ...), or
+the URL name of other views. Celery signals time each task by name and
+count failures and retries, and the cache backends in event_management.cache
+count hits and misses. The in-process BackgroundExecutor reports its queue
+depth as jobs come and go. Outbox, dead letter and queue depths are read
+from the database and the broker when `/metrics` is scraped.
+
+With several gunicorn workers each process keeps its own values. Set
+PROMETHEUS_MULTIPROC_DIR to a directory shared by the workers, and
+`/metrics` aggregates them; see gunicorn.conf.py for the cleanup hooks. Only
+set it for the processes that share the directory: the Dockerfile exports it
+for gunicorn alone, so runserver keeps its own in-process values.
+
+Celery tasks run in the worker containers, so their durations and failures
+never reach the web process. A worker started with CELERY_METRICS_PORT
+serves its own metrics on that port. The default prefork pool runs tasks in
+child processes, so give each worker a PROMETHEUS_MULTIPROC_DIR of its own
+(docker-compose.yml does), which is emptied when the worker starts.
+"""
+
+import logging
+import os
+import shutil
+import time
+
+from celery.signals import (
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_retry,
+    worker_init,
+    worker_process_shutdown,
+)
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils import timezone
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+
+def multiprocess_directory():
+    """
+    Return PROMETHEUS_MULTIPROC_DIR, creating it if missing, or None.
+
+    prometheus_client writes a file there for each labelled value as soon as
+    it is first used, so a missing directory would fail the first request or
+    task rather than the import.
+    """
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+multiprocess_directory()
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Time spent handling API requests',
+    ['view', 'action', 'method']
+)
+REQUESTS = Counter(
+    'http_requests',
+    'API requests handled, by response status class',
+    ['view', 'action', 'method', 'status']
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries',
+    'SQL queries run per request',
+    ['view', 'action'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 200)
+)
+REQUEST_DB_TIME = Counter(
+    'http_request_db_seconds',
+    'Time spent in SQL queries while handling requests',
+    ['view', 'action']
+)
+CACHE_REQUESTS = Counter(
+    'django_cache_requests',
+    'Cache lookups, by result',
+    ['result']
+)
+TASK_LATENCY = Histogram(
+    'celery_task_duration_seconds',
+    'Time spent running Celery tasks',
+    ['task', 'state'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+)
+TASK_FAILURES = Counter('celery_task_failures', 'Celery tasks that raised', ['task'])
+TASK_RETRIES = Counter('celery_task_retries', 'Celery task retries', ['task'])
+EXECUTOR_QUEUE_LENGTH = Gauge(
+    'background_executor_queue_length',
+    'Jobs waiting in the in-process background executor',
+    ['executor'],
+    multiprocess_mode='livesum'
+)
+
+_task_started = {}
+
+
+def view_labels(request):
+    """Return the (view, action) labels of a resolved request."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched', ''
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name or match.func.__name__, ''
+    actions = getattr(match.func, 'actions', None) or {}
+    return view_class.__name__, actions.get(request.method.lower(), '')
+
+
+class MetricsMiddleware:
+    """
+    Time requests and record their SQL query counts by view and action.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        view, action = view_labels(request)
+        REQUEST_LATENCY.labels(view, action, request.method).observe(elapsed)
+        REQUESTS.labels(view, action, request.method, f'{response.status_code // 100}xx').inc()
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            REQUEST_QUERIES.labels(view, action).observe(stats.count)
+            REQUEST_DB_TIME.labels(view, action).inc(stats.duration)
+        return response
+
+
+def record_cache_lookups(hits, misses):
+    if hits:
+        CACHE_REQUESTS.labels('hit').inc(hits)
+    if misses:
+        CACHE_REQUESTS.labels('miss').inc(misses)
+
+
+def record_executor_depth(executor, depth):
+    EXECUTOR_QUEUE_LENGTH.labels(executor).set(depth)
+
+
+def start_task_timer(sender=None, task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+def observe_task(sender=None, task_id=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None and sender is not None:
+        TASK_LATENCY.labels(sender.name, state or 'UNKNOWN').observe(time.perf_counter() - started)
+
+
+def count_task_failure(sender=None, **kwargs):
+    if sender is not None:
+        TASK_FAILURES.labels(sender.name).inc()
+
+
+def count_task_retry(sender=None, **kwargs):
+    if sender is not None:
+        TASK_RETRIES.labels(sender.name).inc()
+
+
+task_prerun.connect(start_task_timer, dispatch_uid='metrics-task-start')
+task_postrun.connect(observe_task, dispatch_uid='metrics-task-end')
+task_failure.connect(count_task_failure, dispatch_uid='metrics-task-failure')
+task_retry.connect(count_task_retry, dispatch_uid='metrics-task-retry')
+
+
+def registry():
+    """Return the registry to expose: this process's, or the aggregated multiprocess one."""
+    if not multiprocess_directory():
+        return REGISTRY
+    aggregated = CollectorRegistry()
+    multiprocess.MultiProcessCollector(aggregated)
+    return aggregated
+
+
+def start_worker_exporter(**kwargs):
+    """Serve a Celery worker's metrics on CELERY_METRICS_PORT, if set."""
+    if not settings.CELERY_METRICS_PORT:
+        return
+    directory = multiprocess_directory()
+    if directory:
+        # Files left by a previous run of this worker
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+    start_http_server(settings.CELERY_METRICS_PORT, registry=registry())
+    logger.info(f'Serving worker metrics on port {settings.CELERY_METRICS_PORT}')
+
+
+def mark_worker_process_dead(pid=None, **kwargs):
+    if pid and multiprocess_directory():
+        multiprocess.mark_process_dead(pid)
+
+
+worker_init.connect(start_worker_exporter, dispatch_uid='metrics-worker-exporter')
+worker_process_shutdown.connect(mark_worker_process_dead, dispatch_uid='metrics-worker-process-dead')
+
+
+class BacklogCollector:
+    """
+    Outbox, dead letter and Celery queue depths, read at scrape time. The
+    background executor's queue is in process memory, so it is reported by
+    EXECUTOR_QUEUE_LENGTH instead, summed over the live processes.
+    """
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        from notifications.models import EmailDeadLetter, OutboxMessage
+
+        now = timezone.now()
+        outbox = GaugeMetricFamily('notification_outbox_messages', 'Outbox rows not yet relayed', labels=['state'])
+        outbox.add_metric(['ready'], OutboxMessage.objects.filter(available_at__lte=now).count())
+        outbox.add_metric(['scheduled'], OutboxMessage.objects.filter(available_at__gt=now).count())
+        yield outbox
+
+        oldest = OutboxMessage.objects.order_by('created_at').values_list('created_at', flat=True).first()
+        yield GaugeMetricFamily(
+            'notification_outbox_oldest_age_seconds',
+            'Age of the oldest outbox row',
+            value=(now - oldest).total_seconds() if oldest else 0
+        )
+        yield GaugeMetricFamily(
+            'email_dead_letters',
+            'Undelivered emails waiting to be replayed',
+            value=EmailDeadLetter.objects.filter(replayed_at__isnull=True).count()
+        )
+
+        depths = queue_depths()
+        if depths:
+            queues = GaugeMetricFamily('celery_queue_length', 'Messages waiting in a Celery queue', labels=['queue'])
+            for queue, depth in depths.items():
+                queues.add_metric([queue], depth)
+            yield queues
+
+
+def queue_depths():
+    """Return `{queue: messages}` from the broker, or {} if it cannot tell."""
+    from event_management.celery import app
+
+    if app.conf.task_always_eager:
+        return {}
+    depths = {}
+    try:
+        with app.connection_for_read() as connection:
+            connection.ensure_connection(max_retries=1)
+            channel = connection.default_channel
+            for queue in app.conf.task_queues or ():
+                depths[queue.name] = channel.queue_declare(queue=queue.name, passive=True).message_count
+    except Exception as e:
+        logger.warning(f'Could not read Celery queue depths: {str(e)}')
+    return depths
+
+
+def metrics(request):
+    """Expose the metrics in the Prometheus text format."""
+    if settings.METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {settings.METRICS_TOKEN}':
+        return HttpResponseForbidden()
+
+    backlog = CollectorRegistry()
+    backlog.register(BacklogCollector())
+    return HttpResponse(
+        generate_latest(registry()) + generate_latest(backlog),
+        content_type=CONTENT_TYPE_LATEST
+    )
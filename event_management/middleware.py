@@ -0,0 +1,135 @@
+"""
+Per-request SQL query instrumentation.
+
+`QueryCountMiddleware` wraps every database connection while a request is
+handled and records how many queries it ran, how long they took and which
+query shapes (the SQL with its literals and parameters stripped) ran more
+than once, which is how an N+1 pattern shows up. Each request is logged as a
+JSON line on the 'event_management.queries' logger, at WARNING once it runs
+more than QUERY_COUNT_WARNING queries. In DEBUG, or for staff users, the
+figures are also returned as X-DB-* response headers; staff are recognized
+whether they authenticated by session or through DRF (e.g. by token).
+"""
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .profiling import request_user
+
+logger = logging.getLogger('event_management.queries')
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+
+# Duplicated shapes included in the log line, most repeated first
+DUPLICATES_LOGGED = 5
+
+
+def query_shape(sql):
+    """Return `sql` with literals, parameters and IN lists collapsed to `?`."""
+    shape = _LITERALS.sub('?', sql).replace('%s', '?')
+    shape = _PLACEHOLDER_LISTS.sub('(?)', shape)
+    return ' '.join(shape.split())
+
+
+class QueryStats:
+    """
+    Counters for the queries run on any connection while recording.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+            self.shapes[query_shape(sql)] += 1
+
+    @contextmanager
+    def record(self):
+        """Count the queries run in the block on this thread's connections."""
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            yield self
+
+    @property
+    def duration_ms(self):
+        return round(self.duration * 1000, 2)
+
+    @property
+    def duplicates(self):
+        """Return `{shape: count}` for the shapes that ran more than once."""
+        return {shape: count for shape, count in self.shapes.items() if count > 1}
+
+    @property
+    def duplicate_count(self):
+        """Return how many queries repeated a shape that had already run."""
+        return sum(count - 1 for count in self.duplicates.values())
+
+
+class QueryCountMiddleware:
+    """
+    Record the SQL each request runs; log it and expose it to staff.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Kept on the request for MetricsMiddleware
+        stats = request.query_stats = QueryStats()
+        with stats.record():
+            response = self.get_response(request)
+
+        if settings.DEBUG or self.is_staff(request):
+            response['X-DB-Query-Count'] = str(stats.count)
+            response['X-DB-Time-Ms'] = str(stats.duration_ms)
+            response['X-DB-Duplicate-Queries'] = str(stats.duplicate_count)
+
+        self.log(request, response, stats)
+        return response
+
+    def is_staff(self, request):
+        """
+        Check if the request came from a staff user.
+
+        DRF views replace `request.user` with the user they authenticated.
+        Other views leave the session user, so API credentials are checked
+        here; the response is already built, so this cannot affect CSRF.
+        """
+        if not hasattr(request, 'user'):
+            return False
+        return request_user(request).is_staff
+
+    def log(self, request, response, stats):
+        duplicates = sorted(stats.duplicates.items(), key=lambda item: -item[1])
+        match = getattr(request, 'resolver_match', None)
+        payload = {
+            'method': request.method,
+            'path': request.path,
+            'route': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_time_ms': stats.duration_ms,
+            'duplicate_queries': stats.duplicate_count,
+            'duplicates': [
+                {'sql': shape, 'count': count}
+                for shape, count in duplicates[:DUPLICATES_LOGGED]
+            ],
+        }
+        level = logging.WARNING if stats.count > settings.QUERY_COUNT_WARNING else logging.INFO
+        logger.log(level, json.dumps(payload))
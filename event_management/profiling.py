@@ -0,0 +1,210 @@
+"""
+On-demand request profiling for staff.
+
+A staff user adds `?profile=cprofile` (or `sample`) to a request, or sends
+the same value in an X-Profile header, and the request runs under a
+profiler:
+
+  cprofile - deterministic cProfile; stored as `<id>.pstats`
+  sample   - stacks sampled every PROFILE_SAMPLE_INTERVAL_MS; stored in the
+             collapsed-stacks format flame graph tools read, `<id>.collapsed`
+
+Either way the SQL the request ran is stored as a timeline in
+`<id>.sql.json`. Files go to PROFILE_DIR, which keeps the newest PROFILE_KEEP
+profiles, and the response carries the id in X-Profile-Id. Requests without
+the switch, or from other users, are handled as usual. With
+REQUEST_PROFILING off the middleware removes itself from the stack.
+
+API clients authenticated by DRF (e.g. by token) only have their user set
+inside the view, so for requests with the switch the middleware runs DRF's
+authentication classes itself.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MODES = ('cprofile', 'sample')
+
+
+class SQLTimeline:
+    """
+    Execution wrapper recording when each query started and how long it took.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'start_ms': round((started - self.started) * 1000, 3),
+                'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+                'sql': sql,
+                'many': many,
+            })
+
+
+class SamplingProfiler:
+    """
+    Sample a thread's stack from a background thread into collapsed stacks.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def __enter__(self):
+        self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._sampler.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def collapsed(self):
+        """Return the samples as `frame;frame;frame count` lines."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def requested_mode(request):
+    """Return the profiler mode a request asks for, or None."""
+    value = request.META.get('HTTP_X_PROFILE')
+    if value is None and 'profile=' in request.META.get('QUERY_STRING', ''):
+        value = request.GET.get('profile')
+    if not value:
+        return None
+    return value if value in MODES else 'cprofile'
+
+
+def request_user(request):
+    """
+    Return the user of a request, including users that only DRF's
+    authentication classes recognize and `request.user` shows as anonymous.
+
+    The authenticators are run directly rather than through `Request.user`,
+    which would set `request.user` and make SessionAuthentication enforce
+    CSRF on the view's own authentication.
+    """
+    if request.user.is_authenticated:
+        return request.user
+    from rest_framework.exceptions import APIException
+    from rest_framework.request import Request
+    from rest_framework.settings import api_settings
+
+    api_request = Request(request)
+    for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication().authenticate(api_request)
+        except APIException:
+            break
+        if result is not None:
+            return result[0]
+    return request.user
+
+
+def prune(directory, keep):
+    """Delete all but the newest `keep` profiles in `directory`."""
+    timelines = sorted(directory.glob('*.sql.json'), key=lambda path: path.stat().st_mtime, reverse=True)
+    for timeline in timelines[keep:]:
+        profile_id = timeline.name[:-len('.sql.json')]
+        for path in directory.glob(f'{profile_id}.*'):
+            path.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests from staff users that ask for it.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+        user = request_user(request)
+        if not user.is_staff:
+            return self.get_response(request)
+        return self.profile(request, mode, user)
+
+    def profile(self, request, mode, user):
+        timeline = SQLTimeline()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(timeline))
+            if mode == 'sample':
+                profiler = stack.enter_context(
+                    SamplingProfiler(settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+                )
+                response = self.get_response(request)
+            else:
+                profiler = cProfile.Profile()
+                response = profiler.runcall(self.get_response, request)
+        elapsed = time.perf_counter() - timeline.started
+
+        profile_id = f'{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}'
+        try:
+            self.store(profile_id, request, user, response, mode, profiler, timeline, elapsed)
+        except OSError as e:
+            logger.error(f'Failed to store request profile: {str(e)}')
+            return response
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    def store(self, profile_id, request, user, response, mode, profiler, timeline, elapsed):
+        directory = Path(settings.PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        if mode == 'sample':
+            (directory / f'{profile_id}.collapsed').write_text(profiler.collapsed())
+        else:
+            profiler.dump_stats(directory / f'{profile_id}.pstats')
+        (directory / f'{profile_id}.sql.json').write_text(json.dumps({
+            'id': profile_id,
+            'mode': mode,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'user': user.pk,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 3),
+            'queries': timeline.queries,
+        }, indent=2))
+        prune(directory, settings.PROFILE_KEEP)
+        logger.info(f'Stored {mode} profile {profile_id} of {request.method} {request.path}')
@@ -0,0 +1,143 @@
+"""
+Read-replica routing for read-only API traffic.
+
+Everything goes to the primary ('default') unless a view opted in with
+`ReplicaReadMixin`. For safe-method requests the mixin picks a healthy
+replica and `ReplicaRouter` sends that request's reads to it. A user who
+just wrote is pinned to the primary for REPLICA_STICKY_SECONDS, and a
+replica that cannot be reached is skipped for REPLICA_RETRY_SECONDS, with
+reads falling back to the primary.
+
+The pin is a signed cookie, so it holds whichever process serves the next
+request. It is also kept in the cache for clients that drop cookies, which
+only works across processes with a shared cache (REDIS_URL).
+"""
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework import permissions
+
+logger = logging.getLogger(__name__)
+
+_read_database = ContextVar('read_database', default=None)
+
+# Replica alias -> monotonic time until which it is considered down
+_unavailable = {}
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica chosen for the current request, if any.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+
+@contextmanager
+def reading_from(alias):
+    """Route reads in the block to `alias`; None keeps them on the primary."""
+    token = _read_database.set(alias)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+PIN_COOKIE = 'replica_pin'
+
+
+def _pin_key(user):
+    return f'replica-pin:{user.pk}'
+
+
+def pin_to_primary(request, response):
+    """Keep the user's reads on the primary while their write replicates."""
+    user = request.user
+    if user.is_authenticated and settings.REPLICA_STICKY_SECONDS:
+        cache.set(_pin_key(user), True, timeout=settings.REPLICA_STICKY_SECONDS)
+        response.set_signed_cookie(
+            PIN_COOKIE,
+            str(user.pk),
+            salt=PIN_COOKIE,
+            max_age=settings.REPLICA_STICKY_SECONDS,
+            httponly=True,
+            samesite='Lax'
+        )
+
+
+def is_pinned(request):
+    """Check if the user wrote recently enough to read from the primary."""
+    user = request.user
+    if not user.is_authenticated:
+        return False
+    pinned = request.get_signed_cookie(
+        PIN_COOKIE,
+        default=None,
+        salt=PIN_COOKIE,
+        max_age=settings.REPLICA_STICKY_SECONDS
+    )
+    return pinned == str(user.pk) or bool(cache.get(_pin_key(user)))
+
+
+def _is_available(alias):
+    """Check a replica's connection, marking it down for a while on failure."""
+    if _unavailable.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+        return True
+    except DatabaseError as e:
+        logger.warning(f'Replica {alias} unavailable, reading from primary: {str(e)}')
+        _unavailable[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+        return False
+
+
+def choose_replica():
+    """Return a healthy replica alias, or None to use the primary."""
+    candidates = list(settings.REPLICA_DATABASES)
+    random.shuffle(candidates)
+    for alias in candidates:
+        if _is_available(alias):
+            return alias
+    return None
+
+
+class ReplicaReadMixin:
+    """
+    Viewset mixin reading from a replica during safe-method requests.
+
+    Unsafe requests, and any request from a user who wrote within the
+    sticky window, stay on the primary. Successful writes start the window.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self._read_database_token = None
+        super().initial(request, *args, **kwargs)
+        if request.method in permissions.SAFE_METHODS and not is_pinned(request):
+            alias = choose_replica()
+            if alias:
+                self._read_database_token = _read_database.set(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_read_database_token', None)
+        if token is not None:
+            _read_database.reset(token)
+            self._read_database_token = None
+        if request.method not in permissions.SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request, response)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -54,12 +54,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'event_management.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'event_management.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'event_management.profiling.ProfilingMiddleware',
+    'event_management.db.slow_queries.SlowQueryOriginMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -104,6 +108,113 @@ if 'RENDER_EXTERNAL_HOSTNAME' in os.environ and 'DATABASE_URL' not in os.environ
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 
+# Read replicas: safe-method API requests read from one of these, see
+# event_management/routers.py. With SQLite, point DATABASE_URL and
+# DATABASE_REPLICA_URLS at two files to try it locally.
+DATABASE_REPLICA_URLS = config(
+    'DATABASE_REPLICA_URLS',
+    default='',
+    cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+)
+REPLICA_DATABASES = []
+if DATABASE_REPLICA_URLS:
+    import dj_database_url
+    for index, url in enumerate(DATABASE_REPLICA_URLS):
+        alias = f'replica_{index}'
+        DATABASES[alias] = dj_database_url.parse(url)
+        # Tests read replicas through the primary connection.
+        DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+        REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['event_management.routers.ReplicaRouter']
+
+# Reads go to the primary for this long after a user's last write, so users
+# see their own changes despite replication lag.
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+# A replica that failed to connect is skipped for this long.
+REPLICA_RETRY_SECONDS = config('REPLICA_RETRY_SECONDS', default=30, cast=int)
+
+# Persistent connections: web requests and Celery tasks keep a connection for
+# up to DB_CONN_MAX_AGE seconds ('none' for unlimited, 0 to close it after
+# each request) and check that it still works before reusing it.
+DB_CONN_MAX_AGE = config(
+    'DB_CONN_MAX_AGE',
+    default='60',
+    cast=lambda v: None if v.lower() == 'none' else int(v)
+)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+# ASGI requests do not reuse persistent connections. A positive DB_POOL_SIZE
+# keeps up to that many idle PostgreSQL connections per process instead;
+# combine it with DB_CONN_MAX_AGE=0.
+DB_POOL_SIZE = config('DB_POOL_SIZE', default=0, cast=int)
+
+# SQLite performance profile (WAL, busy timeout, cache and memory map sizes,
+# BEGIN IMMEDIATE for write transactions opened with
+# event_management.db.transactions.immediate()), see
+# event_management/db/sqlite3/base.py.
+SQLITE_TUNED = config('SQLITE_TUNED', default=True, cast=bool)
+SQLITE_BUSY_TIMEOUT_MS = config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int)
+SQLITE_CACHE_SIZE_KB = config('SQLITE_CACHE_SIZE_KB', default=65536, cast=int)
+SQLITE_MMAP_SIZE = config('SQLITE_MMAP_SIZE', default=268435456, cast=int)
+
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+    database['CONN_HEALTH_CHECKS'] = DB_CONN_HEALTH_CHECKS
+    if DB_POOL_SIZE and database['ENGINE'] in (
+        'django.db.backends.postgresql',
+        'django.db.backends.postgresql_psycopg2',
+    ):
+        database['ENGINE'] = 'event_management.db.postgresql'
+    if SQLITE_TUNED and database['ENGINE'] == 'django.db.backends.sqlite3':
+        database['ENGINE'] = 'event_management.db.sqlite3'
+
+# Admin changelists of large tables take their unfiltered totals from the
+# database statistics once these exceed this many rows.
+ESTIMATED_COUNT_THRESHOLD = config('ESTIMATED_COUNT_THRESHOLD', default=10000, cast=int)
+
+# Requests running more SQL queries than this are logged at WARNING by
+# event_management.middleware.QueryCountMiddleware.
+QUERY_COUNT_WARNING = config('QUERY_COUNT_WARNING', default=50, cast=int)
+
+# Staff can profile a request with ?profile=cprofile|sample or an X-Profile
+# header, see event_management/profiling.py.
+REQUEST_PROFILING = config('REQUEST_PROFILING', default=True, cast=bool)
+PROFILE_DIR = config('PROFILE_DIR', default=str(BASE_DIR / 'logs' / 'profiles'))
+PROFILE_KEEP = config('PROFILE_KEEP', default=100, cast=int)
+PROFILE_SAMPLE_INTERVAL_MS = config('PROFILE_SAMPLE_INTERVAL_MS', default=5, cast=float)
+
+# Statements taking SLOW_QUERY_THRESHOLD_MS or longer are logged with their
+# origin to SLOW_QUERY_LOG_FILE (rotated at SLOW_QUERY_LOG_MAX_BYTES), and a
+# SLOW_QUERY_EXPLAIN_RATE fraction of them with their query plan. See
+# event_management/db/slow_queries.py and `manage.py slow_queries`. Off
+# unless enabled per environment (env.example turns it on), so test runs do
+# not write the log.
+SLOW_QUERY_LOG = config('SLOW_QUERY_LOG', default=False, cast=bool)
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=100, cast=float)
+SLOW_QUERY_EXPLAIN_RATE = config('SLOW_QUERY_EXPLAIN_RATE', default=0.1, cast=float)
+SLOW_QUERY_LOG_FILE = config('SLOW_QUERY_LOG_FILE', default=str(BASE_DIR / 'logs' / 'slow_queries.jsonl'))
+SLOW_QUERY_LOG_MAX_BYTES = config('SLOW_QUERY_LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+SLOW_QUERY_LOG_BACKUPS = config('SLOW_QUERY_LOG_BACKUPS', default=5, cast=int)
+
+# Bearer token required to scrape /metrics; empty leaves it open, like
+# /health/. See event_management/metrics.py.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# Port on which each Celery worker serves its own task metrics (0: off)
+CELERY_METRICS_PORT = config('CELERY_METRICS_PORT', default=0, cast=int)
+
+# Cache (shared across processes when REDIS_URL is set)
+CACHES = {
+    'default': {
+        'BACKEND': 'event_management.cache.LocMemCache',
+    }
+}
+
+if 'REDIS_URL' in os.environ:
+    CACHES['default'] = {
+        'BACKEND': 'event_management.cache.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -188,9 +299,77 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_ALWAYS_EAGER = True  # For testing - tasks run synchronously
 CELERY_TASK_EAGER_PROPAGATES = True
 
-# Email backend (for development)
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
-DEFAULT_FROM_EMAIL = 'noreply@eventmanagement.com'
+# Event reminders: minutes before an event's start at which participants are
+# reminded. Reminders due within the horizon are queued as ETA tasks by the
+# periodic sweep; reminders further out wait in the database.
+EVENT_REMINDER_OFFSETS = config('EVENT_REMINDER_OFFSETS', default='1440,60', cast=lambda v: [int(s) for s in v.split(',') if s.strip()])
+EVENT_REMINDER_HORIZON_MINUTES = config('EVENT_REMINDER_HORIZON_MINUTES', default=60, cast=int)
+EVENT_REMINDER_GRACE_MINUTES = config('EVENT_REMINDER_GRACE_MINUTES', default=5, cast=int)
+
+# Event update notifications arriving within this many seconds of the first
+# one are merged into a single notification and email (0 disables). With
+# eager Celery the window is closed by the outbox relay (manage.py
+# relay_outbox --loop), as countdowns are ignored.
+NOTIFICATION_COALESCE_WINDOW_SECONDS = config('NOTIFICATION_COALESCE_WINDOW_SECONDS', default=900, cast=int)
+
+# Deleted events are hidden at once and purged in the background, this many
+# participants per DELETE.
+EVENT_PURGE_BATCH_SIZE = config('EVENT_PURGE_BATCH_SIZE', default=1000, cast=int)
+
+# Events this many days past move to the archive tables, together with their
+# registrations; inactive registrations of live events move there as well.
+EVENT_ARCHIVE_AFTER_DAYS = config('EVENT_ARCHIVE_AFTER_DAYS', default=90, cast=int)
+EVENT_ARCHIVE_BATCH_SIZE = config('EVENT_ARCHIVE_BATCH_SIZE', default=100, cast=int)
+
+# Cancellations of deleted events are fanned out from a recipient snapshot,
+# this many recipients at a time.
+CANCELLATION_CHUNK_SIZE = config('CANCELLATION_CHUNK_SIZE', default=500, cast=int)
+
+# Transactional outbox: request handlers record task dispatches in their own
+# transaction and a relay hands them to Celery. With OUTBOX_RELAY_ON_COMMIT
+# the request relays its own messages right after commit; disable it when a
+# `relay_outbox` process runs so requests never wait on the broker.
+OUTBOX_RELAY_ON_COMMIT = config('OUTBOX_RELAY_ON_COMMIT', default=True, cast=bool)
+# Without a broker (eager Celery) the relay would run the tasks inside the
+# request, so it is handed to the in-process background executor instead.
+OUTBOX_RELAY_IN_BACKGROUND = config('OUTBOX_RELAY_IN_BACKGROUND', default=CELERY_TASK_ALWAYS_EAGER, cast=bool)
+OUTBOX_BATCH_SIZE = config('OUTBOX_BATCH_SIZE', default=100, cast=int)
+OUTBOX_RETRY_DELAY_SECONDS = config('OUTBOX_RETRY_DELAY_SECONDS', default=10, cast=int)
+OUTBOX_MAX_RETRY_DELAY_SECONDS = config('OUTBOX_MAX_RETRY_DELAY_SECONDS', default=3600, cast=int)
+
+# Where notification tasks run: 'celery' hands them to the broker, while
+# 'background' runs them on an in-process thread pool after commit, for
+# deployments without a broker. Messages handed to the pool stay leased in
+# the outbox until their task has run.
+NOTIFICATIONS_TASK_BACKEND = config('NOTIFICATIONS_TASK_BACKEND', default='celery')
+OUTBOX_LEASE_SECONDS = config('OUTBOX_LEASE_SECONDS', default=300, cast=int)
+BACKGROUND_TASK_WORKERS = config('BACKGROUND_TASK_WORKERS', default=4, cast=int)
+BACKGROUND_TASK_QUEUE_SIZE = config('BACKGROUND_TASK_QUEUE_SIZE', default=1000, cast=int)
+BACKGROUND_TASK_SUBMIT_TIMEOUT = config('BACKGROUND_TASK_SUBMIT_TIMEOUT', default=0.5, cast=float)
+BACKGROUND_TASK_DRAIN_TIMEOUT = config('BACKGROUND_TASK_DRAIN_TIMEOUT', default=30, cast=float)
+
+# Email backend (console for development)
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@eventmanagement.com')
+
+# Email delivery: messages per second across all workers (0 disables the
+# limit; the token bucket is shared through the cache, so use Redis for more
+# than one process) and how many of them may go out back to back, attempts
+# per message before it is dead-lettered, and the base/maximum backoff
+# between attempts. With eager Celery, retries wait in the outbox and are
+# only sent by a relay: run `manage.py relay_outbox --loop` next to the web
+# process.
+EMAIL_RATE_LIMIT_PER_SECOND = config('EMAIL_RATE_LIMIT_PER_SECOND', default=0, cast=int)
+EMAIL_RATE_LIMIT_BURST = config('EMAIL_RATE_LIMIT_BURST', default=1, cast=int)
+EMAIL_MAX_ATTEMPTS = config('EMAIL_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_RETRY_DELAY_SECONDS = config('EMAIL_RETRY_DELAY_SECONDS', default=30, cast=int)
+EMAIL_MAX_RETRY_DELAY_SECONDS = config('EMAIL_MAX_RETRY_DELAY_SECONDS', default=3600, cast=int)
 
 # Logging
 LOGGING = {
@@ -205,6 +384,10 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'message': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'console': {
@@ -216,6 +399,14 @@ LOGGING = {
             'filename': BASE_DIR / 'logs' / 'django.log',
             'formatter': 'verbose',
         },
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': SLOW_QUERY_LOG_MAX_BYTES,
+            'backupCount': SLOW_QUERY_LOG_BACKUPS,
+            'formatter': 'message',
+            'delay': True,
+        },
     },
     'root': {
         'handlers': ['console', 'file'],
@@ -232,6 +423,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'event_management.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 
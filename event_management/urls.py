@@ -11,12 +11,20 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from event_management.metrics import metrics
+
 def health_check(request):
     """Simple health check endpoint for deployment platforms."""
-    return JsonResponse({
+    data = {
         'status': 'healthy',
         'message': 'Django Event Management System is running'
-    })
+    }
+    from event_management.db import stats
+    data['database_connections'] = stats.snapshot()
+    if settings.NOTIFICATIONS_TASK_BACKEND == 'background':
+        from notifications.executor import get_executor
+        data['background_tasks'] = get_executor().stats()
+    return JsonResponse(data)
 
 def root_redirect(request):
     """Redirect root URL to API documentation."""
@@ -43,6 +51,7 @@ urlpatterns = [
     path('api/v1/', include('users.urls')),
     path('api/v1/', include('notifications.urls')),
     path('health/', health_check, name='health_check'),
+    path('metrics', metrics, name='metrics'),
     
     # API Documentation
     path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
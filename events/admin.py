@@ -3,11 +3,20 @@ Admin interface for Event models.
 """
 
 from django.contrib import admin
-from .models import Event, EventParticipant
+
+from event_management.admin import PrefixAutocompleteMixin
+from event_management.pagination import EstimatedCountPaginator
+from .models import (
+    ArchivedEvent,
+    ArchivedEventParticipant,
+    Event,
+    EventParticipant,
+    with_participant_count
+)
 
 
 @admin.register(Event)
-class EventAdmin(admin.ModelAdmin):
+class EventAdmin(PrefixAutocompleteMixin, admin.ModelAdmin):
     """
     Admin interface for Event model.
     """
@@ -16,7 +25,10 @@ class EventAdmin(admin.ModelAdmin):
         'participant_count', 'is_active', 'created_at'
     ]
     list_filter = ['date', 'is_active', 'created_at']
+    list_select_related = ['created_by']
     search_fields = ['title', 'description', 'location', 'created_by__email']
+    autocomplete_search_fields = ['title']
+    autocomplete_fields = ['created_by']
     ordering = ['-date', '-time']
     readonly_fields = ['created_at', 'updated_at', 'participant_count']
     
@@ -36,10 +48,19 @@ class EventAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        """Count active participants in the changelist query itself."""
+        queryset = super().get_queryset(request)
+        if self.is_autocomplete(request):
+            # Autocomplete results show the title only.
+            return queryset
+        return with_participant_count(queryset)
+    
     def participant_count(self, obj):
         """Display participant count."""
-        return obj.participant_count
+        return obj.active_participant_count
     participant_count.short_description = 'Participants'
+    participant_count.admin_order_field = 'active_participant_count'
 
 
 @admin.register(EventParticipant)
@@ -48,13 +69,17 @@ class EventParticipantAdmin(admin.ModelAdmin):
     Admin interface for EventParticipant model.
     """
     list_display = [
-        'user', 'event', 'registered_at', 'is_active'
+        'user', 'event', 'event_date', 'registered_at', 'is_active'
     ]
     list_filter = ['is_active', 'registered_at', 'event__date']
+    list_select_related = ['user', 'event']
     search_fields = [
         'user__email', 'user__first_name', 'user__last_name',
         'event__title'
     ]
+    autocomplete_fields = ['user', 'event']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     ordering = ['-registered_at']
     readonly_fields = ['registered_at']
     
@@ -69,4 +94,45 @@ class EventParticipantAdmin(admin.ModelAdmin):
             'fields': ('registered_at',),
             'classes': ('collapse',)
         }),
-    ) 
\ No newline at end of file
+    )
+    
+    def event_date(self, obj):
+        """Display the event date."""
+        return obj.event.date
+    event_date.short_description = 'Event date'
+    event_date.admin_order_field = 'event__date'
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """
+    Admin for archive tables, which are only written by the archiver.
+    """
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedEvent)
+class ArchivedEventAdmin(ReadOnlyAdmin):
+    """
+    Admin interface for ArchivedEvent model.
+    """
+    list_display = ['title', 'date', 'time', 'location', 'created_by', 'archived_at']
+    list_filter = ['date', 'archived_at']
+    list_select_related = ['created_by']
+    search_fields = ['title', 'location', 'created_by__email']
+    ordering = ['-date', '-time']
+
+
+@admin.register(ArchivedEventParticipant)
+class ArchivedEventParticipantAdmin(ReadOnlyAdmin):
+    """
+    Admin interface for ArchivedEventParticipant model.
+    """
+    list_display = ['user', 'event_id', 'registered_at', 'is_active', 'archived_at']
+    list_filter = ['is_active', 'archived_at']
+    list_select_related = ['user']
+    search_fields = ['user__email', 'event_id']
+    ordering = ['-registered_at']
@@ -0,0 +1,112 @@
+"""
+Archival of past events and inactive registrations.
+
+`events` and `event_participants` only need the rows the API serves day to
+day. Events older than EVENT_ARCHIVE_AFTER_DAYS move, with all their
+registrations, to `archived_events` and `archived_event_participants`;
+inactive registrations of live events move to the latter on their own. Each
+batch is copied and deleted in one transaction, so rows are never lost or
+visible in both places.
+"""
+
+from django.conf import settings
+from django.utils import timezone
+
+from event_management.db.transactions import immediate
+
+from .models import ArchivedEvent, ArchivedEventParticipant, Event, EventParticipant
+
+
+def _archived_participant(participant):
+    return ArchivedEventParticipant(
+        id=participant.id,
+        event_id=participant.event_id,
+        user_id=participant.user_id,
+        registered_at=participant.registered_at,
+        is_active=participant.is_active
+    )
+
+
+def archive_past_events(older_than_days=None, batch_size=None):
+    """
+    Move events that took place more than `older_than_days` ago, with their
+    registrations, to the archive tables. Returns the number of events moved.
+    """
+    if older_than_days is None:
+        older_than_days = settings.EVENT_ARCHIVE_AFTER_DAYS
+    batch_size = batch_size or settings.EVENT_ARCHIVE_BATCH_SIZE
+    cutoff = timezone.now().date() - timezone.timedelta(days=older_than_days)
+    archived = 0
+
+    while True:
+        with immediate():
+            events = list(
+                Event.objects.filter(date__lt=cutoff)
+                .select_for_update(skip_locked=True)
+                .order_by('id')[:batch_size]
+            )
+            if not events:
+                break
+            event_ids = [event.id for event in events]
+            participants = EventParticipant.all_objects.filter(event_id__in=event_ids)
+
+            ArchivedEvent.objects.bulk_create([
+                ArchivedEvent(
+                    id=event.id,
+                    title=event.title,
+                    description=event.description,
+                    date=event.date,
+                    time=event.time,
+                    location=event.location,
+                    max_participants=event.max_participants,
+                    created_by_id=event.created_by_id,
+                    created_at=event.created_at,
+                    updated_at=event.updated_at,
+                    is_active=event.is_active
+                )
+                for event in events
+            ], ignore_conflicts=True)
+            ArchivedEventParticipant.objects.bulk_create(
+                [_archived_participant(participant) for participant in participants],
+                ignore_conflicts=True
+            )
+            participants.delete()
+            Event.all_objects.filter(id__in=event_ids).delete()
+
+        archived += len(events)
+        if len(events) < batch_size:
+            break
+
+    return archived
+
+
+def archive_inactive_registrations(batch_size=None):
+    """
+    Move cancelled registrations of live events to the archive table.
+    Returns the number of registrations moved.
+    """
+    batch_size = batch_size or settings.EVENT_ARCHIVE_BATCH_SIZE
+    archived = 0
+
+    while True:
+        with immediate():
+            participants = list(
+                EventParticipant.objects.filter(is_active=False)
+                .select_for_update(skip_locked=True, of=('self',))
+                .order_by('id')[:batch_size]
+            )
+            if not participants:
+                break
+            ArchivedEventParticipant.objects.bulk_create(
+                [_archived_participant(participant) for participant in participants],
+                ignore_conflicts=True
+            )
+            EventParticipant.all_objects.filter(
+                id__in=[participant.id for participant in participants]
+            ).delete()
+
+        archived += len(participants)
+        if len(participants) < batch_size:
+            break
+
+    return archived
@@ -0,0 +1,148 @@
+import json
+import shlex
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, migrations
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MIGRATIONS_MODULE_NAME, MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from event_management.db.index_advisor import Workload, advise
+from event_management.db.slow_queries import read_entries
+
+
+class Command(BaseCommand):
+    help = (
+        'Recommend composite and partial indexes, and flag useless ones, from '
+        'the plans of a captured workload or of the test suite\'s queries'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG_FILE, help='Slow query log to replay; run with SLOW_QUERY_THRESHOLD_MS=0 to capture a full workload')
+        parser.add_argument('--from-tests', action='store_true', help='Capture the queries of a pytest run instead of replaying the log')
+        parser.add_argument('--pytest-args', default='', help='Extra arguments for the pytest run, e.g. "tests/test_events.py"')
+        parser.add_argument('--database', default='default', help='Database to plan the replayed log on')
+        parser.add_argument('--min-count', type=int, default=1, help='Ignore query shapes seen fewer times')
+        parser.add_argument('--write-migration', action='store_true', help='Write a migration per app adding the recommended indexes')
+        parser.add_argument('--drop-flagged', action='store_true', help='Also remove flagged indexes declared in model Meta in that migration')
+        parser.add_argument('--output-dir', help='Write migrations here instead of the apps\' migrations packages')
+        parser.add_argument('--json', action='store_true', help='Print the advice as JSON')
+
+    def handle(self, *args, **options):
+        workload = Workload()
+        if options['from_tests']:
+            self.capture_tests(workload, options['pytest_args'])
+        else:
+            if not Path(options['log']).exists():
+                raise CommandError(f"No slow query log at {options['log']}; use --from-tests or --log")
+            workload.replay(connections[options['database']], read_entries(options['log']))
+        if not workload.queries:
+            raise CommandError('The workload has no queries')
+
+        recommendations, flags = advise(workload, min_count=options['min_count'])
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'recommendations': [
+                    {key: value for key, value in recommendation.items() if key not in ('model', 'index')}
+                    | {'index': repr_index(recommendation['index'])}
+                    for recommendation in recommendations
+                ],
+                'flags': [
+                    {key: value for key, value in flag.items() if key not in ('model', 'index')}
+                    for flag in flags
+                ],
+            }, indent=2, default=str))
+        else:
+            self.report(workload, recommendations, flags)
+
+        if options['write_migration']:
+            self.write_migrations(recommendations, flags if options['drop_flagged'] else [], options['output_dir'])
+
+    def capture_tests(self, workload, pytest_args):
+        import pytest
+
+        self.stdout.write('Capturing the queries of the test suite...')
+        with workload.capture():
+            pytest.main(['-q', '-p', 'no:cacheprovider', *shlex.split(pytest_args)])
+
+    def report(self, workload, recommendations, flags):
+        self.stdout.write(f'{len(workload.queries)} query shapes on {len(workload.indexes)} tables')
+        self.stdout.write('')
+        if not recommendations:
+            self.stdout.write('No index recommendations')
+        for recommendation in recommendations:
+            self.stdout.write(
+                f"{recommendation['model']._meta.label}: {repr_index(recommendation['index'])}"
+            )
+            self.stdout.write(
+                f"  serves {len(recommendation['fingerprints'])} query shapes run {recommendation['count']} times: "
+                f"{', '.join(recommendation['fingerprints'][:5])}"
+            )
+        self.stdout.write('')
+        for flag in flags:
+            declared = ' (model Meta)' if 'index' in flag else ''
+            self.stdout.write(
+                f"Flagged {flag['table']}.{flag['name']}{declared} on ({', '.join(flag['columns'])}): {flag['reason']}"
+            )
+
+    def write_migrations(self, recommendations, flags, output_dir):
+        operations = {}
+        for recommendation in recommendations:
+            model = recommendation['model']
+            operations.setdefault(model._meta.app_label, []).append(
+                migrations.AddIndex(model_name=model._meta.model_name, index=recommendation['index'])
+            )
+        for flag in flags:
+            if 'index' in flag:
+                model = flag['model']
+                operations.setdefault(model._meta.app_label, []).append(
+                    migrations.RemoveIndex(model_name=model._meta.model_name, name=flag['name'])
+                )
+
+        loader = OnDiskMigrationLoader(None, ignore_no_migrations=True)
+        for app_label, app_operations in operations.items():
+            leaves = loader.graph.leaf_nodes(app_label)
+            if len(leaves) != 1:
+                raise CommandError(
+                    f'Cannot write a migration for {app_label}: expected one latest migration, '
+                    f'found {len(leaves)}'
+                )
+            leaf = leaves[0]
+            number = MigrationAutodetector.parse_number(leaf[1]) + 1
+            migration = type('Migration', (migrations.Migration,), {
+                'dependencies': [leaf],
+                'operations': app_operations,
+            })(f'{number:04d}_advised_indexes', app_label)
+            writer = MigrationWriter(migration)
+            if output_dir:
+                path = Path(output_dir) / writer.filename
+            else:
+                try:
+                    path = Path(writer.path)
+                except ValueError as e:
+                    raise CommandError(f'{str(e)} Use --output-dir.')
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(writer.as_string())
+            self.stdout.write(f'Wrote {path}; add the same indexes to the Meta of {app_label} models')
+
+
+class OnDiskMigrationLoader(MigrationLoader):
+    """
+    Migration loader that reads an app's migrations package even when
+    MIGRATION_MODULES disables it, as pytest's --nomigrations does.
+    """
+
+    @classmethod
+    def migrations_module(cls, app_label):
+        module_name, explicit = super().migrations_module(app_label)
+        if module_name is None:
+            return f'{apps.get_app_config(app_label).name}.{MIGRATIONS_MODULE_NAME}', False
+        return module_name, explicit
+
+
+def repr_index(index):
+    """Return an Index as it would be written in a model's Meta."""
+    return MigrationWriter.serialize(index)[0]
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from events.archive import archive_inactive_registrations, archive_past_events
+
+
+class Command(BaseCommand):
+    help = 'Move long-past events and inactive registrations to the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.EVENT_ARCHIVE_AFTER_DAYS, help='Archive events older than this many days')
+        parser.add_argument('--batch-size', type=int, default=settings.EVENT_ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--skip-registrations', action='store_true', help='Leave inactive registrations of live events in place')
+
+    def handle(self, *args, **options):
+        events = archive_past_events(older_than_days=options['days'], batch_size=options['batch_size'])
+        self.stdout.write(f"Archived {events} events")
+        if not options['skip_registrations']:
+            registrations = archive_inactive_registrations(batch_size=options['batch_size'])
+            self.stdout.write(f"Archived {registrations} inactive registrations")
@@ -0,0 +1,219 @@
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from itertools import accumulate, islice
+import random
+import time as clock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import Event, EventParticipant
+from notifications.models import Notification
+
+User = get_user_model()
+
+LOCATIONS = ['Main Hall', 'Conference Room A', 'Conference Room B', 'Auditorium', 'Rooftop', 'Online']
+TOPICS = ['Python', 'Django', 'Databases', 'Design', 'Security', 'Cloud', 'Testing', 'Data']
+KINDS = ['Meetup', 'Workshop', 'Conference', 'Hackathon', 'Talk']
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the auto_now(_add) values set on the objects."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def skewed_weights(count, exponent):
+    """Return Zipf-like cumulative weights for `count` ranks."""
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+
+def allocate(total, weights, caps):
+    """Split `total` in proportion to `weights`, giving no rank more than its cap."""
+    counts = [0] * len(weights)
+    open_ranks = set(range(len(weights)))
+    while open_ranks:
+        remaining = total - sum(counts)
+        scale = remaining / sum(weights[rank] for rank in open_ranks)
+        placed = 0
+        for rank in list(open_ranks):
+            share = min(int(weights[rank] * scale), caps[rank] - counts[rank])
+            counts[rank] += share
+            placed += share
+            if counts[rank] >= caps[rank]:
+                open_ranks.discard(rank)
+        if placed <= 0:
+            break
+    # Hand out what rounding down left over, most popular first.
+    for rank in sorted(open_ranks, key=lambda rank: -weights[rank])[:total - sum(counts)]:
+        counts[rank] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = 'Generate large volumes of users, events, registrations and notifications for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--events', type=int, default=1000)
+        parser.add_argument('--participants', type=int, default=100000, help='Approximate number of registrations')
+        parser.add_argument('--notifications', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; the same seed generates the same data')
+        parser.add_argument('--password', default='seedpass123', help='Password of every generated user')
+        parser.add_argument('--prefix', default='seed', help='Username and email prefix of generated users')
+        parser.add_argument('--skew', type=float, default=1.0, help='Popularity skew of events and users (Zipf exponent)')
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(f"Users prefixed '{options['prefix']}_' already exist; pass another --prefix")
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        with explicit_timestamps(User, Event, EventParticipant, Notification):
+            user_ids = self.step('users', self.create_users, options)
+            events = self.step('events', self.create_events, options, user_ids)
+            self.step('registrations', self.create_participants, options, user_ids, events)
+            self.step('notifications', self.create_notifications, options, user_ids, events)
+
+    def step(self, name, method, *args):
+        started = clock.monotonic()
+        result = method(*args)
+        count = len(result) if isinstance(result, list) else result
+        self.stdout.write(f"Created {count} {name} in {clock.monotonic() - started:.1f}s")
+        return result
+
+    def insert(self, model, objects):
+        """Bulk insert an iterable of objects in batches; return the count."""
+        objects = iter(objects)
+        count = 0
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                return count
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            count += len(batch)
+
+    def past(self, max_days):
+        return self.now - timedelta(days=self.rng.uniform(0, max_days))
+
+    def create_users(self, options):
+        # Hashing once keeps this fast; every user can log in with --password.
+        password = make_password(options['password'])
+        prefix = options['prefix']
+        first_names = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie']
+        last_names = ['Smith', 'Garcia', 'Chen', 'Okafor', 'Novak', 'Silva', 'Kumar', 'Larsen']
+
+        def users():
+            for index in range(options['users']):
+                joined = self.past(3 * 365)
+                yield User(
+                    username=f'{prefix}_{index}',
+                    email=f'{prefix}_{index}@example.com',
+                    password=password,
+                    first_name=self.rng.choice(first_names),
+                    last_name=self.rng.choice(last_names),
+                    date_joined=joined,
+                    date_created=joined,
+                    date_updated=joined
+                )
+
+        self.insert(User, users())
+        return list(
+            User.objects.filter(username__startswith=f'{prefix}_').order_by('id').values_list('id', flat=True)
+        )
+
+    def create_events(self, options, user_ids):
+        # A few percent of the users organise events, some far more than others.
+        organisers = user_ids[:max(1, len(user_ids) // 20)]
+        organiser_weights = skewed_weights(len(organisers), options['skew'])
+        today = self.now.date()
+        first_id = (Event.all_objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+
+        def events():
+            for index in range(options['events']):
+                # About two thirds in the past, the rest up to six months ahead.
+                date = today + timedelta(days=self.rng.randint(-365, 180))
+                starts = timezone.make_aware(datetime.combine(date, time()))
+                created = min(self.now, starts - timedelta(days=self.rng.randint(1, 90)))
+                yield Event(
+                    title=f'{self.rng.choice(TOPICS)} {self.rng.choice(KINDS)} #{index}',
+                    description='Generated by seed_data.',
+                    date=date,
+                    time=time(self.rng.randint(8, 21), self.rng.choice([0, 30])),
+                    location=self.rng.choice(LOCATIONS),
+                    max_participants=None if self.rng.random() < 0.3 else self.rng.choice([20, 50, 100, 250, 1000]),
+                    created_by_id=self.rng.choices(organisers, cum_weights=organiser_weights)[0],
+                    created_at=created,
+                    updated_at=created,
+                    is_active=self.rng.random() < 0.9
+                )
+
+        self.insert(Event, events())
+        return list(
+            Event.all_objects.filter(id__gte=first_id).order_by('id').values_list('id', 'title', 'date', 'max_participants', 'created_at')
+        )
+
+    def create_participants(self, options, user_ids, events):
+        # Popularity does not follow creation order.
+        ranked = list(events)
+        self.rng.shuffle(ranked)
+        weights = [1 / (rank + 1) ** options['skew'] for rank in range(len(ranked))]
+        caps = [min(len(user_ids), event[3] or len(user_ids)) for event in ranked]
+        counts = allocate(options['participants'], weights, caps)
+
+        def participants():
+            for (event_id, title, date, capacity, created), count in zip(ranked, counts):
+                # Registrations come in between creation and the start.
+                closed = min(self.now, max(created, timezone.make_aware(datetime.combine(date, time()))))
+                for user_id in self.rng.sample(user_ids, count):
+                    registered = created + (closed - created) * self.rng.random()
+                    yield EventParticipant(
+                        event_id=event_id,
+                        user_id=user_id,
+                        registered_at=registered,
+                        # Some registrations were cancelled
+                        is_active=self.rng.random() < 0.85
+                    )
+
+        return self.insert(EventParticipant, participants())
+
+    def create_notifications(self, options, user_ids, events):
+        # Active users collect most notifications.
+        user_weights = skewed_weights(len(user_ids), options['skew'])
+        types = [choice for choice, label in Notification.NOTIFICATION_TYPES]
+
+        def notifications():
+            for _ in range(options['notifications']):
+                event_id, title = self.rng.choice(events)[:2]
+                created = self.past(365)
+                is_read = self.rng.random() < 0.7
+                yield Notification(
+                    user_id=self.rng.choices(user_ids, cum_weights=user_weights)[0],
+                    notification_type=self.rng.choice(types),
+                    title=f'Update: {title}',
+                    message='Generated by seed_data.',
+                    is_read=is_read,
+                    created_at=created,
+                    read_at=created + timedelta(hours=self.rng.uniform(0, 72)) if is_read else None,
+                    event_id=event_id,
+                    event_title=title
+                )
+
+        return self.insert(Notification, notifications())
@@ -0,0 +1,50 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from event_management.db.slow_queries import aggregate, read_entries
+
+
+class Command(BaseCommand):
+    help = 'Summarise the slow query log by query fingerprint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=settings.SLOW_QUERY_LOG_FILE, help='Slow query log to read; rotated backups are read too')
+        parser.add_argument('--hours', type=float, help='Only include queries logged in the last this many hours')
+        parser.add_argument('--limit', type=int, default=20, help='Number of fingerprints to show')
+        parser.add_argument('--sort', choices=('total', 'count', 'mean', 'max'), default='total', help='Order fingerprints by')
+        parser.add_argument('--plans', action='store_true', help='Print the latest captured query plan of each fingerprint')
+        parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+
+    def handle(self, *args, **options):
+        since = time.time() - options['hours'] * 3600 if options['hours'] else None
+        summaries = aggregate(read_entries(options['file'], since=since))
+        key = {'total': 'total_ms', 'count': 'count', 'mean': 'mean_ms', 'max': 'max_ms'}[options['sort']]
+        summaries = sorted(summaries, key=lambda summary: -summary[key])[:options['limit']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(summaries, indent=2))
+            return
+        if not summaries:
+            self.stdout.write('No slow queries logged')
+            return
+
+        for summary in summaries:
+            origin, origin_count = summary['origins'].most_common(1)[0]
+            self.stdout.write(
+                f"{summary['fingerprint']}  {summary['count']}x  total {summary['total_ms']:.1f}ms  "
+                f"mean {summary['mean_ms']:.1f}ms  p95 {summary['p95_ms']:.1f}ms  max {summary['max_ms']:.1f}ms"
+            )
+            self.stdout.write(f"  {summary['shape']}")
+            self.stdout.write(f"  origin: {origin} ({origin_count} of {summary['count']})")
+            slowest = summary['slowest']
+            if slowest.get('frame'):
+                self.stdout.write(f"  from: {slowest['frame']}")
+            if slowest.get('stack'):
+                self.stdout.write(f"  at: {slowest['stack'][0]}")
+            if options['plans']:
+                for line in summary['plan'] or ['(no plan captured)']:
+                    self.stdout.write(f"    {line}")
+            self.stdout.write('')
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, help_text='Set when the event is deleted; it is purged in the background', null=True, verbose_name='deleted at'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('events', '0003_event_deleted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEventParticipant',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('event_id', models.BigIntegerField(db_index=True, verbose_name='event id')),
+                ('registered_at', models.DateTimeField(verbose_name='registered at')),
+                ('is_active', models.BooleanField(verbose_name='is active')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='archived at')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_participations', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'archived event participant',
+                'verbose_name_plural': 'archived event participants',
+                'db_table': 'archived_event_participants',
+                'ordering': ['-registered_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedEvent',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200, verbose_name='title')),
+                ('description', models.TextField(verbose_name='description')),
+                ('date', models.DateField(verbose_name='date')),
+                ('time', models.TimeField(verbose_name='time')),
+                ('location', models.CharField(max_length=500, verbose_name='location')),
+                ('max_participants', models.PositiveIntegerField(blank=True, null=True, verbose_name='maximum participants')),
+                ('created_at', models.DateTimeField(verbose_name='created at')),
+                ('updated_at', models.DateTimeField(verbose_name='updated at')),
+                ('is_active', models.BooleanField(verbose_name='is active')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='archived at')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_events', to=settings.AUTH_USER_MODEL, verbose_name='created by')),
+            ],
+            options={
+                'verbose_name': 'archived event',
+                'verbose_name_plural': 'archived events',
+                'db_table': 'archived_events',
+                'ordering': ['-date', '-time'],
+                'indexes': [models.Index(fields=['date', 'time'], name='archived_ev_date_acf682_idx'), models.Index(fields=['created_by'], name='archived_ev_created_aac261_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_event_title_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='event',
+            name='events_date_49fc5d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='events_is_acti_45ba60_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='eventparticipant',
+            name='event_parti_event_i_fdf78f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='eventparticipant',
+            name='event_parti_is_acti_e7c2dd_idx',
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, help_text='Set when the event is deleted; it is purged in the background', null=True, verbose_name='deleted at'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['date', 'time'], name='events_live_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('is_active', True)), fields=['date', 'time'], name='events_live_active_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='events_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventparticipant',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['event', 'registered_at'], name='event_part_active_event_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventparticipant',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', 'registered_at'], name='event_part_active_user_idx'),
+        ),
+    ]
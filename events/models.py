@@ -3,14 +3,30 @@ Event models for the event management system.
 """
 
 from django.db import models
+from django.db.models.functions import Coalesce, Upper
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
-from django.core.validators import MinValueValidator
 from django.utils import timezone
 
 User = get_user_model()
 
 
+class EventManager(models.Manager):
+    """
+    Default manager hiding soft-deleted events.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class EventParticipantManager(models.Manager):
+    """
+    Default manager hiding participations in soft-deleted events.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(event__deleted_at__isnull=True)
+
+
 class Event(models.Model):
     """
     Event model for managing conferences and seminars.
@@ -35,6 +51,18 @@ class Event(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
     is_active = models.BooleanField(_('is active'), default=True)
+    deleted_at = models.DateTimeField(
+        _('deleted at'),
+        null=True,
+        blank=True,
+        help_text=_('Set when the event is deleted; it is purged in the background')
+    )
+    
+    objects = EventManager()
+    all_objects = models.Manager()
+    
+    # Fields whose changes participants are notified about
+    TRACKED_FIELDS = ('title', 'date', 'time', 'location')
     
     class Meta:
         verbose_name = _('event')
@@ -42,17 +70,94 @@ class Event(models.Model):
         db_table = 'events'
         ordering = ['-date', '-time']
         indexes = [
-            models.Index(fields=['date', 'time']),
+            # The events list and the archive read live events by date.
+            # Booleans are conditions rather than columns: SQLite cannot
+            # search an index on `is_active` the way Django tests it.
+            models.Index(
+                fields=['date', 'time'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='events_live_date_idx'
+            ),
+            models.Index(
+                fields=['date', 'time'],
+                condition=models.Q(deleted_at__isnull=True, is_active=True),
+                name='events_live_active_date_idx'
+            ),
+            # Only the purge looks for deleted events
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='events_deleted_idx'
+            ),
             models.Index(fields=['created_by']),
-            models.Index(fields=['is_active']),
+            # Admin autocomplete searches titles by prefix, ignoring case
+            models.Index(Upper('title'), name='events_title_upper_idx'),
         ]
     
     def __str__(self):
         return f"{self.title} - {self.date} {self.time}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded values of the tracked fields."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.TRACKED_FIELDS and value is not models.DEFERRED
+        }
+        return instance
+    
+    def save(self, *args, update_fields=None, **kwargs):
+        """Save the event and start tracking changes from the saved values."""
+        super().save(*args, update_fields=update_fields, **kwargs)
+        self._remember_values(update_fields)
+    
+    def refresh_from_db(self, using=None, fields=None):
+        """Reload the event and start tracking changes from the reloaded values."""
+        super().refresh_from_db(using=using, fields=fields)
+        self._remember_values(fields)
+    
+    def _remember_values(self, fields=None):
+        """Take the current values of the tracked `fields` (default all loaded) as unchanged."""
+        if not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        deferred = self.get_deferred_fields()
+        for name in self.TRACKED_FIELDS:
+            if (fields is None or name in fields) and name not in deferred:
+                self._loaded_values[name] = getattr(self, name)
+    
+    def soft_delete(self):
+        """
+        Hide the event from every queryset right away.
+        
+        The event and its participants are removed later, in batches, by
+        `events.tasks.purge_deleted_event`.
+        """
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at', 'updated_at'])
+    
+    def get_tracked_changes(self, update_fields=None):
+        """
+        Return `{field: (old, new)}` for tracked fields changed since the
+        event was loaded or last saved, limited to `update_fields` if given.
+        New events have no changes.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return {}
+        return {
+            name: (old, getattr(self, name))
+            for name, old in loaded.items()
+            if (update_fields is None or name in update_fields) and getattr(self, name) != old
+        }
+    
     @property
     def participant_count(self):
         """Return the number of participants registered for this event."""
+        if hasattr(self, 'active_participant_count'):
+            # Annotated with `with_participant_count()`
+            return self.active_participant_count
         return self.participants.filter(is_active=True).count()
     
     @property
@@ -63,12 +168,16 @@ class Event(models.Model):
         return self.participant_count >= self.max_participants
     
     @property
-    def is_past(self):
-        """Check if the event is in the past."""
-        event_datetime = timezone.make_aware(
+    def starts_at(self):
+        """Return the aware datetime at which the event starts."""
+        return timezone.make_aware(
             timezone.datetime.combine(self.date, self.time)
         )
-        return event_datetime < timezone.now()
+    
+    @property
+    def is_past(self):
+        """Check if the event is in the past."""
+        return self.starts_at < timezone.now()
     
     @property
     def available_spots(self):
@@ -78,6 +187,35 @@ class Event(models.Model):
         return max(0, self.max_participants - self.participant_count)
 
 
+def with_participant_count(queryset):
+    """
+    Annotate events with `active_participant_count`, which
+    `participant_count` returns without a query per event.
+
+    The count is a correlated subquery rather than a join with GROUP BY, so
+    the events keep their Meta ordering and `count()` (e.g. for pagination)
+    leaves it out.
+    """
+    active = EventParticipant.all_objects.filter(
+        event=models.OuterRef('pk'),
+        is_active=True
+    ).order_by().values('event').annotate(count=models.Count('pk')).values('count')
+    return queryset.annotate(
+        active_participant_count=Coalesce(models.Subquery(active), 0)
+    )
+
+
+def prefetch_event_with_participant_count(lookup='event'):
+    """
+    Prefetch the events of a participant queryset annotated with
+    `with_participant_count()`.
+    """
+    return models.Prefetch(
+        lookup,
+        queryset=with_participant_count(Event.objects.select_related('created_by'))
+    )
+
+
 class EventParticipant(models.Model):
     """
     Model to track participants for events.
@@ -97,16 +235,30 @@ class EventParticipant(models.Model):
     registered_at = models.DateTimeField(_('registered at'), auto_now_add=True)
     is_active = models.BooleanField(_('is active'), default=True)
     
+    objects = EventParticipantManager()
+    all_objects = models.Manager()
+    
     class Meta:
         verbose_name = _('event participant')
         verbose_name_plural = _('event participants')
         db_table = 'event_participants'
         unique_together = ['event', 'user']
         ordering = ['-registered_at']
+        # (event, user) is indexed by unique_together. Active registrations
+        # are read by event (participants, participant_count) and by user
+        # (registered_events).
         indexes = [
-            models.Index(fields=['event', 'user']),
             models.Index(fields=['registered_at']),
-            models.Index(fields=['is_active']),
+            models.Index(
+                fields=['event', 'registered_at'],
+                condition=models.Q(is_active=True),
+                name='event_part_active_event_idx'
+            ),
+            models.Index(
+                fields=['user', 'registered_at'],
+                condition=models.Q(is_active=True),
+                name='event_part_active_user_idx'
+            ),
         ]
     
     def __str__(self):
@@ -117,4 +269,72 @@ class EventParticipant(models.Model):
         if not self.pk:  # Only on creation
             if self.event.is_full:
                 raise ValueError("Event is full")
-        super().save(*args, **kwargs) 
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+class ArchivedEvent(models.Model):
+    """
+    An event moved out of the live `events` table once it is long past.
+    
+    Keeps the original id, so archived participants and notifications still
+    refer to it.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(_('title'), max_length=200)
+    description = models.TextField(_('description'))
+    date = models.DateField(_('date'))
+    time = models.TimeField(_('time'))
+    location = models.CharField(_('location'), max_length=500)
+    max_participants = models.PositiveIntegerField(_('maximum participants'), null=True, blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_events',
+        verbose_name=_('created by')
+    )
+    created_at = models.DateTimeField(_('created at'))
+    updated_at = models.DateTimeField(_('updated at'))
+    is_active = models.BooleanField(_('is active'))
+    archived_at = models.DateTimeField(_('archived at'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('archived event')
+        verbose_name_plural = _('archived events')
+        db_table = 'archived_events'
+        ordering = ['-date', '-time']
+        indexes = [
+            models.Index(fields=['date', 'time']),
+            models.Index(fields=['created_by']),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} - {self.date} {self.time}"
+
+
+class ArchivedEventParticipant(models.Model):
+    """
+    A registration moved out of the live `event_participants` table.
+    
+    Holds the registrations of archived events and inactive registrations
+    of live ones, so `event_id` may refer to either table.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    event_id = models.BigIntegerField(_('event id'), db_index=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_participations',
+        verbose_name=_('user')
+    )
+    registered_at = models.DateTimeField(_('registered at'))
+    is_active = models.BooleanField(_('is active'))
+    archived_at = models.DateTimeField(_('archived at'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('archived event participant')
+        verbose_name_plural = _('archived event participants')
+        db_table = 'archived_event_participants'
+        ordering = ['-registered_at']
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.event_id}"
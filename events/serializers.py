@@ -5,7 +5,7 @@ Serializers for Event models.
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from .models import Event, EventParticipant
+from .models import ArchivedEvent, ArchivedEventParticipant, Event, EventParticipant
 
 User = get_user_model()
 
@@ -141,4 +141,32 @@ class EventReportSerializer(serializers.Serializer):
     created_at = serializers.DateTimeField()
     date = serializers.DateField()
     time = serializers.TimeField()
-    location = serializers.CharField() 
\ No newline at end of file
+    location = serializers.CharField()
+
+
+class ArchivedEventSerializer(serializers.ModelSerializer):
+    """
+    Serializer for archived events.
+    """
+    created_by = UserBasicSerializer(read_only=True)
+    
+    class Meta:
+        model = ArchivedEvent
+        fields = [
+            'id', 'title', 'description', 'date', 'time', 'location',
+            'max_participants', 'created_by', 'created_at', 'updated_at',
+            'is_active', 'archived_at'
+        ]
+        read_only_fields = fields
+
+
+class ArchivedEventParticipantSerializer(serializers.ModelSerializer):
+    """
+    Serializer for archived registrations.
+    """
+    user = UserBasicSerializer(read_only=True)
+    
+    class Meta:
+        model = ArchivedEventParticipant
+        fields = ['id', 'event_id', 'user', 'registered_at', 'is_active', 'archived_at']
+        read_only_fields = fields
@@ -0,0 +1,82 @@
+"""
+Celery tasks for event maintenance.
+"""
+
+import logging
+from celery import shared_task
+from django.conf import settings
+
+from . import archive
+from .models import Event, EventParticipant
+
+logger = logging.getLogger(__name__)
+
+
+def _purge_event(event_id):
+    """
+    Remove a soft-deleted event, its participants first in bounded batches.
+    
+    Participants are deleted by primary key, EVENT_PURGE_BATCH_SIZE at a
+    time, so no batch loads more than that many rows or holds locks for
+    long. Returns the number of participants removed.
+    """
+    batch_size = settings.EVENT_PURGE_BATCH_SIZE
+    removed = 0
+    while True:
+        ids = list(
+            EventParticipant.all_objects.filter(
+                event_id=event_id,
+                event__deleted_at__isnull=False
+            ).values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        removed += EventParticipant.all_objects.filter(id__in=ids).delete()[0]
+    
+    # Only a small tail (reminders, pending updates) is left to cascade.
+    Event.all_objects.filter(id=event_id, deleted_at__isnull=False).delete()
+    return removed
+
+
+@shared_task
+def purge_deleted_event(event_id):
+    """
+    Purge one soft-deleted event.
+    """
+    try:
+        removed = _purge_event(event_id)
+        logger.info(f'Purged event {event_id} and {removed} participants')
+        
+    except Exception as e:
+        logger.error(f'Error purging event {event_id}: {str(e)}')
+
+
+@shared_task
+def purge_deleted_events():
+    """
+    Purge every soft-deleted event still waiting, e.g. after a lost task.
+    """
+    try:
+        event_ids = list(
+            Event.all_objects.filter(deleted_at__isnull=False).values_list('id', flat=True)
+        )
+        for event_id in event_ids:
+            _purge_event(event_id)
+        logger.info(f'Purged {len(event_ids)} deleted events')
+        
+    except Exception as e:
+        logger.error(f'Error purging deleted events: {str(e)}')
+
+
+@shared_task
+def archive_events():
+    """
+    Move long-past events and inactive registrations to the archive tables.
+    """
+    try:
+        events = archive.archive_past_events()
+        registrations = archive.archive_inactive_registrations()
+        logger.info(f'Archived {events} events and {registrations} inactive registrations')
+        
+    except Exception as e:
+        logger.error(f'Error archiving events: {str(e)}')
@@ -4,11 +4,18 @@ URL patterns for the events app.
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EventViewSet, EventParticipantViewSet
+from .views import (
+    EventViewSet,
+    EventParticipantViewSet,
+    ArchivedEventViewSet,
+    ArchivedEventParticipantViewSet
+)
 
 router = DefaultRouter()
 router.register(r'events', EventViewSet, basename='event')
 router.register(r'participants', EventParticipantViewSet, basename='participant')
+router.register(r'archive/events', ArchivedEventViewSet, basename='archived-event')
+router.register(r'archive/participants', ArchivedEventParticipantViewSet, basename='archived-participant')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -6,27 +6,36 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Prefetch
-from django.utils import timezone
 
-from .models import Event, EventParticipant
+from event_management.db.transactions import immediate
+from event_management.routers import ReplicaReadMixin
+
+from .models import (
+    ArchivedEvent,
+    ArchivedEventParticipant,
+    Event,
+    EventParticipant,
+    prefetch_event_with_participant_count,
+    with_participant_count
+)
+from .tasks import purge_deleted_event
 from .serializers import (
     EventSerializer,
     EventCreateSerializer,
     EventUpdateSerializer,
     EventParticipantSerializer,
     EventParticipantCreateSerializer,
-    EventReportSerializer
+    EventReportSerializer,
+    ArchivedEventSerializer,
+    ArchivedEventParticipantSerializer
 )
 
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for Event CRUD operations.
     """
-    queryset = Event.objects.select_related('created_by').prefetch_related(
-        Prefetch('participants', queryset=EventParticipant.objects.filter(is_active=True))
-    )
+    queryset = with_participant_count(Event.objects.select_related('created_by'))
     serializer_class = EventSerializer
     permission_classes = [permissions.AllowAny]  # Temporarily allow anonymous access for testing
     filter_backends = [DjangoFilterBackend]
@@ -68,14 +77,16 @@ class EventViewSet(viewsets.ModelViewSet):
         )
         
         if serializer.is_valid():
-            participant = serializer.save()
-            # Trigger async task for confirmation email
-            try:
-                from notifications.tasks import send_registration_confirmation
-                send_registration_confirmation.delay(participant.id)
-            except ImportError:
-                # Handle case where notifications app is not available
-                pass
+            with immediate():
+                participant = serializer.save()
+                # Queue the confirmation email with the registration
+                try:
+                    from notifications import outbox
+                    from notifications.tasks import send_registration_confirmation
+                    outbox.enqueue(send_registration_confirmation, participant.id)
+                except ImportError:
+                    # Handle case where notifications app is not available
+                    pass
             
             return Response(
                 {'message': 'Successfully registered for event'},
@@ -106,10 +117,8 @@ class EventViewSet(viewsets.ModelViewSet):
     def participants(self, request, pk=None):
         """Get list of participants for an event."""
         event = self.get_object()
-        participants = EventParticipant.objects.filter(
-            event=event,
-            is_active=True
-        ).select_related('user')
+        # Going through the event's manager reuses its annotated instance.
+        participants = event.participants.filter(is_active=True).select_related('user')
         
         serializer = EventParticipantSerializer(participants, many=True)
         return Response(serializer.data)
@@ -155,7 +164,7 @@ class EventViewSet(viewsets.ModelViewSet):
         user_participations = EventParticipant.objects.filter(
             user=request.user,
             is_active=True
-        ).select_related('event', 'event__created_by')
+        ).prefetch_related(prefetch_event_with_participant_count())
         
         events = [p.event for p in user_participations]
         page = self.paginate_queryset(events)
@@ -175,22 +184,36 @@ class EventViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Notify participants about event cancellation
-        try:
-            from notifications.tasks import send_event_cancellation_notification
-            send_event_cancellation_notification.delay(event.id)
-        except ImportError:
-            # Handle case where notifications app is not available
-            pass
+        with immediate():
+            # Notify participants about event cancellation. The task runs
+            # after the delete commits, so it works from a snapshot.
+            try:
+                from notifications import cancellations, outbox
+                from notifications.tasks import send_event_cancellation_notification
+                snapshot = cancellations.capture(event)
+                outbox.enqueue(send_event_cancellation_notification, event.id, snapshot.id)
+                outbox.enqueue(purge_deleted_event, event.id)
+            except ImportError:
+                # Handle case where notifications app is not available;
+                # the periodic purge still removes the event.
+                pass
+            
+            self.perform_destroy(event)
         
-        return super().destroy(request, *args, **kwargs)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    def perform_destroy(self, instance):
+        """Soft-delete the event; participants are purged in the background."""
+        instance.soft_delete()
 
 
 class EventParticipantViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for EventParticipant read operations.
     """
-    queryset = EventParticipant.objects.select_related('user', 'event')
+    queryset = EventParticipant.objects.select_related('user').prefetch_related(
+        prefetch_event_with_participant_count()
+    )
     serializer_class = EventParticipantSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
@@ -206,4 +229,56 @@ class EventParticipantViewSet(viewsets.ReadOnlyModelViewSet):
         if not self.request.user.is_staff:
             queryset = queryset.filter(user=self.request.user)
         
-        return queryset 
\ No newline at end of file
+        return queryset
+
+
+class ArchivedEventViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for read access to archived events.
+    """
+    queryset = ArchivedEvent.objects.select_related('created_by')
+    serializer_class = ArchivedEventSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['date', 'is_active', 'created_by']
+    ordering = ['-date', '-time']
+    
+    @action(detail=True, methods=['get'])
+    def participants(self, request, pk=None):
+        """Get list of participants of an archived event."""
+        event = self.get_object()
+        if event.created_by_id != request.user.id and not request.user.is_staff:
+            return Response(
+                {'error': 'You can only view participants of events you created'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        participants = ArchivedEventParticipant.objects.filter(
+            event_id=event.id,
+            is_active=True
+        ).select_related('user')
+        
+        serializer = ArchivedEventParticipantSerializer(participants, many=True)
+        return Response(serializer.data)
+
+
+class ArchivedEventParticipantViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for read access to archived registrations.
+    """
+    queryset = ArchivedEventParticipant.objects.select_related('user')
+    serializer_class = ArchivedEventParticipantSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['event_id', 'user', 'is_active']
+    ordering = ['-registered_at']
+    
+    def get_queryset(self):
+        """Return queryset based on user permissions."""
+        queryset = super().get_queryset()
+        
+        # Staff can see all registrations, users can only see their own
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        
+        return queryset
@@ -0,0 +1,24 @@
+"""
+Gunicorn hooks, read from the working directory on startup.
+
+With PROMETHEUS_MULTIPROC_DIR set, each worker writes its metrics to files
+in that directory and /metrics aggregates them (event_management/metrics.py).
+The directory is emptied when the server starts, so counters from a previous
+run do not carry over, and a worker's files are marked dead when it exits.
+"""
+
+import os
+import shutil
+
+
+def on_starting(server):
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
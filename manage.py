@@ -15,7 +15,9 @@ def main():
             "available on your PYTHONPATH environment variable? Did you "
             "forget to activate a virtual environment?"
         ) from exc
-    execute_from_command_line(sys.argv)
+    from event_management.db.slow_queries import recording
+    with recording():
+        execute_from_command_line(sys.argv)
 
 
 if __name__ == '__main__':
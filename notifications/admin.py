@@ -3,6 +3,8 @@ Admin interface for Notification model.
 """
 
 from django.contrib import admin
+
+from event_management.pagination import EstimatedCountPaginator
 from .models import Notification
 
 
@@ -15,10 +17,14 @@ class NotificationAdmin(admin.ModelAdmin):
         'user', 'notification_type', 'title', 'is_read', 'created_at'
     ]
     list_filter = ['notification_type', 'is_read', 'created_at']
+    list_select_related = ['user']
     search_fields = [
         'user__email', 'user__first_name', 'user__last_name',
         'title', 'message', 'event_title'
     ]
+    autocomplete_fields = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     ordering = ['-created_at']
     readonly_fields = ['created_at', 'read_at']
     
@@ -0,0 +1,17 @@
+"""
+App configuration for the notifications app.
+"""
+
+from django.apps import AppConfig
+
+
+class NotificationsConfig(AppConfig):
+    """
+    Notifications app configuration.
+    """
+    name = 'notifications'
+    verbose_name = 'Notifications'
+    
+    def ready(self):
+        """Connect signal handlers."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,57 @@
+"""
+Recipient snapshots for event cancellations.
+
+Deleting an event cascades to its participants, so the cancellation fan-out
+cannot read them once the delete commits. `capture()` copies the event fields
+the notification needs and the active participants' user ids into
+`CancellationSnapshot` and `CancellationRecipient` rows inside the deleting
+transaction. The fan-out then streams recipients from the snapshot in chunks
+and drops each chunk once it has been notified, so a retried task resumes
+where the last run stopped.
+"""
+
+from django.conf import settings
+
+from .models import CancellationRecipient, CancellationSnapshot
+
+
+def capture(event):
+    """Snapshot an event and its active participants; return the snapshot."""
+    snapshot = CancellationSnapshot.objects.create(
+        event_id=event.id,
+        event_title=event.title,
+        event_date=event.date,
+        event_time=event.time
+    )
+    user_ids = event.participants.filter(is_active=True).values_list('user_id', flat=True)
+
+    batch = []
+    for user_id in user_ids.iterator(chunk_size=settings.CANCELLATION_CHUNK_SIZE):
+        batch.append(CancellationRecipient(snapshot=snapshot, user_id=user_id))
+        if len(batch) >= settings.CANCELLATION_CHUNK_SIZE:
+            CancellationRecipient.objects.bulk_create(batch)
+            batch = []
+    CancellationRecipient.objects.bulk_create(batch)
+    return snapshot
+
+
+def iter_recipient_chunks(snapshot, queryset=None):
+    """
+    Yield lists of remaining recipients, users selected, in id order.
+
+    Callers delete each chunk's rows once it has been handled; the next
+    chunk starts after the last id seen either way.
+    """
+    if queryset is None:
+        queryset = snapshot.recipients.all()
+    queryset = queryset.select_related('user').order_by('id')
+    chunk_size = settings.CANCELLATION_CHUNK_SIZE
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].id
+        if len(chunk) < chunk_size:
+            return
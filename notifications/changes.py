@@ -0,0 +1,150 @@
+"""
+Change-aware event update notifications.
+
+Saving an event whose title, date, time or location changed enqueues an
+update notification through the outbox, with a message describing the
+change. Other fields, such as the description, never notify anyone.
+
+Saves within one transaction are coalesced: the first creates the outbox
+row, later ones rewrite its message against the values the transaction
+started from, and a save that restores those values drops the row.
+
+The pending state lives in a per-thread registry for each database
+connection, emptied when the transaction commits. Every entry names the
+outbox row it wrote and the message it wrote there, and is only trusted
+while the row still says so: a rollback, including a savepoint rollback,
+undoes the row and with it the entries that described it, leaving the
+state from before.
+"""
+
+import datetime
+import threading
+
+from django.db import transaction
+from django.utils.text import capfirst
+
+from events.models import Event
+from . import outbox
+from .models import OutboxMessage
+
+
+_local = threading.local()
+
+
+class PendingUpdate:
+    """
+    An event's pending update notification in the current transaction:
+    the outbox row holding it (None once it was dropped) and the changes
+    its message describes.
+    """
+
+    def __init__(self, event_id, message_id, changes, dropped_id=None):
+        self.event_id = event_id
+        self.message_id = message_id
+        self.changes = changes
+        self.dropped_id = dropped_id
+
+    def args(self):
+        return [self.event_id, describe_changes(self.changes)]
+
+
+def _registry(connection):
+    """Return this thread's `{event_id: [PendingUpdate, ...]}` for `connection`."""
+    registries = _local.__dict__.setdefault('registries', {})
+    return registries.setdefault(connection.alias, {})
+
+
+def _clear(alias):
+    _local.__dict__.get('registries', {}).pop(alias, None)
+
+
+def _pending(event_id):
+    """Return the event's latest `PendingUpdate` in this transaction, or None."""
+    from .tasks import send_event_update_notification
+
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return None
+    updates = _registry(connection).get(event_id, [])
+    rows = dict(OutboxMessage.objects.filter(
+        id__in={update.message_id or update.dropped_id for update in updates},
+        task_name=send_event_update_notification.name
+    ).values_list('id', 'args'))
+    # The newest entry whose write is still in the database, i.e. was not
+    # rolled back. A dropped row leaves nothing pending.
+    for update in reversed(updates):
+        if update.message_id is None:
+            if update.dropped_id not in rows:
+                return None
+        elif rows.get(update.message_id) == update.args():
+            return update
+    return None
+
+
+def _set_pending(event_id, message_id, changes, dropped_id=None):
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return
+    updates = _registry(connection).setdefault(event_id, [])
+    updates.append(PendingUpdate(event_id, message_id, changes, dropped_id))
+    # Registered with every entry, as callbacks of a savepoint that rolls
+    # back are dropped.
+    alias = connection.alias
+    transaction.on_commit(lambda: _clear(alias), using=alias)
+
+
+def _format_value(value):
+    if isinstance(value, datetime.time):
+        return value.strftime('%H:%M')
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return f'"{value}"'
+
+
+def describe_changes(changes):
+    """Return an update message for `{field: (old, new)}` changes."""
+    parts = []
+    for name in Event.TRACKED_FIELDS:
+        if name not in changes:
+            continue
+        old, new = changes[name]
+        label = capfirst(Event._meta.get_field(name).verbose_name)
+        parts.append(f'{label} changed from {_format_value(old)} to {_format_value(new)}')
+    return '; '.join(parts) + '.'
+
+
+def record_event_changes(event, changes):
+    """
+    Enqueue or update the event's pending update notification.
+
+    `changes` maps the fields changed by this save to their (old, new)
+    values.
+    """
+    from .tasks import send_event_update_notification
+
+    pending = _pending(event.id)
+    message_id, merged = (pending.message_id, dict(pending.changes)) if pending else (None, {})
+    for name, (old, new) in changes.items():
+        # Keep the value the transaction started from.
+        merged[name] = (merged[name][0] if name in merged else old, new)
+    merged = {name: (old, new) for name, (old, new) in merged.items() if old != new}
+
+    if message_id is not None:
+        messages = OutboxMessage.objects.filter(
+            id=message_id,
+            task_name=send_event_update_notification.name
+        )
+        if not merged:
+            messages.delete()
+            _set_pending(event.id, None, {}, dropped_id=message_id)
+            return
+        if messages.update(args=[event.id, describe_changes(merged)]):
+            _set_pending(event.id, message_id, merged)
+            return
+        # The row is gone, e.g. the relay already took it; start over.
+        merged = dict(changes)
+
+    if not merged:
+        return
+    message = outbox.enqueue(send_event_update_notification, event.id, describe_changes(merged))
+    _set_pending(event.id, message.id, merged)
@@ -0,0 +1,233 @@
+"""
+Email delivery stage for notification tasks.
+
+Notification tasks hand their emails to `send()` or `send_many()` instead of
+calling `send_mail(..., fail_silently=True)`. Delivery:
+
+- takes a token from a token bucket shared by all workers through the cache,
+- sends over one SMTP connection per batch,
+- re-queues a message with exponential backoff when the failure looks
+  transient (with eager Celery, through the outbox: see `_handle_failure`),
+  and
+- records it in `EmailDeadLetter` once attempts run out or the server
+  rejected it permanently. `manage.py replay_dead_letters` re-sends those.
+
+An email is a JSON-serializable dict with `to`, `subject` and `body` and the
+optional `html` and `from_email` keys, so it can travel as a task argument.
+"""
+
+import logging
+import math
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from .models import EmailDeadLetter
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every process using the same cache.
+
+    The bucket holds up to `burst` tokens and refills continuously at `rate`
+    tokens per second, so over any interval of T seconds, wherever it
+    starts, at most `burst + rate * T` emails go out (with a burst of 1, no
+    second sees more than `rate`). The token count and the time of the last
+    refill live under one key and are updated atomically: by a Lua script
+    on Redis, which also supplies the clock, and under a lock with the
+    process-local cache, where the limit applies per process.
+    """
+
+    # KEYS[1]: bucket hash; ARGV: rate, burst. Returns the wait in seconds.
+    SCRIPT = """
+        local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+        local clock = redis.call('TIME')
+        local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+        local tokens = tonumber(state[1]) or burst
+        local updated = tonumber(state[2]) or now
+        tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+        local wait = 0
+        if tokens >= 1 then
+            tokens = tokens - 1
+        else
+            wait = (1 - tokens) / rate
+        end
+        redis.call('HSET', KEYS[1], 'tokens', string.format('%.6f', tokens), 'updated', string.format('%.6f', now))
+        redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+        return string.format('%.6f', wait)
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, rate, burst=1, key='email-rate'):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.key = key
+
+    def take(self, tokens, updated, now):
+        """
+        Refill a bucket last updated at `updated` and take a token; return
+        the tokens left and the seconds to wait (0 once a token was taken).
+        """
+        tokens = min(self.burst, tokens + max(0, now - updated) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, 0
+        return tokens, (1 - tokens) / self.rate
+
+    def try_acquire(self):
+        """Take a token if one is left; return the seconds to wait otherwise."""
+        backend = caches['default']
+        if isinstance(backend, RedisCache):
+            key = backend.make_and_validate_key(self.key)
+            client = backend._cache.get_client(key, write=True)
+            return float(client.eval(self.SCRIPT, 1, key, self.rate, self.burst))
+        with self._lock:
+            now = time.time()
+            tokens, updated = backend.get(self.key) or (self.burst, now)
+            tokens, wait = self.take(tokens, updated, now)
+            backend.set(self.key, (tokens, now), timeout=math.ceil(self.burst / self.rate) + 1)
+        return wait
+
+    def acquire(self):
+        """Block until a token is available."""
+        if not self.rate:
+            return
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+def _bucket():
+    return TokenBucket(settings.EMAIL_RATE_LIMIT_PER_SECOND, settings.EMAIL_RATE_LIMIT_BURST)
+
+
+def make_email(to, subject, body, html=None):
+    """Build an email dict for the delivery stage."""
+    email = {'to': to, 'subject': subject, 'body': body}
+    if html:
+        email['html'] = html
+    return email
+
+
+def is_transient(exc):
+    """Return True if a failed send is worth retrying."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return False
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code < 500
+    return isinstance(exc, (smtplib.SMTPException, OSError))
+
+
+def retry_delay(attempt):
+    """Exponential backoff before the given (1-based) retry."""
+    delay = settings.EMAIL_RETRY_DELAY_SECONDS * (2 ** (attempt - 1))
+    return min(delay, settings.EMAIL_MAX_RETRY_DELAY_SECONDS)
+
+
+def _build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email['subject'],
+        body=email['body'],
+        from_email=email.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+        to=[email['to']],
+        connection=connection
+    )
+    if email.get('html'):
+        message.attach_alternative(email['html'], 'text/html')
+    return message
+
+
+def dead_letter(email, attempts, error):
+    """Record an undeliverable email."""
+    logger.error(f'Dead-lettering email to {email["to"]} after {attempts} attempts: {error}')
+    EmailDeadLetter.objects.create(
+        recipient=email['to'],
+        subject=email['subject'][:255],
+        body=email['body'],
+        html_body=email.get('html', ''),
+        from_email=email.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+        error=str(error),
+        attempts=attempts
+    )
+
+
+def current_queue():
+    """Return the queue of the task sending mail, or None outside a task."""
+    from celery import current_task
+
+    if not current_task:
+        return None
+    delivery_info = current_task.request.delivery_info or {}
+    if delivery_info.get('routing_key'):
+        return delivery_info['routing_key']
+    from event_management.celery import TASK_ROUTES
+
+    return TASK_ROUTES.get(current_task.name, {}).get('queue')
+
+
+def _handle_failure(email, attempts, exc, queue=None):
+    """Schedule a retry or dead-letter a failed email."""
+    if not is_transient(exc) or attempts >= settings.EMAIL_MAX_ATTEMPTS:
+        dead_letter(email, attempts, exc)
+        return
+    from .tasks import deliver_email
+
+    logger.warning(f'Email to {email["to"]} failed (attempt {attempts}), retrying: {str(exc)}')
+    # Retries stay on the queue of the task that sent the email, so bulk
+    # retries never compete with transactional mail.
+    if deliver_email.app.conf.task_always_eager:
+        # Eager tasks ignore the countdown and would retry inline, so the
+        # retry waits in the outbox until a relay finds it due. Without a
+        # broker there is no beat either: `manage.py relay_outbox --loop`
+        # has to run for it to be sent.
+        from .outbox import enqueue
+        enqueue(deliver_email, email, attempts, queue, delay=retry_delay(attempts))
+        return
+    options = {'queue': queue} if queue else {}
+    deliver_email.apply_async(args=[email, attempts, queue], countdown=retry_delay(attempts), **options)
+
+
+def send_many(emails, attempts=0, queue=None):
+    """
+    Deliver emails over a shared connection.
+
+    Returns the number of emails sent now; failures are retried or
+    dead-lettered in the background, on `queue` (by default the queue of the
+    calling task).
+    """
+    if queue is None:
+        queue = current_queue()
+    bucket = _bucket()
+    connection = get_connection()
+    sent = 0
+    try:
+        for email in emails:
+            bucket.acquire()
+            try:
+                # Keep the connection open across messages; send() would
+                # otherwise connect and disconnect for each one.
+                connection.open()
+                _build_message(email, connection).send()
+                sent += 1
+            except Exception as e:
+                _handle_failure(email, attempts + 1, e, queue)
+                # A failed connection stays broken; start a fresh one.
+                connection.close()
+    finally:
+        connection.close()
+    return sent
+
+
+def send(to, subject, body, html=None):
+    """Deliver a single email."""
+    return send_many([make_email(to, subject, body, html)])
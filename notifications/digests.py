@@ -0,0 +1,77 @@
+"""
+Coalescing of event update notifications.
+
+The first update of an event opens a window of
+NOTIFICATION_COALESCE_WINDOW_SECONDS. Updates arriving while it is open are
+appended to the event's `PendingEventUpdate` row, and when it closes the
+participants get one merged notification and one email. Participants who
+opted into the daily digest get no email; the update is queued as a
+`DigestItem` and collected by `send_daily_digests`.
+
+Eager Celery ignores countdowns, so there the flush of a window waits in
+the outbox until it is due, like eager email retries: run
+`manage.py relay_outbox --loop` (or beat's `flush-event-updates`) to send
+it. Set NOTIFICATION_COALESCE_WINDOW_SECONDS=0 to send every update at once.
+"""
+
+import logging
+
+from celery import current_app
+from django.conf import settings
+from django.utils import timezone
+
+from event_management.db.transactions import immediate
+
+from .models import PendingEventUpdate
+
+logger = logging.getLogger(__name__)
+
+
+def buffer_event_update(event_id, message):
+    """Add an update message to the event's open window, opening one if needed."""
+    window = settings.NOTIFICATION_COALESCE_WINDOW_SECONDS
+    with immediate():
+        pending, created = PendingEventUpdate.objects.select_for_update().get_or_create(
+            event_id=event_id,
+            defaults={
+                'messages': [message],
+                'flush_at': timezone.now() + timezone.timedelta(seconds=window),
+            }
+        )
+        if not created:
+            pending.messages.append(message)
+            pending.save(update_fields=['messages'])
+
+    if created:
+        from .tasks import flush_event_updates
+        if current_app.conf.task_always_eager:
+            from .outbox import enqueue
+            enqueue(flush_event_updates, event_id, delay=window)
+        else:
+            flush_event_updates.apply_async(args=[event_id], countdown=window)
+    return created
+
+
+def take_due_updates(event_id):
+    """
+    Close an event's window if it is due and return its messages.
+
+    Returns None if there is nothing to flush, e.g. because another worker
+    already flushed it.
+    """
+    with immediate():
+        pending = PendingEventUpdate.objects.select_for_update().filter(
+            event_id=event_id,
+            flush_at__lte=timezone.now()
+        ).first()
+        # The delete is the claim: only one flusher can remove the row.
+        if pending is None or not PendingEventUpdate.objects.filter(id=pending.id).delete()[0]:
+            return None
+    return pending.messages
+
+
+def merge_messages(messages):
+    """Merge buffered update messages into one."""
+    if len(messages) == 1:
+        return messages[0]
+    return '\n'.join(f'- {message}' for message in messages)
@@ -0,0 +1,71 @@
+"""
+Templated notification emails.
+
+Each email type has three templates under `notifications/email/`:
+`<name>_subject.txt`, `<name>.txt` and `<name>.html`. They are compiled once
+per process and cached.
+
+For fan-outs, `prepare()` renders the event-dependent part once, with
+placeholders standing in for the recipient fields, and `for_recipient()` only
+substitutes those fields. HTML bodies get the substituted values escaped.
+"""
+
+from functools import lru_cache
+
+from django.template.loader import get_template
+from django.utils.html import escape
+
+from .delivery import make_email
+
+RECIPIENT_FIELDS = ('first_name', 'last_name')
+
+_PLACEHOLDERS = {field: f'[[recipient.{field}]]' for field in RECIPIENT_FIELDS}
+
+
+@lru_cache(maxsize=None)
+def get_templates(name):
+    """Return the compiled (subject, text, html) templates of an email type."""
+    base = f'notifications/email/{name}'
+    return (
+        get_template(f'{base}_subject.txt'),
+        get_template(f'{base}.txt'),
+        get_template(f'{base}.html'),
+    )
+
+
+class PreparedEmail:
+    """
+    An email rendered for one event, waiting for its recipient.
+    """
+
+    def __init__(self, subject, text, html):
+        self.subject = subject
+        self.text = text
+        self.html = html
+
+    def for_recipient(self, user):
+        """Return the email dict for `user`."""
+        text = self.text
+        html = self.html
+        for field, placeholder in _PLACEHOLDERS.items():
+            value = getattr(user, field)
+            text = text.replace(placeholder, value)
+            html = html.replace(placeholder, escape(value))
+        return make_email(user.email, self.subject, text, html)
+
+
+def prepare(name, context):
+    """Render the recipient-independent part of an email once."""
+    subject, text, html = get_templates(name)
+    context = {**context, 'recipient': _PLACEHOLDERS}
+    return PreparedEmail(
+        # Subjects must be a single line.
+        ' '.join(subject.render(context).split()),
+        text.render(context),
+        html.render(context),
+    )
+
+
+def render(name, context, user):
+    """Render an email for a single recipient."""
+    return prepare(name, context).for_recipient(user)
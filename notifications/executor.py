@@ -0,0 +1,195 @@
+"""
+In-process background executor for notification tasks.
+
+Used instead of Celery when NOTIFICATIONS_TASK_BACKEND is 'background', so
+small deployments get non-blocking notifications without running a broker.
+Jobs go to a bounded queue served by a fixed pool of daemon threads. When the
+queue is full, `submit()` waits briefly and then runs the job in the calling
+thread, which slows producers down instead of dropping work. Pending jobs are
+drained when the process exits.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from event_management.metrics import record_executor_depth
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BackgroundExecutor:
+    """
+    Bounded thread pool with queue depth and latency statistics.
+    """
+
+    def __init__(self, max_workers=4, max_queue_size=1000, submit_timeout=0.5, name='notifications'):
+        self.max_workers = max_workers
+        self.submit_timeout = submit_timeout
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._latencies = deque(maxlen=1000)
+        self._counters = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'ran_inline': 0,
+        }
+
+    def _start(self):
+        """Start the worker threads on first use."""
+        with self._lock:
+            if self._threads or self._shutdown:
+                return
+            for index in range(self.max_workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    name=f'{self.name}-worker-{index}',
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, fn, *args):
+        """
+        Queue `fn(*args)` for a worker thread.
+
+        Returns True if the job was queued, False if it ran in the caller
+        because the queue stayed full or the executor is shutting down.
+        """
+        self._start()
+        enqueued_at = time.monotonic()
+        with self._lock:
+            self._counters['submitted'] += 1
+
+        if not self._shutdown:
+            try:
+                self._queue.put((fn, args, enqueued_at), timeout=self.submit_timeout)
+                record_executor_depth(self.name, self._queue.qsize())
+                return True
+            except queue.Full:
+                logger.warning(f'{self.name} executor queue full, running job inline')
+
+        with self._lock:
+            self._counters['ran_inline'] += 1
+        self._run(fn, args, enqueued_at)
+        return False
+
+    def _run(self, fn, args, enqueued_at):
+        """Run one job and record its outcome."""
+        failed = False
+        try:
+            fn(*args)
+        except Exception as e:
+            failed = True
+            logger.error(f'Error in background job {getattr(fn, "__name__", fn)}: {str(e)}')
+        latency = time.monotonic() - enqueued_at
+        with self._lock:
+            self._counters['failed' if failed else 'completed'] += 1
+            self._latencies.append(latency)
+
+    def _work(self):
+        """Worker thread loop."""
+        while True:
+            item = self._queue.get()
+            record_executor_depth(self.name, self._queue.qsize())
+            try:
+                if item is _STOP:
+                    return
+                self._close_old_connections()
+                self._run(*item)
+            finally:
+                self._close_old_connections()
+                self._queue.task_done()
+                if item is _STOP:
+                    connections.close_all()
+
+    def _close_old_connections(self):
+        """Close expired connections, logging failures so the worker keeps running."""
+        try:
+            close_old_connections()
+        except Exception as e:
+            logger.error(f'{self.name} executor could not close old database connections: {str(e)}')
+
+    def shutdown(self, timeout=None):
+        """
+        Stop accepting work and wait for queued jobs to finish.
+
+        Returns True if every worker exited within `timeout` seconds.
+        """
+        with self._lock:
+            if self._shutdown:
+                return True
+            self._shutdown = True
+            threads = list(self._threads)
+
+        # Stop markers queue behind pending jobs, so workers drain first.
+        for _ in threads:
+            self._queue.put(_STOP)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in threads:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            thread.join(remaining)
+
+        drained = not any(thread.is_alive() for thread in threads)
+        if not drained:
+            logger.warning(f'{self.name} executor shut down with {self._queue.qsize()} jobs pending')
+        return drained
+
+    def stats(self):
+        """Return queue depth, job counters and latency percentiles in seconds."""
+        with self._lock:
+            counters = dict(self._counters)
+            latencies = sorted(self._latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+        return {
+            'queue_depth': self._queue.qsize(),
+            'queue_capacity': self._queue.maxsize,
+            'workers': len(self._threads),
+            **counters,
+            'latency_p50': percentile(0.50),
+            'latency_p95': percentile(0.95),
+            'latency_max': latencies[-1] if latencies else None,
+        }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide executor, creating it from settings."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = BackgroundExecutor(
+                    max_workers=settings.BACKGROUND_TASK_WORKERS,
+                    max_queue_size=settings.BACKGROUND_TASK_QUEUE_SIZE,
+                    submit_timeout=settings.BACKGROUND_TASK_SUBMIT_TIMEOUT
+                )
+                atexit.register(_drain_on_exit)
+    return _executor
+
+
+def _drain_on_exit():
+    """Drain pending jobs when the web or worker process exits."""
+    if _executor is not None:
+        _executor.shutdown(timeout=settings.BACKGROUND_TASK_DRAIN_TIMEOUT)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+import time
+
+from notifications.outbox import relay
+
+
+class Command(BaseCommand):
+    help = 'Relay committed notification outbox messages to the task queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls in loop mode')
+
+    def handle(self, *args, **options):
+        while True:
+            count = relay(batch_size=options['batch_size'])
+            if count:
+                self.stdout.write(f"Relayed {count} outbox messages")
+            if not options['loop']:
+                break
+            if not count:
+                time.sleep(options['interval'])
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notifications.models import EmailDeadLetter
+from notifications.tasks import deliver_email
+
+
+class Command(BaseCommand):
+    help = 'Re-send dead-lettered notification emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help='Dead letter ids (default: all not yet replayed)')
+        parser.add_argument('--limit', type=int, default=None, help='Replay at most this many letters')
+        parser.add_argument('--dry-run', action='store_true', help='List the letters without sending')
+
+    def handle(self, *args, **options):
+        letters = EmailDeadLetter.objects.filter(replayed_at__isnull=True).order_by('created_at')
+        if options['ids']:
+            letters = letters.filter(id__in=options['ids'])
+        if options['limit']:
+            letters = letters[:options['limit']]
+
+        count = 0
+        for letter in letters:
+            if options['dry_run']:
+                self.stdout.write(f"{letter.id}: {letter.recipient} - {letter.subject} ({letter.error})")
+                continue
+            # Start over with a fresh attempt budget.
+            deliver_email.delay(letter.as_email(), 0)
+            EmailDeadLetter.objects.filter(id=letter.id).update(replayed_at=timezone.now())
+            count += 1
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"Replayed {count} dead letters"))
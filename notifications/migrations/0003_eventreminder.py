@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_initial'),
+        ('notifications', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset_minutes', models.PositiveIntegerField(verbose_name='offset in minutes')),
+                ('remind_at', models.DateTimeField(verbose_name='remind at')),
+                ('task_id', models.CharField(blank=True, max_length=64, verbose_name='task id')),
+                ('queued_at', models.DateTimeField(blank=True, null=True, verbose_name='queued at')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='sent at')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='events.event', verbose_name='event')),
+            ],
+            options={
+                'verbose_name': 'event reminder',
+                'verbose_name_plural': 'event reminders',
+                'db_table': 'event_reminders',
+                'ordering': ['remind_at'],
+                'indexes': [models.Index(fields=['sent_at', 'remind_at'], name='event_remin_sent_at_c0873a_idx')],
+                'unique_together': {('event', 'offset_minutes')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailDeadLetter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient', models.EmailField(max_length=254, verbose_name='recipient')),
+                ('subject', models.CharField(max_length=255, verbose_name='subject')),
+                ('body', models.TextField(verbose_name='body')),
+                ('html_body', models.TextField(blank=True, verbose_name='HTML body')),
+                ('from_email', models.EmailField(max_length=254, verbose_name='from email')),
+                ('error', models.TextField(verbose_name='error')),
+                ('attempts', models.PositiveIntegerField(verbose_name='attempts')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('replayed_at', models.DateTimeField(blank=True, null=True, verbose_name='replayed at')),
+            ],
+            options={
+                'verbose_name': 'email dead letter',
+                'verbose_name_plural': 'email dead letters',
+                'db_table': 'email_dead_letters',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['replayed_at', 'created_at'], name='email_dead__replaye_710d8b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_initial'),
+        ('notifications', '0005_emaildeadletter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingEventUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('messages', models.JSONField(default=list, verbose_name='messages')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('flush_at', models.DateTimeField(db_index=True, verbose_name='flush at')),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pending_update', to='events.event', verbose_name='event')),
+            ],
+            options={
+                'verbose_name': 'pending event update',
+                'verbose_name_plural': 'pending event updates',
+                'db_table': 'pending_event_updates',
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0006_pendingeventupdate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CancellationSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.PositiveIntegerField(verbose_name='event id')),
+                ('event_title', models.CharField(max_length=200, verbose_name='event title')),
+                ('event_date', models.DateField(verbose_name='event date')),
+                ('event_time', models.TimeField(verbose_name='event time')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+            options={
+                'verbose_name': 'cancellation snapshot',
+                'verbose_name_plural': 'cancellation snapshots',
+                'db_table': 'cancellation_snapshots',
+            },
+        ),
+        migrations.CreateModel(
+            name='CancellationRecipient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipients', to='notifications.cancellationsnapshot', verbose_name='snapshot')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'cancellation recipient',
+                'verbose_name_plural': 'cancellation recipients',
+                'db_table': 'cancellation_recipients',
+            },
+        ),
+    ]
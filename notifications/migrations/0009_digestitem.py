@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0008_notification_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.PositiveIntegerField(verbose_name='event id')),
+                ('event_title', models.CharField(max_length=200, verbose_name='event title')),
+                ('message', models.TextField(verbose_name='message')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'digest item',
+                'verbose_name_plural': 'digest items',
+                'db_table': 'digest_items',
+                'ordering': ['user', 'created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='digest_item_created_7f8b97_idx')],
+            },
+        ),
+    ]
@@ -4,6 +4,7 @@ Notification models for the event management system.
 
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 User = get_user_model()
@@ -56,9 +57,17 @@ class Notification(models.Model):
         db_table = 'notifications'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['user', 'is_read']),
+            # A user's notifications newest first, and the unread ones
+            # for unread_count and mark_all_as_read
+            models.Index(fields=['user', 'created_at']),
+            models.Index(
+                fields=['user', 'created_at'],
+                condition=models.Q(is_read=False),
+                name='notifications_unread_idx'
+            ),
             models.Index(fields=['notification_type']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['event_id']),
         ]
     
     def __str__(self):
@@ -68,6 +77,201 @@ class Notification(models.Model):
         """Mark notification as read."""
         if not self.is_read:
             self.is_read = True
-            from django.utils import timezone
             self.read_at = timezone.now()
-            self.save() 
\ No newline at end of file
+            self.save()
+
+
+class EventReminder(models.Model):
+    """
+    A reminder scheduled at a fixed offset before an event starts.
+    """
+    event = models.ForeignKey(
+        'events.Event',
+        on_delete=models.CASCADE,
+        related_name='reminders',
+        verbose_name=_('event')
+    )
+    offset_minutes = models.PositiveIntegerField(_('offset in minutes'))
+    remind_at = models.DateTimeField(_('remind at'))
+    task_id = models.CharField(_('task id'), max_length=64, blank=True)
+    queued_at = models.DateTimeField(_('queued at'), null=True, blank=True)
+    sent_at = models.DateTimeField(_('sent at'), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('event reminder')
+        verbose_name_plural = _('event reminders')
+        db_table = 'event_reminders'
+        unique_together = ['event', 'offset_minutes']
+        ordering = ['remind_at']
+        indexes = [
+            models.Index(fields=['sent_at', 'remind_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_id} - {self.remind_at}"
+
+
+class OutboxMessage(models.Model):
+    """
+    Task dispatch recorded in the same transaction as the change that caused
+    it, and relayed to the task queue after commit.
+    """
+    task_name = models.CharField(_('task name'), max_length=200)
+    args = models.JSONField(_('arguments'), default=list)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    available_at = models.DateTimeField(_('available at'), default=timezone.now)
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+    
+    class Meta:
+        verbose_name = _('outbox message')
+        verbose_name_plural = _('outbox messages')
+        db_table = 'notification_outbox'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['available_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.task_name}{tuple(self.args)}"
+
+
+class EmailDeadLetter(models.Model):
+    """
+    Email that could not be delivered after all retry attempts.
+    """
+    recipient = models.EmailField(_('recipient'))
+    subject = models.CharField(_('subject'), max_length=255)
+    body = models.TextField(_('body'))
+    html_body = models.TextField(_('HTML body'), blank=True)
+    from_email = models.EmailField(_('from email'))
+    error = models.TextField(_('error'))
+    attempts = models.PositiveIntegerField(_('attempts'))
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    replayed_at = models.DateTimeField(_('replayed at'), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('email dead letter')
+        verbose_name_plural = _('email dead letters')
+        db_table = 'email_dead_letters'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['replayed_at', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.recipient} - {self.subject}"
+    
+    def as_email(self):
+        """Return the message in the form accepted by the delivery stage."""
+        email = {
+            'to': self.recipient,
+            'subject': self.subject,
+            'body': self.body,
+            'from_email': self.from_email,
+        }
+        if self.html_body:
+            email['html'] = self.html_body
+        return email
+
+
+class PendingEventUpdate(models.Model):
+    """
+    Event update messages buffered until the coalescing window closes.
+    """
+    event = models.OneToOneField(
+        'events.Event',
+        on_delete=models.CASCADE,
+        related_name='pending_update',
+        verbose_name=_('event')
+    )
+    messages = models.JSONField(_('messages'), default=list)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    flush_at = models.DateTimeField(_('flush at'), db_index=True)
+    
+    class Meta:
+        verbose_name = _('pending event update')
+        verbose_name_plural = _('pending event updates')
+        db_table = 'pending_event_updates'
+    
+    def __str__(self):
+        return f"{self.event_id} - {len(self.messages)} updates"
+
+
+class DigestItem(models.Model):
+    """
+    An event update waiting for a user's next daily digest email.
+    
+    Kept apart from `Notification` so the digest does not depend on the
+    user's in-app preference.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('user')
+    )
+    event_id = models.PositiveIntegerField(_('event id'))
+    event_title = models.CharField(_('event title'), max_length=200)
+    message = models.TextField(_('message'))
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('digest item')
+        verbose_name_plural = _('digest items')
+        db_table = 'digest_items'
+        ordering = ['user', 'created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.event_title}"
+
+
+class CancellationSnapshot(models.Model):
+    """
+    What a cancellation fan-out needs from an event that is being deleted.
+    
+    Captured in the deleting transaction, together with one
+    `CancellationRecipient` per active participant, so the fan-out never
+    reads the event or its cascaded participants.
+    """
+    event_id = models.PositiveIntegerField(_('event id'))
+    event_title = models.CharField(_('event title'), max_length=200)
+    event_date = models.DateField(_('event date'))
+    event_time = models.TimeField(_('event time'))
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('cancellation snapshot')
+        verbose_name_plural = _('cancellation snapshots')
+        db_table = 'cancellation_snapshots'
+    
+    def __str__(self):
+        return f"{self.event_title} - {self.created_at}"
+
+
+class CancellationRecipient(models.Model):
+    """
+    A participant still to be told about a cancellation.
+    """
+    snapshot = models.ForeignKey(
+        CancellationSnapshot,
+        on_delete=models.CASCADE,
+        related_name='recipients',
+        verbose_name=_('snapshot')
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('user')
+    )
+    
+    class Meta:
+        verbose_name = _('cancellation recipient')
+        verbose_name_plural = _('cancellation recipients')
+        db_table = 'cancellation_recipients'
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.snapshot_id}"
@@ -0,0 +1,154 @@
+"""
+Transactional outbox for notification tasks.
+
+Request handlers call `enqueue()` inside their transaction instead of
+`task.delay()`. The row commits or rolls back together with the change that
+caused it, and `relay()` later hands committed rows to the task queue in
+batches. A row is deleted only after its dispatch succeeded, so delivery is
+at-least-once: tasks must tolerate running twice.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from event_management.db.transactions import immediate
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(task, *args, delay=0):
+    """
+    Record a task dispatch in the current transaction.
+
+    `task` is a Celery task or its dotted name; `args` must be JSON
+    serializable. A message with a `delay` (in seconds) is left to the
+    relay loop once it becomes available.
+    """
+    task_name = task if isinstance(task, str) else task.name
+    message = OutboxMessage.objects.create(
+        task_name=task_name,
+        args=list(args),
+        available_at=timezone.now() + timezone.timedelta(seconds=delay)
+    )
+
+    if settings.OUTBOX_RELAY_ON_COMMIT and not delay:
+        message_id = message.id
+        transaction.on_commit(lambda: _relay_after_commit(message_id))
+    return message
+
+
+def _relay_after_commit(message_id):
+    """Relay a freshly committed message without waiting for the relay loop."""
+    if settings.OUTBOX_RELAY_IN_BACKGROUND and settings.NOTIFICATIONS_TASK_BACKEND != 'background':
+        # Eager Celery would run the task, and send its email, inside the
+        # request's response path.
+        from .executor import get_executor
+        get_executor().submit(_relay_message, message_id)
+        return
+    _relay_message(message_id)
+
+
+def _relay_message(message_id):
+    try:
+        relay(ids=[message_id])
+    except Exception as e:
+        # The message stays in the outbox for the relay loop.
+        logger.error(f'Error relaying outbox message {message_id}: {str(e)}')
+
+
+def dispatch(message):
+    """
+    Hand a message's task to the configured backend.
+
+    Returns True once the message can be removed from the outbox. With the
+    in-process background executor the message is only leased; the executor
+    removes it after the task has run, so a crash before then redelivers it.
+    """
+    if settings.NOTIFICATIONS_TASK_BACKEND == 'background':
+        from .executor import get_executor
+        get_executor().submit(_run_message, message.id, message.task_name, message.args)
+        return False
+
+    task = import_string(message.task_name)
+    task.apply_async(args=message.args)
+    return True
+
+
+def _run_message(message_id, task_name, args):
+    """Run an outbox message's task in-process, then drop the message."""
+    task = import_string(task_name)
+    task(*args)
+    OutboxMessage.objects.filter(id=message_id).delete()
+
+
+def _retry_delay(attempts):
+    """Exponential backoff for messages whose dispatch failed."""
+    delay = settings.OUTBOX_RETRY_DELAY_SECONDS * (2 ** (attempts - 1))
+    return timezone.timedelta(seconds=min(delay, settings.OUTBOX_MAX_RETRY_DELAY_SECONDS))
+
+
+def _claim(batch_size, ids=None):
+    """
+    Lease up to `batch_size` due messages to this relay.
+
+    The lease pushes `available_at` out by OUTBOX_LEASE_SECONDS and commits
+    straight away, so other relays skip the rows without a lock being held
+    while they are dispatched. A relay that dies mid-batch leaves its
+    messages to be picked up again once the lease runs out.
+    """
+    with immediate():
+        queryset = OutboxMessage.objects.filter(available_at__lte=timezone.now())
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+        batch = list(queryset.select_for_update(skip_locked=True).order_by('id')[:batch_size])
+        OutboxMessage.objects.filter(id__in=[message.id for message in batch]).update(
+            available_at=timezone.now() + timezone.timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        )
+    return batch
+
+
+def relay(batch_size=None, ids=None):
+    """
+    Dispatch committed outbox messages in batches.
+
+    Each batch is claimed in its own short transaction, with SKIP LOCKED
+    where the database supports it so several relays can drain the outbox
+    concurrently, and dispatched after that commits: eager tasks, including
+    their SMTP sends, never run while the rows are locked. Call it outside
+    a transaction. Returns the number of messages dispatched.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    dispatched = 0
+
+    while True:
+        batch = _claim(batch_size, ids)
+
+        sent = []
+        failed = []
+        for message in batch:
+            try:
+                # Messages handed to the background executor stay leased
+                # until their task has run.
+                if dispatch(message):
+                    sent.append(message.id)
+            except Exception as e:
+                logger.error(f'Error dispatching outbox message {message.id} ({message.task_name}): {str(e)}')
+                message.attempts += 1
+                message.available_at = timezone.now() + _retry_delay(message.attempts)
+                failed.append(message)
+
+        OutboxMessage.objects.filter(id__in=sent).delete()
+        if failed:
+            OutboxMessage.objects.bulk_update(failed, ['attempts', 'available_at'])
+
+        dispatched += len(batch) - len(failed)
+        if len(batch) < batch_size:
+            break
+
+    return dispatched
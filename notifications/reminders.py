@@ -0,0 +1,120 @@
+"""
+Scheduling of event reminders.
+
+Each active event gets one `EventReminder` row per configured offset. Rows
+that fall due within the horizon are queued as Celery ETA tasks so the
+reminder goes out on time; rows further out stay in the database until the
+periodic sweep picks them up. A queued task only delivers if its reminder row
+still carries its task id, so rescheduling or deleting the event cancels it
+even when the broker-side revoke is lost.
+"""
+
+import logging
+import uuid
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EventReminder
+
+logger = logging.getLogger(__name__)
+
+
+def _horizon():
+    """Return the latest reminder time that should be queued now."""
+    return timezone.now() + timezone.timedelta(minutes=settings.EVENT_REMINDER_HORIZON_MINUTES)
+
+
+def revoke_reminder_tasks(task_ids):
+    """Best-effort revoke of queued reminder tasks."""
+    task_ids = [task_id for task_id in task_ids if task_id]
+    if not task_ids or current_app.conf.task_always_eager:
+        return
+    try:
+        current_app.control.revoke(task_ids)
+    except Exception as e:
+        # The task re-checks its reminder row before sending, so a lost
+        # revoke only costs a no-op task run.
+        logger.warning(f'Could not revoke reminder tasks {task_ids}: {str(e)}')
+
+
+def queue_reminder(reminder):
+    """Queue an ETA task for a reminder once the current transaction commits."""
+    if current_app.conf.task_always_eager:
+        # Eager mode would run the task immediately; leave the reminder for
+        # the sweep, which delivers it once it is due.
+        return
+    from .tasks import send_scheduled_reminder
+
+    reminder.task_id = uuid.uuid4().hex
+    reminder.queued_at = timezone.now()
+    reminder.save(update_fields=['task_id', 'queued_at'])
+
+    reminder_id, task_id, eta = reminder.id, reminder.task_id, reminder.remind_at
+    transaction.on_commit(
+        lambda: send_scheduled_reminder.apply_async(args=[reminder_id], task_id=task_id, eta=eta)
+    )
+
+
+def sync_event_reminders(event):
+    """
+    Bring an event's pending reminders in line with its start time and status.
+    """
+    reminders = {
+        reminder.offset_minutes: reminder
+        for reminder in EventReminder.objects.filter(event=event)
+    }
+    pending = [reminder for reminder in reminders.values() if reminder.sent_at is None]
+
+    if not event.is_active or event.deleted_at is not None:
+        if pending:
+            revoke_reminder_tasks([reminder.task_id for reminder in pending])
+            EventReminder.objects.filter(id__in=[reminder.id for reminder in pending]).delete()
+        return
+
+    now = timezone.now()
+    horizon = _horizon()
+    starts_at = event.starts_at
+    stale = []
+
+    for offset in settings.EVENT_REMINDER_OFFSETS:
+        remind_at = starts_at - timezone.timedelta(minutes=offset)
+        reminder = reminders.pop(offset, None)
+
+        if reminder is not None and reminder.remind_at == remind_at:
+            if reminder.sent_at is None and reminder.queued_at is None and remind_at <= horizon:
+                queue_reminder(reminder)
+            continue
+
+        if remind_at <= now:
+            # Too late for this offset; never send a reminder after the fact.
+            if reminder is not None and reminder.sent_at is None:
+                stale.append(reminder)
+            continue
+
+        if reminder is None:
+            reminder = EventReminder.objects.create(
+                event=event,
+                offset_minutes=offset,
+                remind_at=remind_at
+            )
+        else:
+            # The event moved: re-arm the reminder for the new start time,
+            # including offsets that were already sent for the old one.
+            revoke_reminder_tasks([reminder.task_id])
+            reminder.remind_at = remind_at
+            reminder.task_id = ''
+            reminder.queued_at = None
+            reminder.sent_at = None
+            reminder.save(update_fields=['remind_at', 'task_id', 'queued_at', 'sent_at'])
+
+        if remind_at <= horizon:
+            queue_reminder(reminder)
+
+    # Offsets that are no longer configured.
+    stale.extend(reminder for reminder in reminders.values() if reminder.sent_at is None)
+    if stale:
+        revoke_reminder_tasks([reminder.task_id for reminder in stale])
+        EventReminder.objects.filter(id__in=[reminder.id for reminder in stale]).delete()
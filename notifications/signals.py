@@ -0,0 +1,39 @@
+"""
+Signal handlers keeping notification state in sync with events.
+"""
+
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from events.models import Event
+from .changes import record_event_changes
+from .models import EventReminder
+from .reminders import sync_event_reminders, revoke_reminder_tasks
+
+
+@receiver(post_save, sender=Event)
+def reschedule_event_reminders(sender, instance, raw=False, **kwargs):
+    """Schedule, move or cancel reminders when an event is saved."""
+    if raw:
+        return
+    sync_event_reminders(instance)
+
+
+@receiver(post_save, sender=Event)
+def notify_event_changes(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """Notify participants when an event's title, date, time or location changes."""
+    if raw or created:
+        return
+    changes = instance.get_tracked_changes(update_fields)
+    if changes:
+        record_event_changes(instance, changes)
+
+
+@receiver(pre_delete, sender=Event)
+def cancel_event_reminders(sender, instance, **kwargs):
+    """Revoke queued reminders of an event about to be deleted."""
+    task_ids = EventReminder.objects.filter(
+        event=instance,
+        sent_at__isnull=True
+    ).exclude(task_id='').values_list('task_id', flat=True)
+    revoke_reminder_tasks(list(task_ids))
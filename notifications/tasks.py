@@ -3,14 +3,20 @@ Celery tasks for notification processing.
 """
 
 import logging
+from itertools import groupby
 from celery import shared_task
-from django.core.mail import send_mail
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.template.loader import render_to_string
+from django.db import transaction
+from django.db.models import F, Q
 
-from .models import Notification
+from . import cancellations, delivery, emails
+from .models import CancellationRecipient, CancellationSnapshot, DigestItem, Notification, EventReminder
 from events.models import Event, EventParticipant
+from users.models import filter_by_preference
+
+User = get_user_model()
 
 logger = logging.getLogger(__name__)
 
@@ -22,39 +28,31 @@ def send_registration_confirmation(participant_id):
     """
     try:
         participant = EventParticipant.objects.select_related('user', 'event').get(id=participant_id)
+        user = participant.user
         
-        # Create notification
-        Notification.objects.create(
-            user=participant.user,
-            notification_type='registration_confirmation',
-            title='Registration Confirmed',
-            message=f'Your registration for "{participant.event.title}" has been confirmed.',
-            event_id=participant.event.id,
-            event_title=participant.event.title
-        )
+        # Create notification. The task is acknowledged late, so a lost
+        # worker's message is redelivered: a (user, event) pair only ever
+        # gets one confirmation.
+        if user.wants('registration_confirmation', 'in_app'):
+            Notification.objects.get_or_create(
+                user=user,
+                notification_type='registration_confirmation',
+                event_id=participant.event.id,
+                defaults={
+                    'title': 'Registration Confirmed',
+                    'message': f'Your registration for "{participant.event.title}" has been confirmed.',
+                    'event_title': participant.event.title,
+                }
+            )
         
         # Send email
-        subject = f'Registration Confirmed - {participant.event.title}'
-        message = f"""
-        Hello {participant.user.first_name},
-        
-        Your registration for "{participant.event.title}" has been confirmed.
-        
-        Event Details:
-        - Date: {participant.event.date}
-        - Time: {participant.event.time}
-        - Location: {participant.event.location}
-        
-        We look forward to seeing you!
-        """
-        
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[participant.user.email],
-            fail_silently=True
-        )
+        if user.wants('registration_confirmation', 'email'):
+            email = emails.render(
+                'registration_confirmation',
+                {'event': participant.event},
+                user
+            )
+            delivery.send_many([email])
         
         logger.info(f'Registration confirmation sent to {participant.user.email}')
         
@@ -65,101 +63,131 @@ def send_registration_confirmation(participant_id):
 
 
 @shared_task
-def send_event_cancellation_notification(event_id):
+def send_event_cancellation_notification(event_id, snapshot_id=None):
     """
     Send event cancellation notification to all participants.
+    
+    Events deleted in the transaction that dispatched this task pass the
+    `CancellationSnapshot` taken before the delete; otherwise the event is
+    snapshotted now. Recipients are streamed from the snapshot in chunks.
     """
     try:
-        event = Event.objects.get(id=event_id)
-        participants = EventParticipant.objects.filter(
-            event=event,
-            is_active=True
-        ).select_related('user')
-        
-        for participant in participants:
-            # Create notification
-            Notification.objects.create(
-                user=participant.user,
-                notification_type='event_cancellation',
-                title='Event Cancelled',
-                message=f'The event "{event.title}" has been cancelled.',
-                event_id=event.id,
-                event_title=event.title
-            )
-            
-            # Send email
-            subject = f'Event Cancelled - {event.title}'
-            message = f"""
-            Hello {participant.user.first_name},
-            
-            We regret to inform you that the event "{event.title}" has been cancelled.
+        if snapshot_id is None:
+            snapshot = cancellations.capture(Event.objects.get(id=event_id))
+        else:
+            snapshot = CancellationSnapshot.objects.get(id=snapshot_id)
+        event_title = snapshot.event_title
+        
+        # Render the email once for the event
+        prepared = emails.prepare('event_cancellation', {'event': {'title': event_title}})
+        # Users who opted out of cancellations altogether are skipped in SQL
+        recipients = filter_by_preference(snapshot.recipients.all(), 'event_cancellation', prefix='user__')
+        sent = 0
+        for chunk in cancellations.iter_recipient_chunks(snapshot, recipients):
+            notifications = []
+            messages = []
+            for recipient in chunk:
+                user = recipient.user
+                if user.wants('event_cancellation', 'in_app'):
+                    notifications.append(Notification(
+                        user=user,
+                        notification_type='event_cancellation',
+                        title='Event Cancelled',
+                        message=f'The event "{event_title}" has been cancelled.',
+                        event_id=snapshot.event_id,
+                        event_title=event_title
+                    ))
+                
+                if user.wants('event_cancellation', 'email'):
+                    messages.append(prepared.for_recipient(user))
             
-            We apologize for any inconvenience this may cause.
-            """
+            # Record the notifications and retire the chunk together
+            with transaction.atomic():
+                Notification.objects.bulk_create(notifications)
+                CancellationRecipient.objects.filter(id__in=[recipient.id for recipient in chunk]).delete()
             
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[participant.user.email],
-                fail_silently=True
-            )
+            # Send emails
+            delivery.send_many(messages)
+            sent += len(chunk)
         
-        logger.info(f'Cancellation notifications sent to {participants.count()} participants')
+        snapshot.delete()
+        logger.info(f'Cancellation notifications sent to {sent} participants')
         
     except Event.DoesNotExist:
         logger.error(f'Event with id {event_id} not found')
+    except CancellationSnapshot.DoesNotExist:
+        logger.error(f'Cancellation snapshot with id {snapshot_id} not found')
     except Exception as e:
         logger.error(f'Error sending cancellation notifications: {str(e)}')
 
 
-@shared_task
-def send_event_update_notification(event_id, update_message):
+def _fan_out_event_update(event_id, update_message):
     """
-    Send event update notification to all participants.
+    Notify all participants of an event about an update.
+    
+    Participants on the daily digest get no email now; the update is queued
+    as a `DigestItem` for their next digest, whatever their in-app preference.
     """
-    try:
-        event = Event.objects.get(id=event_id)
-        participants = EventParticipant.objects.filter(
-            event=event,
-            is_active=True
-        ).select_related('user')
-        
-        for participant in participants:
-            # Create notification
-            Notification.objects.create(
-                user=participant.user,
+    event = Event.objects.get(id=event_id)
+    participants = filter_by_preference(
+        EventParticipant.objects.filter(event=event, is_active=True),
+        'event_update',
+        prefix='user__'
+    ).select_related('user')
+    
+    # Render the email once for the event
+    prepared = emails.prepare('event_update', {'event': event, 'update_message': update_message})
+    message = f'Update for "{event.title}": {update_message}'
+    notifications = []
+    digest_items = []
+    messages = []
+    for participant in participants:
+        user = participant.user
+        if user.wants('event_update', 'in_app'):
+            notifications.append(Notification(
+                user=user,
                 notification_type='event_update',
                 title='Event Updated',
-                message=f'Update for "{event.title}": {update_message}',
+                message=message,
                 event_id=event.id,
                 event_title=event.title
-            )
-            
-            # Send email
-            subject = f'Event Update - {event.title}'
-            message = f"""
-            Hello {participant.user.first_name},
-            
-            There has been an update to the event "{event.title}":
-            
-            {update_message}
-            
-            Event Details:
-            - Date: {event.date}
-            - Time: {event.time}
-            - Location: {event.location}
-            """
-            
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[participant.user.email],
-                fail_silently=True
-            )
+            ))
         
-        logger.info(f'Update notifications sent to {participants.count()} participants')
+        if user.wants('event_update', 'email'):
+            if user.email_digest:
+                digest_items.append(DigestItem(
+                    user=user,
+                    event_id=event.id,
+                    event_title=event.title,
+                    message=message
+                ))
+            else:
+                messages.append(prepared.for_recipient(user))
+    
+    Notification.objects.bulk_create(notifications)
+    DigestItem.objects.bulk_create(digest_items)
+    
+    # Send emails
+    delivery.send_many(messages)
+    return len(notifications)
+
+
+@shared_task
+def send_event_update_notification(event_id, update_message):
+    """
+    Send event update notification to all participants.
+    
+    Updates are buffered per event for NOTIFICATION_COALESCE_WINDOW_SECONDS
+    and sent as one merged notification when the window closes.
+    """
+    try:
+        if settings.NOTIFICATION_COALESCE_WINDOW_SECONDS:
+            from .digests import buffer_event_update
+            buffer_event_update(event_id, update_message)
+            return
+        
+        count = _fan_out_event_update(event_id, update_message)
+        logger.info(f'Update notifications sent to {count} participants')
         
     except Event.DoesNotExist:
         logger.error(f'Event with id {event_id} not found')
@@ -168,58 +196,203 @@ def send_event_update_notification(event_id, update_message):
 
 
 @shared_task
-def send_event_reminders():
+def flush_event_updates(event_id=None):
+    """
+    Send merged update notifications for closed coalescing windows.
+    
+    Flushes one event when scheduled for its window, or every due window
+    when run periodically.
+    """
+    from .digests import merge_messages, take_due_updates
+    from .models import PendingEventUpdate
+    
+    if event_id is None:
+        event_ids = list(PendingEventUpdate.objects.filter(
+            flush_at__lte=timezone.now()
+        ).values_list('event_id', flat=True))
+    else:
+        event_ids = [event_id]
+    
+    for event_id in event_ids:
+        try:
+            messages = take_due_updates(event_id)
+            if messages is None:
+                continue
+            count = _fan_out_event_update(event_id, merge_messages(messages))
+            logger.info(f'Update notifications ({len(messages)} updates) sent to {count} participants')
+        
+        except Event.DoesNotExist:
+            logger.error(f'Event with id {event_id} not found')
+        except Exception as e:
+            logger.error(f'Error sending update notifications: {str(e)}')
+
+
+@shared_task
+def send_daily_digests():
     """
-    Send reminders for events happening tomorrow.
+    Email each digest subscriber the event updates since their last digest.
     """
     try:
-        tomorrow = timezone.now().date() + timezone.timedelta(days=1)
-        events = Event.objects.filter(
-            date=tomorrow,
+        now = timezone.now()
+        items = DigestItem.objects.filter(created_at__lte=now)
+        queued = filter_by_preference(
+            items.filter(user__email_digest=True),
+            'event_update',
+            'email',
+            prefix='user__'
+        ).select_related('user').order_by('user_id', 'created_at')
+        
+        messages = [
+            emails.render('daily_digest', {'notifications': list(group)}, user)
+            for user, group in groupby(queued, key=lambda item: item.user)
+        ]
+        
+        delivery.send_many(messages)
+        # Items of users who left the digest since are dropped as well.
+        items.delete()
+        User.objects.filter(email_digest=True).update(last_digest_at=now)
+        logger.info(f'Sent {len(messages)} daily digests')
+        
+    except Exception as e:
+        logger.error(f'Error sending daily digests: {str(e)}')
+
+
+def _format_offset(minutes):
+    """Return a human readable label for a reminder offset."""
+    if minutes % 60 == 0:
+        hours = minutes // 60
+        return f'{hours} hour{"s" if hours != 1 else ""}'
+    return f'{minutes} minute{"s" if minutes != 1 else ""}'
+
+
+def _deliver_reminders(reminder_ids):
+    """
+    Deliver claimed reminders to the active participants of their events.
+    
+    Participants of every claimed reminder are fetched with one query that
+    joins `event_reminders` to `event_participants` and skips users who
+    opted out of reminders.
+    """
+    participants = filter_by_preference(
+        EventParticipant.objects.filter(
+            event__reminders__id__in=reminder_ids,
             is_active=True
+        ),
+        'reminder',
+        prefix='user__'
+    ).select_related('user', 'event').annotate(
+        reminder_offset=F('event__reminders__offset_minutes')
+    )
+    
+    notifications = []
+    messages = []
+    prepared = {}
+    for participant in participants:
+        event = participant.event
+        user = participant.user
+        when = _format_offset(participant.reminder_offset)
+        if user.wants('reminder', 'in_app'):
+            notifications.append(Notification(
+                user=user,
+                notification_type='reminder',
+                title='Event Reminder',
+                message=f'Reminder: "{event.title}" starts in {when}!',
+                event_id=event.id,
+                event_title=event.title
+            ))
+        
+        if not user.wants('reminder', 'email'):
+            continue
+        # Render each (event, offset) email once
+        key = (event.id, participant.reminder_offset)
+        if key not in prepared:
+            prepared[key] = emails.prepare('event_reminder', {'event': event, 'starts_in': when})
+        messages.append(prepared[key].for_recipient(user))
+    
+    Notification.objects.bulk_create(notifications)
+    delivery.send_many(messages)
+    return len(notifications)
+
+
+@shared_task(bind=True)
+def send_scheduled_reminder(self, reminder_id):
+    """
+    Send a single reminder queued as an ETA task.
+    
+    The reminder is claimed only if it still carries this task's id, so tasks
+    made obsolete by a reschedule, deactivation or deletion do nothing.
+    """
+    try:
+        claimed = EventReminder.objects.filter(
+            id=reminder_id,
+            task_id=self.request.id,
+            sent_at__isnull=True,
+            event__is_active=True,
+            event__deleted_at__isnull=True
+        ).update(sent_at=timezone.now())
+        
+        if not claimed:
+            logger.info(f'Reminder {reminder_id} is no longer scheduled for task {self.request.id}')
+            return
+        
+        count = _deliver_reminders([reminder_id])
+        logger.info(f'Reminder {reminder_id} sent to {count} participants')
+        
+    except Exception as e:
+        logger.error(f'Error sending reminder {reminder_id}: {str(e)}')
+
+
+@shared_task
+def send_event_reminders():
+    """
+    Periodic reminder sweep.
+    
+    Delivers reminders that are due but were never queued (or whose ETA task
+    is overdue), and queues ETA tasks for reminders entering the horizon.
+    """
+    try:
+        from .reminders import queue_reminder
+        
+        now = timezone.now()
+        grace = now - timezone.timedelta(minutes=settings.EVENT_REMINDER_GRACE_MINUTES)
+        due = EventReminder.objects.filter(
+            sent_at__isnull=True,
+            remind_at__lte=now,
+            event__is_active=True,
+            event__deleted_at__isnull=True
+        ).filter(
+            Q(queued_at__isnull=True) | Q(remind_at__lte=grace)
         )
+        reminder_ids = list(due.values_list('id', flat=True))
         
-        for event in events:
-            participants = EventParticipant.objects.filter(
-                event=event,
-                is_active=True
-            ).select_related('user')
-            
-            for participant in participants:
-                # Create notification
-                Notification.objects.create(
-                    user=participant.user,
-                    notification_type='reminder',
-                    title='Event Reminder',
-                    message=f'Reminder: "{event.title}" is tomorrow!',
-                    event_id=event.id,
-                    event_title=event.title
-                )
-                
-                # Send email
-                subject = f'Event Reminder - {event.title}'
-                message = f"""
-                Hello {participant.user.first_name},
-                
-                This is a reminder that "{event.title}" is tomorrow!
-                
-                Event Details:
-                - Date: {event.date}
-                - Time: {event.time}
-                - Location: {event.location}
-                
-                We look forward to seeing you!
-                """
-                
-                send_mail(
-                    subject=subject,
-                    message=message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[participant.user.email],
-                    fail_silently=True
-                )
+        if reminder_ids:
+            # Claim before delivering so a late ETA task cannot send twice;
+            # rows stamped with this sweep's timestamp are the ones we own.
+            EventReminder.objects.filter(
+                id__in=reminder_ids,
+                sent_at__isnull=True
+            ).update(sent_at=now)
+            reminder_ids = list(EventReminder.objects.filter(
+                id__in=reminder_ids,
+                sent_at=now
+            ).values_list('id', flat=True))
+            count = _deliver_reminders(reminder_ids)
+            logger.info(f'Sent {len(reminder_ids)} due reminders to {count} participants')
+        
+        upcoming = EventReminder.objects.filter(
+            sent_at__isnull=True,
+            queued_at__isnull=True,
+            remind_at__gt=now,
+            remind_at__lte=now + timezone.timedelta(minutes=settings.EVENT_REMINDER_HORIZON_MINUTES),
+            event__is_active=True,
+            event__deleted_at__isnull=True
+        )
+        queued = 0
+        for reminder in upcoming:
+            queue_reminder(reminder)
+            queued += 1
         
-        logger.info(f'Reminders sent for {events.count()} events')
+        logger.info(f'Queued {queued} upcoming reminders')
         
     except Exception as e:
         logger.error(f'Error sending event reminders: {str(e)}')
@@ -240,4 +413,28 @@ def cleanup_old_notifications():
         logger.info(f'Cleaned up {deleted_count} old notifications')
         
     except Exception as e:
-        logger.error(f'Error cleaning up old notifications: {str(e)}') 
\ No newline at end of file
+        logger.error(f'Error cleaning up old notifications: {str(e)}') 
+
+
+@shared_task
+def relay_outbox():
+    """
+    Relay committed outbox messages to the task queue.
+    """
+    try:
+        from .outbox import relay
+        
+        count = relay()
+        if count:
+            logger.info(f'Relayed {count} outbox messages')
+        
+    except Exception as e:
+        logger.error(f'Error relaying outbox messages: {str(e)}')
+
+
+@shared_task
+def deliver_email(email, attempts, queue=None):
+    """
+    Retry delivery of an email that failed `attempts` times.
+    """
+    delivery.send_many([email], attempts=attempts, queue=queue)
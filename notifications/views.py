@@ -8,11 +8,13 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 
+from event_management.routers import ReplicaReadMixin
+
 from .models import Notification
 from .serializers import NotificationSerializer, NotificationUpdateSerializer
 
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for Notification operations.
     """
@@ -33,6 +35,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
             return NotificationUpdateSerializer
         return NotificationSerializer
     
+    def perform_create(self, serializer):
+        """Create the notification for the current user."""
+        serializer.save(user=self.request.user)
+    
     def update(self, request, *args, **kwargs):
         """Update notification with read status handling."""
         notification = self.get_object()
@@ -59,11 +65,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def mark_all_as_read(self, request):
         """Mark all notifications as read for current user."""
-        notifications = self.get_queryset().filter(is_read=False)
-        count = notifications.count()
-        
-        for notification in notifications:
-            notification.mark_as_read()
+        count = self.get_queryset().filter(is_read=False).update(
+            is_read=True,
+            read_at=timezone.now()
+        )
         
         return Response({
             'message': f'Marked {count} notifications as read'
@@ -0,0 +1,67 @@
+"""
+Query budgets for API endpoints.
+
+A test case mixing in `QueryBudgetMixin` declares the most queries each
+endpoint may run in `query_budgets`, keyed by (method, URL name), and makes
+its requests through `request_within_budget()`. `assertBudgetsCover()` fails
+when a router in the given URL modules serves an endpoint without a budget,
+so new routes cannot go unchecked.
+"""
+
+from contextlib import contextmanager
+
+from django.urls import reverse
+
+from event_management.middleware import QueryStats
+
+
+def router_endpoints(urls_module):
+    """Return the (method, URL name) pairs served by a module's `router`."""
+    router = urls_module.router
+    endpoints = set()
+    for prefix, viewset, basename in router.registry:
+        for route in router.get_routes(viewset):
+            name = route.name.format(basename=basename)
+            for method, action in route.mapping.items():
+                if hasattr(viewset, action):
+                    endpoints.add((method, name))
+    return endpoints
+
+
+class QueryBudgetMixin:
+    """
+    Assertions on the number of SQL queries endpoints run.
+    """
+    query_budgets = {}
+
+    @contextmanager
+    def assertMaxQueries(self, budget, label='Block'):
+        """Fail if the block runs more than `budget` queries on any database."""
+        stats = QueryStats()
+        with stats.record():
+            yield stats
+        if stats.count > budget:
+            duplicates = '\n'.join(
+                f'  {count}x {shape}'
+                for shape, count in sorted(stats.duplicates.items(), key=lambda item: -item[1])
+            )
+            self.fail(
+                f'{label} ran {stats.count} queries, budget is {budget}.'
+                + (f' Repeated queries:\n{duplicates}' if duplicates else '')
+            )
+
+    def request_within_budget(self, method, url_name, args=None, data=None):
+        """Request an endpoint with `self.client`, asserting its budget."""
+        budget = self.query_budgets[(method, url_name)]
+        url = reverse(url_name, args=args)
+        with self.assertMaxQueries(budget, label=f'{method.upper()} {url_name}'):
+            response = getattr(self.client, method)(url, data, format='json')
+        return response
+
+    def assertBudgetsCover(self, *urls_modules):
+        """Fail if an endpoint of the modules' routers has no budget."""
+        endpoints = set()
+        for urls_module in urls_modules:
+            endpoints |= router_endpoints(urls_module)
+        missing = sorted(endpoints - set(self.query_budgets))
+        self.assertFalse(missing, f'Endpoints without a query budget: {missing}')
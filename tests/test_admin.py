@@ -0,0 +1,226 @@
+"""
+Tests for the admin changelists.
+"""
+
+from datetime import date, time, timedelta
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from events.models import Event, EventParticipant
+
+User = get_user_model()
+
+
+class AdminChangelistQueryTest(TestCase):
+    """Test cases for constant query counts in admin changelists."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='adminpass123'
+        )
+        self.client.force_login(self.admin)
+        self.users = [
+            User.objects.create_user(
+                username=f'user{index}',
+                email=f'user{index}@example.com',
+                first_name='User',
+                last_name=str(index),
+                password='testpass123'
+            )
+            for index in range(3)
+        ]
+    
+    def _create_events(self, count):
+        """Create events with a few participants each."""
+        for index in range(count):
+            event = Event.objects.create(
+                title=f'Event {index}',
+                description='A test event description',
+                date=date.today() + timedelta(days=7 + index),
+                time=time(14, 0),
+                location='Test Location',
+                created_by=self.users[index % len(self.users)]
+            )
+            for user in self.users[:index % len(self.users) + 1]:
+                EventParticipant.objects.create(event=event, user=user)
+    
+    def _count_queries(self, url):
+        """Return the number of queries needed to render `url`."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+    
+    def test_event_changelist_query_count_is_constant(self):
+        """Test that the event changelist does not query per row."""
+        url = reverse('admin:events_event_changelist')
+        self._create_events(2)
+        few = self._count_queries(url)
+        self._create_events(10)
+        many = self._count_queries(url)
+        
+        self.assertEqual(few, many)
+    
+    def test_participant_changelist_query_count_is_constant(self):
+        """Test that the participant changelist does not query per row."""
+        url = reverse('admin:events_eventparticipant_changelist')
+        self._create_events(2)
+        few = self._count_queries(url)
+        self._create_events(10)
+        many = self._count_queries(url)
+        
+        self.assertEqual(few, many)
+    
+    def test_event_changelist_sorts_by_participant_count(self):
+        """Test that the annotated participant column is sortable."""
+        self._create_events(3)
+        url = reverse('admin:events_event_changelist')
+        column = self.client.get(url).context['cl'].list_display.index('participant_count')
+        
+        for order, reverse_order in ((f'{column}', False), (f'-{column}', True)):
+            response = self.client.get(url, {'o': order})
+            counts = [event.active_participant_count for event in response.context['cl'].result_list]
+            self.assertEqual(counts, sorted(counts, reverse=reverse_order))
+
+
+class AdminAutocompleteTest(TestCase):
+    """Test cases for autocomplete widgets and estimated counts."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='adminpass123'
+        )
+        self.client.force_login(self.admin)
+        self.event = Event.objects.create(
+            title='Python Summit',
+            description='A conference about Django',
+            date=date.today() + timedelta(days=7),
+            time=time(14, 0),
+            location='Test Location',
+            created_by=self.admin
+        )
+    
+    def test_change_form_uses_autocomplete(self):
+        """Test that foreign keys are not rendered as full selects."""
+        response = self.client.get(reverse('admin:events_eventparticipant_add'))
+        
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, f'<option value="{self.event.id}">')
+    
+    def test_autocomplete_searches_by_prefix(self):
+        """Test that autocomplete matches title prefixes only."""
+        url = reverse('admin:autocomplete')
+        params = {
+            'app_label': 'events',
+            'model_name': 'eventparticipant',
+            'field_name': 'event',
+        }
+        
+        response = self.client.get(url, {**params, 'term': 'pyth'})
+        self.assertEqual([result['id'] for result in response.json()['results']], [str(self.event.id)])
+        
+        response = self.client.get(url, {**params, 'term': 'django'})
+        self.assertEqual(response.json()['results'], [])
+        
+        response = self.client.get(url, {**params, 'term': 'PYTHON s'})
+        self.assertEqual([result['id'] for result in response.json()['results']], [str(self.event.id)])
+    
+    def test_autocomplete_non_ascii_prefix(self):
+        """Test that non-ASCII terms fall back to istartswith."""
+        event = Event.objects.create(
+            title='école d\'été',
+            description='Summer school',
+            date=date.today() + timedelta(days=7),
+            time=time(9, 0),
+            location='Test Location',
+            created_by=self.admin
+        )
+        
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'events',
+            'model_name': 'eventparticipant',
+            'field_name': 'event',
+            'term': 'éco',
+        })
+        self.assertEqual([result['id'] for result in response.json()['results']], [str(event.id)])
+    
+    def test_autocomplete_without_code_point_collation(self):
+        """Test that databases with a linguistic collation search with istartswith."""
+        from unittest import mock
+        
+        with mock.patch('event_management.admin.sorts_by_code_point', return_value=False), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:autocomplete'), {
+                'app_label': 'events',
+                'model_name': 'eventparticipant',
+                'field_name': 'event',
+                'term': 'pyth',
+            })
+        
+        self.assertEqual([result['id'] for result in response.json()['results']], [str(self.event.id)])
+        self.assertFalse(any('UPPER("events"."title") >=' in query['sql'] for query in queries))
+    
+    @skipUnless(connection.vendor == 'sqlite', 'Plans are asserted in the SQLite EXPLAIN QUERY PLAN format')
+    def test_autocomplete_prefix_search_uses_index(self):
+        """Test that autocomplete prefix searches are served by an index."""
+        from event_management.db.slow_queries import explain
+        queries = []
+        
+        def collect(execute, sql, sql_params, many, context):
+            queries.append((sql, sql_params))
+            return execute(sql, sql_params, many, context)
+        
+        searches = [
+            ('events', 'eventparticipant', 'event', 'pyth', 'events_title_upper_idx'),
+            ('events', 'event', 'created_by', 'ADM', 'users_email_upper_idx'),
+        ]
+        for app_label, model_name, field_name, term, index in searches:
+            queries.clear()
+            with connection.execute_wrapper(collect):
+                response = self.client.get(reverse('admin:autocomplete'), {
+                    'app_label': app_label,
+                    'model_name': model_name,
+                    'field_name': field_name,
+                    'term': term,
+                })
+            self.assertEqual(len(response.json()['results']), 1)
+            
+            plans = [explain(connection, sql, sql_params) for sql, sql_params in queries if 'UPPER' in sql]
+            self.assertTrue(plans)
+            for plan in plans:
+                self.assertTrue(any(index in line for line in plan), plan)
+    
+    def test_estimated_count_skips_count_query(self):
+        """Test that large unfiltered tables are counted from statistics."""
+        from unittest import mock
+        from django.test import override_settings
+        from event_management.pagination import EstimatedCountPaginator
+        
+        queryset = EventParticipant.objects.all()
+        with override_settings(ESTIMATED_COUNT_THRESHOLD=1000), \
+                mock.patch('event_management.pagination.estimate_row_count', return_value=50000):
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 50000)
+            self.assertEqual(EstimatedCountPaginator(queryset.filter(is_active=False), 100).count, 0)
+        
+        with override_settings(ESTIMATED_COUNT_THRESHOLD=1000), \
+                mock.patch('event_management.pagination.estimate_row_count', return_value=10):
+            self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 0)
+    
+    def test_sqlite_statistics_estimate(self):
+        """Test reading the row estimate ANALYZE stores in sqlite_stat1."""
+        from event_management.pagination import estimate_row_count
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        
+        self.assertEqual(estimate_row_count(Event), 1)
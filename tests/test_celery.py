@@ -0,0 +1,93 @@
+"""
+Tests for Celery queue routing.
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from event_management.celery import (
+    BULK_QUEUE, PRIORITY_DEFAULT, PRIORITY_HIGH, PRIORITY_LOW, TASK_ROUTES,
+    TRANSACTIONAL_QUEUE, app
+)
+
+User = get_user_model()
+
+# Task: (queue, priority, acks_late)
+EXPECTED_ROUTES = {
+    'notifications.tasks.send_registration_confirmation': (TRANSACTIONAL_QUEUE, PRIORITY_HIGH, True),
+    'notifications.tasks.send_scheduled_reminder': (TRANSACTIONAL_QUEUE, PRIORITY_DEFAULT, True),
+    'notifications.tasks.relay_outbox': (TRANSACTIONAL_QUEUE, PRIORITY_DEFAULT, True),
+    'notifications.tasks.deliver_email': (TRANSACTIONAL_QUEUE, PRIORITY_LOW, True),
+    'notifications.tasks.send_event_cancellation_notification': (BULK_QUEUE, PRIORITY_HIGH, False),
+    'notifications.tasks.send_event_update_notification': (BULK_QUEUE, PRIORITY_DEFAULT, False),
+    'notifications.tasks.flush_event_updates': (BULK_QUEUE, PRIORITY_DEFAULT, False),
+    'notifications.tasks.send_daily_digests': (BULK_QUEUE, PRIORITY_LOW, False),
+    'notifications.tasks.send_event_reminders': (BULK_QUEUE, PRIORITY_DEFAULT, False),
+    'notifications.tasks.cleanup_old_notifications': (BULK_QUEUE, PRIORITY_LOW, False),
+    'events.tasks.purge_deleted_event': (BULK_QUEUE, PRIORITY_LOW, False),
+    'events.tasks.purge_deleted_events': (BULK_QUEUE, PRIORITY_LOW, False),
+    'events.tasks.archive_events': (BULK_QUEUE, PRIORITY_LOW, False),
+}
+
+
+class TaskRoutingTest(TestCase):
+    """Test cases for task queues, priorities and acknowledgement."""
+    
+    def setUp(self):
+        """Load the task modules."""
+        app.loader.import_default_modules()
+    
+    def test_every_project_task_is_routed(self):
+        """Test that no project task falls through to the default queue unplanned."""
+        tasks = {name for name in app.tasks if name.startswith(('notifications.', 'events.'))}
+        
+        self.assertEqual(tasks, set(EXPECTED_ROUTES))
+        self.assertEqual(set(TASK_ROUTES), set(EXPECTED_ROUTES))
+    
+    def test_tasks_resolve_to_queue_and_priority(self):
+        """Test that the router sends each task to its queue with its priority."""
+        for name, (queue, priority, _) in EXPECTED_ROUTES.items():
+            with self.subTest(task=name):
+                route = app.amqp.router.route({}, name)
+                self.assertEqual(route['queue'].name, queue)
+                self.assertEqual(route['priority'], priority)
+    
+    def test_transactional_tasks_are_acknowledged_late(self):
+        """Test that only transactional tasks are acknowledged after they run."""
+        for name, (_, _, acks_late) in EXPECTED_ROUTES.items():
+            with self.subTest(task=name):
+                self.assertIs(app.tasks[name].acks_late, acks_late)
+
+
+class RedeliveryTest(TestCase):
+    """Test cases for running late-acknowledged tasks twice."""
+    
+    def test_registration_confirmation_is_idempotent(self):
+        """Test that a redelivered confirmation does not duplicate the notification."""
+        from events.models import Event, EventParticipant
+        from notifications.models import Notification
+        from notifications.tasks import send_registration_confirmation
+        user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        event = Event.objects.create(
+            title='Test Event',
+            description='A test event description',
+            date=timezone.now().date() + timezone.timedelta(days=7),
+            time=timezone.now().time(),
+            location='Test Location',
+            created_by=user
+        )
+        participant = EventParticipant.objects.create(event=event, user=user)
+        
+        send_registration_confirmation(participant.id)
+        send_registration_confirmation(participant.id)
+        
+        self.assertEqual(Notification.objects.filter(
+            user=user,
+            notification_type='registration_confirmation',
+            event_id=event.id
+        ).count(), 1)
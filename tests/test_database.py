@@ -0,0 +1,195 @@
+"""
+Tests for database connection management.
+"""
+
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from event_management.db import stats
+
+try:
+    from event_management.db.postgresql import base as pooled
+except ImproperlyConfigured:
+    # psycopg is not installed
+    pooled = None
+
+
+class ConnectionSettingsTest(TestCase):
+    """Test cases for persistent connection settings."""
+    
+    def test_connections_are_persistent(self):
+        """Test that every database uses the configured connection lifetime."""
+        for connection in connections.all():
+            self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], settings.DB_CONN_MAX_AGE)
+            self.assertEqual(connection.settings_dict['CONN_HEALTH_CHECKS'], settings.DB_CONN_HEALTH_CHECKS)
+
+
+class ConnectionStatsTest(TestCase):
+    """Test cases for connection open and reuse counters."""
+    
+    def setUp(self):
+        """Reset the counters."""
+        stats.reset()
+    
+    def test_request_reusing_connection_is_counted(self):
+        """Test that requests starting with an open connection count as reuse."""
+        self.client.get(reverse('health_check'))
+        response = self.client.get(reverse('health_check'))
+        
+        self.assertGreaterEqual(
+            response.json()['database_connections']['default']['reused'],
+            1
+        )
+    
+    def test_new_connection_is_counted(self):
+        """Test that opening a connection increments the opened counter."""
+        from django.db.backends.signals import connection_created
+        connection_created.send(sender=None, connection=connections['default'])
+        
+        self.assertEqual(stats.snapshot()['default']['opened'], 1)
+
+
+class SQLiteProfileTest(TransactionTestCase):
+    """Test cases for the tuned SQLite backend."""
+    
+    def test_pragmas_are_applied(self):
+        """Test that new connections get the performance profile."""
+        with connections['default'].cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_BUSY_TIMEOUT_MS)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -settings.SQLITE_CACHE_SIZE_KB)
+    
+    def test_write_transactions_begin_immediate(self):
+        """Test that immediate() blocks take the write lock up front."""
+        from django.test.utils import CaptureQueriesContext
+        from event_management.db.transactions import immediate
+        with CaptureQueriesContext(connections['default']) as queries:
+            with immediate():
+                with immediate():
+                    pass
+        
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+        self.assertFalse(connections['default'].begin_immediate)
+    
+    def test_other_transactions_begin_deferred(self):
+        """Test that plain atomic blocks do not take the write lock."""
+        from django.db import transaction
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connections['default']) as queries:
+            with transaction.atomic():
+                pass
+        
+        self.assertEqual(queries[0]['sql'], 'BEGIN')
+
+
+@skipIf(pooled is None, 'psycopg is not installed')
+@override_settings(DB_POOL_SIZE=2, DB_CONN_HEALTH_CHECKS=True)
+class PooledPostgresBackendTest(TestCase):
+    """Test cases for the pooled PostgreSQL backend with mocked connections."""
+    
+    alias = 'pooled'
+    
+    def setUp(self):
+        """Start from an empty pool and counters."""
+        pooled._pools.pop(self.alias, None)
+        self.addCleanup(pooled._pools.pop, self.alias, None)
+        stats.reset()
+        self.wrapper = pooled.DatabaseWrapper({
+            'ENGINE': 'event_management.db.postgresql',
+            'NAME': 'events',
+            'USER': '',
+            'PASSWORD': '',
+            'HOST': '',
+            'PORT': '',
+            'OPTIONS': {},
+            'TIME_ZONE': None,
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': True,
+            'AUTOCOMMIT': True,
+            'ATOMIC_REQUESTS': False,
+            'TEST': {},
+        }, alias=self.alias)
+    
+    def _connection(self, transaction_status=0):
+        """Return a mock psycopg connection that is open and idle."""
+        connection = mock.MagicMock(closed=False, autocommit=True)
+        connection.info.transaction_status = transaction_status
+        return connection
+    
+    def _checkout(self):
+        """Check out a connection, opening `new` if the pool has none."""
+        new = self._connection()
+        with mock.patch.object(pooled.base.DatabaseWrapper, 'get_new_connection', return_value=new):
+            return self.wrapper.get_new_connection({}), new
+    
+    def test_checkout_opens_connection_when_pool_is_empty(self):
+        """Test that an empty pool falls back to a new connection."""
+        connection, new = self._checkout()
+        
+        self.assertIs(connection, new)
+        self.assertEqual(stats.snapshot()[self.alias], {'pool_misses': 1})
+    
+    def test_closed_connection_returns_to_pool(self):
+        """Test that closing an idle connection parks it for the next checkout."""
+        idle = self._connection()
+        self.wrapper.connection = idle
+        self.wrapper._close()
+        
+        idle.close.assert_not_called()
+        connection, new = self._checkout()
+        self.assertIs(connection, idle)
+        idle.cursor.return_value.__enter__.return_value.execute.assert_called_once_with('SELECT 1')
+        self.assertEqual(stats.snapshot()[self.alias], {'pool_hits': 1})
+    
+    def test_connection_in_transaction_is_not_pooled(self):
+        """Test that a connection with an open transaction is closed instead."""
+        busy = self._connection(transaction_status=2)
+        self.wrapper.connection = busy
+        self.wrapper._close()
+        
+        busy.close.assert_called_once_with()
+        self.assertTrue(pooled.get_pool(self.alias).empty())
+    
+    def test_full_pool_closes_connection(self):
+        """Test that connections beyond DB_POOL_SIZE are closed."""
+        connections_ = [self._connection() for _ in range(3)]
+        for connection in connections_:
+            self.wrapper.connection = connection
+            self.wrapper._close()
+        
+        self.assertEqual(pooled.get_pool(self.alias).qsize(), 2)
+        connections_[2].close.assert_called_once_with()
+    
+    def test_broken_connection_is_discarded(self):
+        """Test that a pooled connection failing its health check is dropped."""
+        broken = self._connection()
+        broken.cursor.return_value.__enter__.return_value.execute.side_effect = (
+            self.wrapper.Database.OperationalError('server closed the connection')
+        )
+        pooled.get_pool(self.alias).put_nowait(broken)
+        
+        connection, new = self._checkout()
+        
+        self.assertIs(connection, new)
+        broken.close.assert_called_once_with()
+        self.assertTrue(pooled.get_pool(self.alias).empty())
+        self.assertEqual(stats.snapshot()[self.alias], {'pool_misses': 1})
+    
+    def test_closed_pooled_connection_is_skipped(self):
+        """Test that a connection closed by the server is not handed out."""
+        dropped = self._connection()
+        dropped.closed = True
+        pooled.get_pool(self.alias).put_nowait(dropped)
+        
+        connection, new = self._checkout()
+        
+        self.assertIs(connection, new)
+        dropped.cursor.assert_not_called()
@@ -2,7 +2,7 @@
 Tests for Event functionality.
 """
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APIClient
@@ -81,6 +81,25 @@ class EventModelTest(TestCase):
         
         self.assertEqual(event.participant_count, 2)
     
+    def test_annotated_participant_count(self):
+        """Test that an annotated event counts active participants without a query."""
+        from events.models import with_participant_count
+        event = Event.objects.create(**self.event_data)
+        for index in range(3):
+            user = User.objects.create_user(
+                username=f'participant{index}',
+                email=f'participant{index}@example.com',
+                password='pass123'
+            )
+            EventParticipant.objects.create(event=event, user=user, is_active=index > 0)
+        other = Event.objects.create(**self.event_data)
+        
+        events = {event.id: event for event in with_participant_count(Event.objects.all())}
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(events[event.id].participant_count, 2)
+            self.assertEqual(events[other.id].participant_count, 0)
+    
     def test_event_is_full(self):
         """Test event is_full property."""
         event = Event.objects.create(**self.event_data)
@@ -459,4 +478,263 @@ class EventParticipantTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['event_title'], self.event.title)
         self.assertEqual(response.data['participant_count'], 1)
-        self.assertEqual(len(response.data['participants']), 1) 
\ No newline at end of file
+        self.assertEqual(len(response.data['participants']), 1) 
+
+
+class EventSoftDeleteTest(TestCase):
+    """Test cases for soft-deleting and purging events."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            first_name='Test',
+            last_name='User',
+            password='testpass123'
+        )
+        self.event = Event.objects.create(
+            title='Test Event',
+            description='A test event description',
+            date=date.today() + timedelta(days=7),
+            time=time(14, 0),
+            location='Test Location',
+            created_by=self.user
+        )
+        for index in range(5):
+            user = User.objects.create_user(
+                username=f'participant{index}',
+                email=f'participant{index}@example.com',
+                first_name='Participant',
+                last_name=str(index),
+                password='testpass123'
+            )
+            EventParticipant.objects.create(event=self.event, user=user)
+    
+    def test_delete_hides_event_immediately(self):
+        """Test that a deleted event disappears from querysets before the purge."""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('event-detail', kwargs={'pk': self.event.pk})
+        
+        with self.captureOnCommitCallbacks():
+            response = self.client.delete(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Event.objects.filter(id=self.event.id).exists())
+        self.assertTrue(Event.all_objects.filter(id=self.event.id).exists())
+        self.assertFalse(EventParticipant.objects.filter(event_id=self.event.id).exists())
+        self.assertEqual(EventParticipant.all_objects.filter(event_id=self.event.id).count(), 5)
+        
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    @override_settings(EVENT_PURGE_BATCH_SIZE=2)
+    def test_purge_removes_participants_in_batches(self):
+        """Test that the purge deletes participants in bounded batches."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from events.tasks import purge_deleted_event
+        self.event.soft_delete()
+        
+        with CaptureQueriesContext(connection) as queries:
+            purge_deleted_event(self.event.id)
+        
+        participant_deletes = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('DELETE FROM "event_participants" WHERE "event_participants"."id" IN')
+        ]
+        self.assertEqual(len(participant_deletes), 3)
+        self.assertFalse(Event.all_objects.filter(id=self.event.id).exists())
+        self.assertFalse(EventParticipant.all_objects.exists())
+    
+    def test_purge_skips_live_events(self):
+        """Test that the purge leaves events that were not deleted alone."""
+        from events.tasks import purge_deleted_events
+        purge_deleted_events()
+        
+        self.assertTrue(Event.objects.filter(id=self.event.id).exists())
+        self.assertEqual(EventParticipant.objects.count(), 5)
+
+
+class EventArchiveTest(TestCase):
+    """Test cases for archiving past events and inactive registrations."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            first_name='Test',
+            last_name='User',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            first_name='Other',
+            last_name='User',
+            password='testpass123'
+        )
+        self.past_event = Event.objects.create(
+            title='Past Event',
+            description='An old event',
+            date=date.today() - timedelta(days=200),
+            time=time(14, 0),
+            location='Old Location',
+            created_by=self.user
+        )
+        self.live_event = Event.objects.create(
+            title='Live Event',
+            description='An upcoming event',
+            date=date.today() + timedelta(days=7),
+            time=time(14, 0),
+            location='Test Location',
+            created_by=self.user
+        )
+        EventParticipant.objects.create(event=self.past_event, user=self.user)
+        EventParticipant.objects.create(event=self.past_event, user=self.other_user, is_active=False)
+        EventParticipant.objects.create(event=self.live_event, user=self.user)
+        self.cancelled = EventParticipant.objects.create(
+            event=self.live_event,
+            user=self.other_user,
+            is_active=False
+        )
+    
+    def test_archive_moves_past_events_and_inactive_registrations(self):
+        """Test that archived rows leave the live tables."""
+        from events.models import ArchivedEvent, ArchivedEventParticipant
+        from events.tasks import archive_events
+        archive_events()
+        
+        self.assertEqual(list(Event.objects.values_list('id', flat=True)), [self.live_event.id])
+        self.assertEqual(
+            list(EventParticipant.all_objects.values_list('event_id', 'is_active')),
+            [(self.live_event.id, True)]
+        )
+        archived = ArchivedEvent.objects.get()
+        self.assertEqual(archived.id, self.past_event.id)
+        self.assertEqual(archived.title, 'Past Event')
+        self.assertEqual(ArchivedEventParticipant.objects.filter(event_id=self.past_event.id).count(), 2)
+        self.assertTrue(ArchivedEventParticipant.objects.filter(id=self.cancelled.id).exists())
+    
+    def test_archive_respects_batch_size(self):
+        """Test that archiving in batches moves every eligible event."""
+        from events.archive import archive_past_events
+        for index in range(4):
+            Event.objects.create(
+                title=f'Old Event {index}',
+                description='An old event',
+                date=date.today() - timedelta(days=100 + index),
+                time=time(9, 0),
+                location='Old Location',
+                created_by=self.user
+            )
+        
+        self.assertEqual(archive_past_events(batch_size=2), 5)
+        self.assertEqual(Event.objects.count(), 1)
+    
+    def test_archived_events_api(self):
+        """Test read-only API access to archived events."""
+        from events.tasks import archive_events
+        archive_events()
+        self.client.force_authenticate(user=self.user)
+        
+        url = reverse('archived-event-detail', kwargs={'pk': self.past_event.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Past Event')
+        
+        response = self.client.get(reverse('archived-event-participants', kwargs={'pk': self.past_event.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['user']['id'] for item in response.data], [self.user.id])
+        
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(reverse('archived-event-participants', kwargs={'pk': self.past_event.pk}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.user)
+        
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        
+        response = self.client.get(reverse('event-detail', kwargs={'pk': self.past_event.pk}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SeedDataCommandTest(TestCase):
+    """Test cases for the seed_data management command."""
+    
+    def _seed(self, prefix='seed', seed=1):
+        """Run seed_data with small volumes."""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        call_command(
+            'seed_data',
+            users=60,
+            events=12,
+            participants=200,
+            notifications=100,
+            batch_size=25,
+            prefix=prefix,
+            seed=seed,
+            stdout=StringIO()
+        )
+    
+    def test_creates_requested_volumes(self):
+        """Test that the requested numbers of rows are created."""
+        from notifications.models import Notification
+        
+        self._seed()
+        
+        self.assertEqual(User.objects.filter(username__startswith='seed_').count(), 60)
+        self.assertEqual(Event.all_objects.count(), 12)
+        self.assertEqual(EventParticipant.objects.count(), 200)
+        self.assertEqual(Notification.objects.count(), 100)
+    
+    def test_realistic_distributions(self):
+        """Test skewed popularity, capacities, past and future events and cancellations."""
+        from django.db.models import Count
+        
+        self._seed()
+        
+        today = timezone.now().date()
+        self.assertTrue(Event.objects.filter(date__lt=today).exists())
+        self.assertTrue(Event.objects.filter(date__gt=today).exists())
+        self.assertTrue(EventParticipant.objects.filter(is_active=False).exists())
+        
+        counts = sorted(
+            Event.objects.annotate(registrations=Count('participants')).values_list('registrations', flat=True),
+            reverse=True
+        )
+        self.assertGreater(counts[0], 3 * counts[len(counts) // 2])
+        for event in Event.objects.exclude(max_participants=None).annotate(registrations=Count('participants')):
+            self.assertLessEqual(event.registrations, event.max_participants)
+    
+    def test_same_seed_same_data(self):
+        """Test that a seed always generates the same data."""
+        self._seed(prefix='first')
+        first = list(Event.objects.order_by('id').values_list('title', 'date', 'time', 'location'))
+        Event.all_objects.all().delete()
+        
+        self._seed(prefix='second')
+        second = list(Event.objects.order_by('id').values_list('title', 'date', 'time', 'location'))
+        
+        self.assertEqual(first, second)
+    
+    def test_users_share_precomputed_password(self):
+        """Test that generated users can log in with the given password."""
+        self._seed()
+        
+        user = User.objects.filter(username__startswith='seed_').first()
+        self.assertTrue(user.check_password('seedpass123'))
+    
+    def test_existing_prefix_rejected(self):
+        """Test that seeding twice with one prefix is refused."""
+        from django.core.management.base import CommandError
+        
+        self._seed()
+        
+        with self.assertRaises(CommandError):
+            self._seed()
@@ -0,0 +1,232 @@
+"""
+Tests for the index advisor.
+"""
+
+import json
+import shutil
+import tempfile
+from datetime import date, time
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.functions import Upper
+from django.test import TestCase
+from django.utils import timezone
+
+from event_management.db.index_advisor import Workload, advise, plan_access, predicates
+from events.models import Event, EventParticipant
+from notifications.models import Notification
+
+User = get_user_model()
+
+
+class PredicatesTest(TestCase):
+    """Test cases for reading filters and ordering from SQL."""
+    
+    def test_participants_query(self):
+        """Test equality, constant and ordering columns of a join."""
+        queryset = EventParticipant.objects.filter(event_id=1, is_active=True).order_by('-registered_at')
+        sql, params = queryset.query.sql_with_params()
+        
+        result = predicates(sql)
+        
+        self.assertEqual(result['event_participants']['equal'], ['event_id'])
+        self.assertEqual(result['event_participants']['constant'], {'is_active': True})
+        self.assertEqual(result['event_participants']['order'], ['registered_at'])
+        self.assertEqual(result['events']['constant'], {'deleted_at': 'null'})
+    
+    def test_range_and_negated_boolean(self):
+        """Test range columns and a boolean tested for False."""
+        queryset = Notification.objects.filter(user_id=1, is_read=False, created_at__gte=timezone.now())
+        sql, params = queryset.query.sql_with_params()
+        
+        result = predicates(sql)['notifications']
+        
+        self.assertEqual(result['equal'], ['user_id'])
+        self.assertEqual(result['range'], ['created_at'])
+        self.assertEqual(result['constant'], {'is_read': False})
+        self.assertEqual(result['order'], ['created_at'])
+    
+    def test_sqlite_plan(self):
+        """Test reading scans, searches and sorts from EXPLAIN QUERY PLAN."""
+        access, used, sorts = plan_access([
+            'SEARCH events USING INDEX events_deleted_at_eed89106 (deleted_at=?)',
+            'SEARCH users USING INTEGER PRIMARY KEY (rowid=?)',
+            'SCAN notifications',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ], 'sqlite')
+        
+        self.assertEqual(access['events'], ('search', ['deleted_at']))
+        self.assertEqual(access['notifications'], ('scan', None))
+        self.assertEqual(used, {'events_deleted_at_eed89106'})
+        self.assertTrue(sorts)
+    
+    def test_postgresql_plan(self):
+        """Test reading scans and sorts from PostgreSQL's EXPLAIN."""
+        access, used, sorts = plan_access([
+            'Sort  (cost=10.50..10.52 rows=8 width=120)',
+            '  ->  Seq Scan on notifications  (cost=0.00..10.38 rows=8 width=120)',
+            '  ->  Index Scan using events_pkey on events  (cost=0.15..8.17 rows=1 width=4)',
+        ], 'postgresql')
+        
+        self.assertEqual(access['notifications'], ('scan', None))
+        self.assertEqual(access['events'], ('search', None))
+        self.assertEqual(used, {'events_pkey'})
+        self.assertTrue(sorts)
+
+
+class IndexAdvisorTest(TestCase):
+    """Test cases for recommendations from a captured workload."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.event = Event.objects.create(
+            title='Test Event',
+            description='Test Description',
+            date=date(2030, 1, 1),
+            time=time(10, 0),
+            location='Test Location',
+            created_by=self.user
+        )
+    
+    def _advise(self, extra_indexes=None):
+        workload = Workload()
+        with workload.capture():
+            list(Notification.objects.filter(event_id=self.event.id))
+            list(Event.objects.filter(is_active=True))
+        for table, indexes in (extra_indexes or {}).items():
+            workload.indexes.setdefault(table, {}).update(indexes)
+        return advise(workload)
+    
+    def test_recommends_index_for_sorted_table(self):
+        """Test that a filter sorted outside an index gets a composite index."""
+        recommendations, flags = self._advise()
+        
+        notifications = [r for r in recommendations if r['table'] == 'notifications']
+        self.assertEqual(len(notifications), 1)
+        self.assertEqual(notifications[0]['index'].fields, ['event_id', 'created_at'])
+        self.assertEqual(notifications[0]['count'], 1)
+    
+    def test_flags_standalone_boolean_index(self):
+        """Test that an index on is_active alone is flagged."""
+        recommendations, flags = self._advise({
+            'events': {'events_is_active_idx': {'columns': ['is_active'], 'unique': False}},
+        })
+        
+        flagged = {flag['name']: flag for flag in flags}
+        self.assertIn('boolean', flagged['events_is_active_idx']['reason'])
+        self.assertNotIn('index', flagged['events_is_active_idx'])
+    
+    def test_flags_index_repeating_unique_constraint(self):
+        """Test that an index leading a unique constraint is flagged."""
+        recommendations, flags = self._advise({
+            'event_participants': {
+                'event_participants_event_user_idx': {'columns': ['event_id', 'user_id'], 'unique': False},
+                'event_participants_event_user_uniq': {'columns': ['event_id', 'user_id'], 'unique': True},
+            },
+        })
+        
+        flagged = {flag['name']: flag for flag in flags}
+        self.assertIn('event_participants_event_user_uniq', flagged['event_participants_event_user_idx']['reason'])
+        self.assertNotIn('event_participants_event_user_uniq', flagged)
+    
+    def test_partial_and_expression_indexes_not_duplicates(self):
+        """Test that indexes with other conditions or on expressions do not lead each other."""
+        recommendations, flags = self._advise({
+            'events': {'events_location_upper_idx': {'columns': [None], 'unique': False}},
+        })
+        
+        reasons = {flag['name']: flag['reason'] for flag in flags}
+        for name in ('events_live_date_idx', 'events_live_active_date_idx', 'events_location_upper_idx'):
+            self.assertNotIn('its columns lead', reasons.get(name, ''))
+    
+    def test_expression_index_judged_on_its_expression(self):
+        """Test that an expression index is only flagged for a workload filtering on its expression."""
+        recommendations, flags = self._advise()
+        self.assertNotIn('events_title_upper_idx', {flag['name'] for flag in flags})
+        
+        workload = Workload()
+        with workload.capture():
+            list(Event.objects.alias(title_upper=Upper('title')).filter(title_upper__gte='TEST'))
+        for query in workload.queries.values():
+            query['plan'] = []
+        recommendations, flags = advise(workload)
+        
+        flagged = {flag['name']: flag for flag in flags}
+        self.assertEqual(flagged['events_title_upper_idx']['columns'], ['Upper(F(title))'])
+        self.assertEqual(flagged['events_title_upper_idx']['reason'], 'no plan of the workload uses it')
+    
+    def test_statements_captured_once_per_shape(self):
+        """Test that repeated shapes are counted and the capture is removed."""
+        wrappers = list(connection.execute_wrappers)
+        workload = Workload()
+        with workload.capture():
+            for event_id in range(3):
+                list(Notification.objects.filter(event_id=event_id))
+        
+        self.assertEqual([query['count'] for query in workload.queries.values()], [3])
+        self.assertEqual(connection.execute_wrappers, wrappers)
+
+
+class AdviseIndexesCommandTest(TestCase):
+    """Test cases for the advise_indexes management command."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.log = self.directory / 'workload.jsonl'
+        sql, params = Notification.objects.filter(event_id=7).query.sql_with_params()
+        self.log.write_text(json.dumps({'sql': sql, 'params': list(params), 'duration_ms': 1}) + '\n')
+    
+    def test_json_report(self):
+        """Test that a replayed log is advised on."""
+        out = StringIO()
+        call_command('advise_indexes', log=str(self.log), json=True, stdout=out)
+        
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['recommendations'][0]['table'], 'notifications')
+        self.assertIn("fields=['event_id', 'created_at']", report['recommendations'][0]['index'])
+    
+    def test_text_report_with_expression_index(self):
+        """Test the text report on a table with an expression index."""
+        sql, params = Event.objects.filter(location='Hall').query.sql_with_params()
+        self.log.write_text(json.dumps({'sql': sql, 'params': list(params), 'duration_ms': 1}) + '\n')
+        out = StringIO()
+        call_command('advise_indexes', log=str(self.log), stdout=out)
+        
+        self.assertIn('query shapes on', out.getvalue())
+        self.assertNotIn('events_title_upper_idx', out.getvalue())
+    
+    def test_write_migration(self):
+        """Test that the recommendations are written as a migration."""
+        call_command(
+            'advise_indexes',
+            log=str(self.log),
+            write_migration=True,
+            output_dir=str(self.directory),
+            stdout=StringIO()
+        )
+        
+        written = list(self.directory.glob('*_advised_indexes.py'))
+        self.assertEqual(len(written), 1)
+        source = written[0].read_text()
+        self.assertIn('migrations.AddIndex(', source)
+        self.assertIn("model_name='notification'", source)
+        self.assertIn("('notifications', '", source)
+        compile(source, str(written[0]), 'exec')
+    
+    def test_missing_log(self):
+        """Test the error when there is nothing to replay."""
+        from django.core.management.base import CommandError
+        
+        with self.assertRaises(CommandError):
+            call_command('advise_indexes', log=str(self.directory / 'missing.jsonl'), stdout=StringIO())
@@ -0,0 +1,199 @@
+"""
+Tests for the Prometheus metrics endpoint.
+"""
+
+import os
+import tempfile
+from datetime import date, time, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+
+from events.models import Event
+
+User = get_user_model()
+
+
+def sample(name, **labels):
+    """Return the current value of a metric sample, 0 if it has none."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTest(TestCase):
+    """Test cases for request, cache, task and backlog metrics."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.event = Event.objects.create(
+            title='Test Event',
+            description='Description',
+            date=date.today() + timedelta(days=7),
+            time=time(18, 0),
+            location='Hall',
+            created_by=self.user
+        )
+    
+    def test_endpoint_exposes_metrics(self):
+        """Test that /metrics serves the Prometheus text format."""
+        response = self.client.get(reverse('metrics'))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('http_request_duration_seconds', body)
+        self.assertIn('notification_outbox_messages', body)
+    
+    def test_requests_labelled_by_viewset_and_action(self):
+        """Test that latency and query counts are labelled by view and action."""
+        labels = {'view': 'EventViewSet', 'action': 'register', 'method': 'POST'}
+        before = sample('http_request_duration_seconds_count', **labels)
+        queries_before = sample('http_request_db_queries_sum', view='EventViewSet', action='register')
+        
+        self.client.post(reverse('event-register', args=[self.event.id]))
+        
+        self.assertEqual(sample('http_request_duration_seconds_count', **labels), before + 1)
+        self.assertGreater(
+            sample('http_request_db_queries_sum', view='EventViewSet', action='register'),
+            queries_before
+        )
+        self.assertGreaterEqual(
+            sample('http_requests_total', status='2xx', **labels), 1
+        )
+    
+    def test_unread_count_action_label(self):
+        """Test that list-level actions get their own label."""
+        labels = {'view': 'NotificationViewSet', 'action': 'unread_count', 'method': 'GET'}
+        before = sample('http_request_duration_seconds_count', **labels)
+        
+        self.client.get(reverse('notification-unread-count'))
+        
+        self.assertEqual(sample('http_request_duration_seconds_count', **labels), before + 1)
+    
+    def test_cache_hits_and_misses(self):
+        """Test that cache lookups are counted as hits or misses."""
+        hits = sample('django_cache_requests_total', result='hit')
+        misses = sample('django_cache_requests_total', result='miss')
+        
+        cache.get('metrics-test-key')
+        cache.set('metrics-test-key', 1)
+        cache.get('metrics-test-key')
+        self.assertEqual(cache.get_many(['metrics-test-key', 'metrics-other-key']), {'metrics-test-key': 1})
+        
+        self.assertEqual(sample('django_cache_requests_total', result='hit'), hits + 2)
+        self.assertEqual(sample('django_cache_requests_total', result='miss'), misses + 2)
+    
+    def test_task_durations_and_failures(self):
+        """Test that Celery tasks are timed and failures counted."""
+        from event_management.celery import app
+        from notifications.tasks import send_event_update_notification
+        
+        task = send_event_update_notification.name
+        before = sample('celery_task_duration_seconds_count', task=task, state='SUCCESS')
+        send_event_update_notification.delay(self.event.id, 'Moved')
+        self.assertEqual(sample('celery_task_duration_seconds_count', task=task, state='SUCCESS'), before + 1)
+        
+        @app.task(name='tests.metrics.failing')
+        def failing():
+            raise ValueError('boom')
+        
+        # Propagating eager failures skips the failure signal a worker sends.
+        failing.apply(throw=False)
+        self.assertEqual(sample('celery_task_failures_total', task='tests.metrics.failing'), 1)
+    
+    @override_settings(CELERY_METRICS_PORT=9808)
+    def test_worker_exporter(self):
+        """Test that a worker with CELERY_METRICS_PORT serves its pool's metrics."""
+        from event_management import metrics
+        
+        with tempfile.TemporaryDirectory() as directory:
+            stale = os.path.join(directory, 'counter_1.db')
+            open(stale, 'w').close()
+            with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}), \
+                    mock.patch.object(metrics, 'start_http_server') as start_http_server:
+                metrics.start_worker_exporter()
+            
+            self.assertFalse(os.path.exists(stale))
+        start_http_server.assert_called_once()
+        self.assertEqual(start_http_server.call_args.args, (9808,))
+        self.assertIsNot(start_http_server.call_args.kwargs['registry'], REGISTRY)
+    
+    def test_worker_exporter_off_by_default(self):
+        """Test that workers serve no metrics without CELERY_METRICS_PORT."""
+        from event_management import metrics
+        
+        with mock.patch.object(metrics, 'start_http_server') as start_http_server:
+            metrics.start_worker_exporter()
+        
+        start_http_server.assert_not_called()
+    
+    def test_background_executor_depth(self):
+        """Test that jobs waiting in the background executor are reported."""
+        import threading
+        from notifications.executor import BackgroundExecutor
+        
+        executor = BackgroundExecutor(max_workers=1, max_queue_size=10, name='metrics-test')
+        release = threading.Event()
+        started = threading.Event()
+        executor.submit(lambda: (started.set(), release.wait(5)))
+        started.wait(5)
+        executor.submit(lambda: None)
+        executor.submit(lambda: None)
+        
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('background_executor_queue_length{executor="metrics-test"} 2.0', body)
+        
+        release.set()
+        executor.shutdown(timeout=5)
+        self.assertEqual(sample('background_executor_queue_length', executor='metrics-test'), 0)
+    
+    def test_outbox_depth(self):
+        """Test that outbox rows waiting to be relayed are reported."""
+        from notifications import outbox
+        
+        with override_settings(OUTBOX_RELAY_ON_COMMIT=False):
+            outbox.enqueue('notifications.tasks.send_registration_confirmation', 1)
+        
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('notification_outbox_messages{state="ready"} 1.0', body)
+        self.assertIn('email_dead_letters 0.0', body)
+    
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_required_when_configured(self):
+        """Test that a configured METRICS_TOKEN must be sent as a bearer token."""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+    
+    def test_multiprocess_mode(self):
+        """Test that PROMETHEUS_MULTIPROC_DIR switches to the multiprocess collector."""
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}), \
+                mock.patch('prometheus_client.multiprocess.MultiProcessCollector') as collector:
+            response = self.client.get(reverse('metrics'))
+        
+        self.assertEqual(response.status_code, 200)
+        collector.assert_called_once()
+        self.assertIn('notification_outbox_messages', response.content.decode())
+    
+    def test_multiprocess_directory_created(self):
+        """Test that a missing PROMETHEUS_MULTIPROC_DIR is created rather than failing."""
+        with tempfile.TemporaryDirectory() as parent:
+            directory = os.path.join(parent, 'prometheus')
+            with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}):
+                response = self.client.get(reverse('metrics'))
+            
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(os.path.isdir(directory))
@@ -2,7 +2,7 @@
 Tests for Notification functionality.
 """
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APIClient
@@ -143,6 +143,16 @@ class NotificationAPITest(TestCase):
         
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
     
+    def test_create_notification(self):
+        """Test that a created notification belongs to the current user."""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('notification-list')
+        response = self.client.post(url, {'title': 'New', 'message': 'Message'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        notification = Notification.objects.get(id=response.data['id'])
+        self.assertEqual(notification.user, self.user)
+    
     def test_mark_notification_as_read(self):
         """Test marking notification as read."""
         self.client.force_authenticate(user=self.user)
@@ -334,6 +344,7 @@ class NotificationTaskTest(TestCase):
         self.assertEqual(notification.title, 'Event Cancelled')
         self.assertIn(self.event.title, notification.message)
     
+    @override_settings(NOTIFICATION_COALESCE_WINDOW_SECONDS=0)
     def test_send_event_update_notification_task(self):
         """Test event update notification task."""
         from notifications.tasks import send_event_update_notification
@@ -354,4 +365,981 @@ class NotificationTaskTest(TestCase):
         
         self.assertIsNotNone(notification)
         self.assertEqual(notification.title, 'Event Updated')
-        self.assertIn(update_message, notification.message) 
\ No newline at end of file
+        self.assertIn(update_message, notification.message) 
+
+
+class EventReminderTest(TestCase):
+    """Test cases for scheduled event reminders."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            first_name='Test',
+            last_name='User',
+            password='testpass123'
+        )
+        
+        self.event = Event.objects.create(
+            title='Test Event',
+            description='A test event description',
+            date=timezone.now().date() + timezone.timedelta(days=7),
+            time=timezone.now().time().replace(microsecond=0),
+            location='Test Location',
+            created_by=self.user
+        )
+    
+    def _make_due(self, event):
+        """Move an event's reminders into the past."""
+        from notifications.models import EventReminder
+        EventReminder.objects.filter(event=event).update(
+            remind_at=timezone.now() - timezone.timedelta(minutes=1)
+        )
+    
+    def test_reminders_created_for_each_offset(self):
+        """Test that saving an event schedules one reminder per offset."""
+        reminders = {r.offset_minutes: r.remind_at for r in self.event.reminders.all()}
+        
+        self.assertEqual(set(reminders), {1440, 60})
+        self.assertEqual(reminders[60], self.event.starts_at - timezone.timedelta(minutes=60))
+    
+    def test_reminders_rescheduled_when_time_changes(self):
+        """Test that moving an event moves its reminders."""
+        self.event.date = self.event.date + timezone.timedelta(days=1)
+        self.event.save()
+        
+        reminder = self.event.reminders.get(offset_minutes=60)
+        self.assertEqual(reminder.remind_at, self.event.starts_at - timezone.timedelta(minutes=60))
+    
+    def test_reminders_cancelled_when_event_deactivated(self):
+        """Test that deactivating an event cancels pending reminders."""
+        self.event.is_active = False
+        self.event.save()
+        
+        self.assertFalse(self.event.reminders.exists())
+    
+    def test_sweep_sends_due_reminders_once(self):
+        """Test that the sweep delivers due reminders exactly once."""
+        from notifications.tasks import send_event_reminders
+        from events.models import EventParticipant
+        EventParticipant.objects.create(event=self.event, user=self.user)
+        self._make_due(self.event)
+        
+        send_event_reminders()
+        send_event_reminders()
+        
+        notifications = Notification.objects.filter(user=self.user, notification_type='reminder')
+        self.assertEqual(notifications.count(), 2)
+        self.assertFalse(self.event.reminders.filter(sent_at__isnull=True).exists())
+    
+    def test_sweep_query_count_independent_of_event_count(self):
+        """Test that the sweep does not query per event."""
+        from notifications.tasks import send_event_reminders
+        from events.models import EventParticipant
+        
+        for i in range(3):
+            event = Event.objects.create(
+                title=f'Event {i}',
+                description='Description',
+                date=self.event.date,
+                time=self.event.time,
+                location='Location',
+                created_by=self.user
+            )
+            EventParticipant.objects.create(event=event, user=self.user)
+            self._make_due(event)
+        
+        with self.assertNumQueries(6):
+            send_event_reminders()
+        
+        self.assertEqual(
+            Notification.objects.filter(notification_type='reminder').count(), 6
+        )
+    
+    def test_stale_scheduled_reminder_is_ignored(self):
+        """Test that a reminder task whose reminder was rescheduled does nothing."""
+        from notifications.tasks import send_scheduled_reminder
+        from events.models import EventParticipant
+        EventParticipant.objects.create(event=self.event, user=self.user)
+        reminder = self.event.reminders.get(offset_minutes=60)
+        reminder.task_id = 'current-task'
+        reminder.save()
+        
+        send_scheduled_reminder.apply(args=[reminder.id], task_id='old-task')
+        
+        reminder.refresh_from_db()
+        self.assertIsNone(reminder.sent_at)
+        self.assertFalse(Notification.objects.filter(notification_type='reminder').exists())
+
+
+@override_settings(OUTBOX_RELAY_IN_BACKGROUND=False)
+class OutboxTest(TestCase):
+    """Test cases for the transactional notification outbox."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            first_name='Test',
+            last_name='User',
+            password='testpass123'
+        )
+        
+        self.event = Event.objects.create(
+            title='Test Event',
+            description='A test event description',
+            date=timezone.now().date() + timezone.timedelta(days=7),
+            time=timezone.now().time(),
+            location='Test Location',
+            created_by=self.user
+        )
+    
+    def test_register_relays_confirmation_after_commit(self):
+        """Test that registration records an outbox row relayed on commit."""
+        from notifications.models import OutboxMessage
+        self.client.force_authenticate(user=self.user)
+        url = reverse('event-register', kwargs={'pk': self.event.pk})
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(url)
+            self.assertEqual(OutboxMessage.objects.count(), 1)
+            self.assertFalse(Notification.objects.exists())
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        for callback in callbacks:
+            callback()
+        
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertTrue(Notification.objects.filter(
+            user=self.user,
+            notification_type='registration_confirmation'
+        ).exists())
+    
+    def test_delete_event_notifies_participants(self):
+        """Test that cancellation reaches participants of a deleted event."""
+        from events.models import EventParticipant
+        EventParticipant.objects.create(event=self.event, user=self.user)
+        self.client.force_authenticate(user=self.user)
+        url = reverse('event-detail', kwargs={'pk': self.event.pk})
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        notification = Notification.objects.get(
+            user=self.user,
+            notification_type='event_cancellation'
+        )
+        self.assertIn(self.event.title, notification.message)
+    
+    @override_settings(OUTBOX_RELAY_IN_BACKGROUND=True)
+    def test_eager_relay_runs_off_the_response_path(self):
+        """Test that the on-commit relay is handed to the background executor."""
+        from unittest import mock
+        from notifications.models import OutboxMessage
+        self.client.force_authenticate(user=self.user)
+        url = reverse('event-register', kwargs={'pk': self.event.pk})
+        
+        with mock.patch('notifications.executor.get_executor') as get_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        message = OutboxMessage.objects.get()
+        get_executor.return_value.submit.assert_called_once_with(mock.ANY, message.id)
+        self.assertFalse(Notification.objects.exists())
+    
+    def test_failed_dispatch_is_retried_later(self):
+        """Test that a failed dispatch stays in the outbox with backoff."""
+        from notifications import outbox
+        from notifications.models import OutboxMessage
+        message = OutboxMessage.objects.create(
+            task_name='notifications.tasks.does_not_exist',
+            args=[1]
+        )
+        
+        self.assertEqual(outbox.relay(), 0)
+        
+        message.refresh_from_db()
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(message.available_at, timezone.now())
+    
+    def test_messages_are_claimed_before_dispatch(self):
+        """Test that tasks run after the claiming transaction, on leased rows."""
+        from unittest import mock
+        from django.db import connection
+        from notifications import outbox
+        from notifications.models import OutboxMessage
+        message = OutboxMessage.objects.create(task_name='notifications.tasks.relay_outbox')
+        depth = len(connection.savepoint_ids)
+        seen = []
+        
+        def dispatch(claimed):
+            seen.append((
+                len(connection.savepoint_ids),
+                OutboxMessage.objects.get(id=claimed.id).available_at > timezone.now(),
+                outbox.relay(),
+            ))
+            return True
+        
+        with mock.patch('notifications.outbox.dispatch', side_effect=dispatch):
+            self.assertEqual(outbox.relay(), 1)
+        
+        self.assertEqual(seen, [(depth, True, 0)])
+        self.assertFalse(OutboxMessage.objects.filter(id=message.id).exists())
+
+
+class BackgroundExecutorTest(TestCase):
+    """Test cases for the in-process background executor."""
+    
+    def test_jobs_run_on_worker_threads(self):
+        """Test that submitted jobs run off the calling thread."""
+        import threading
+        from notifications.executor import BackgroundExecutor
+        executor = BackgroundExecutor(max_workers=2, max_queue_size=10)
+        threads = []
+        
+        for _ in range(5):
+            self.assertTrue(executor.submit(lambda: threads.append(threading.current_thread())))
+        self.assertTrue(executor.shutdown(timeout=5))
+        
+        self.assertEqual(len(threads), 5)
+        self.assertNotIn(threading.current_thread(), threads)
+        stats = executor.stats()
+        self.assertEqual(stats['completed'], 5)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertIsNotNone(stats['latency_p95'])
+    
+    def test_full_queue_runs_job_inline(self):
+        """Test backpressure when the queue is full."""
+        import threading
+        from notifications.executor import BackgroundExecutor
+        executor = BackgroundExecutor(max_workers=1, max_queue_size=1, submit_timeout=0.01)
+        release = threading.Event()
+        started = threading.Event()
+        
+        def block():
+            started.set()
+            release.wait(5)
+        
+        executor.submit(block)
+        started.wait(5)
+        executor.submit(lambda: None)  # fills the queue
+        self.assertFalse(executor.submit(lambda: None))
+        
+        release.set()
+        executor.shutdown(timeout=5)
+        stats = executor.stats()
+        self.assertEqual(stats['ran_inline'], 1)
+        self.assertEqual(stats['completed'], 3)
+    
+    def test_shutdown_drains_pending_jobs(self):
+        """Test that shutdown waits for queued jobs."""
+        import time
+        from notifications.executor import BackgroundExecutor
+        executor = BackgroundExecutor(max_workers=1, max_queue_size=10)
+        done = []
+        
+        for i in range(3):
+            executor.submit(lambda i=i: (time.sleep(0.01), done.append(i)))
+        
+        self.assertTrue(executor.shutdown(timeout=5))
+        self.assertEqual(done, [0, 1, 2])
+    
+    def test_connection_cleanup_errors_keep_workers_running(self):
+        """Test that a failing close_old_connections is logged and the next job still runs."""
+        from unittest import mock
+        from django.db import OperationalError
+        from notifications.executor import BackgroundExecutor
+        executor = BackgroundExecutor(max_workers=1, max_queue_size=10)
+        done = []
+        
+        with mock.patch(
+            'notifications.executor.close_old_connections',
+            side_effect=OperationalError('server closed the connection')
+        ), self.assertLogs('notifications.executor', level='ERROR') as logs:
+            executor.submit(done.append, 1)
+            executor.submit(done.append, 2)
+            self.assertTrue(executor.shutdown(timeout=5))
+        
+        self.assertEqual(done, [1, 2])
+        self.assertIn('could not close old database connections', logs.output[0])
+
+
+@override_settings(EMAIL_RETRY_DELAY_SECONDS=0)
+class EmailDeliveryTest(TestCase):
+    """Test cases for the email delivery stage."""
+    
+    def _send_messages(self, *outcomes):
+        """Patch the test email backend to fail or succeed in turn."""
+        from unittest import mock
+        from django.core.mail.backends.locmem import EmailBackend
+        original = EmailBackend.send_messages
+        outcomes = list(outcomes)
+        
+        def send_messages(backend, messages):
+            outcome = outcomes.pop(0) if outcomes else None
+            if outcome is not None:
+                raise outcome
+            return original(backend, messages)
+        
+        return mock.patch.object(EmailBackend, 'send_messages', send_messages)
+    
+    def test_transient_failure_is_retried(self):
+        """Test that a transient SMTP failure is retried and delivered."""
+        import smtplib
+        from django.core import mail
+        from notifications import delivery
+        from notifications.outbox import relay
+        from notifications.models import EmailDeadLetter
+        
+        with self._send_messages(smtplib.SMTPServerDisconnected('gone')):
+            delivery.send('test@example.com', 'Subject', 'Body')
+            relay()
+        
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(EmailDeadLetter.objects.exists())
+    
+    @override_settings(EMAIL_RETRY_DELAY_SECONDS=30)
+    def test_eager_retry_waits_in_outbox(self):
+        """Test that eager retries are saved for later rather than slept on."""
+        import smtplib
+        from unittest import mock
+        from django.core import mail
+        from notifications import delivery
+        from notifications.outbox import relay
+        from notifications.models import OutboxMessage
+        from notifications.tasks import deliver_email
+        
+        with mock.patch('notifications.delivery.time.sleep') as sleep:
+            with self._send_messages(smtplib.SMTPServerDisconnected('gone')):
+                delivery.send('test@example.com', 'Subject', 'Body')
+                self.assertEqual(relay(), 0)
+        
+        sleep.assert_not_called()
+        self.assertEqual(len(mail.outbox), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.task_name, deliver_email.name)
+        self.assertEqual(message.args[1:], [1, None])
+        self.assertGreater(message.available_at, timezone.now() + timezone.timedelta(seconds=25))
+    
+    def test_retry_stays_on_sending_queue(self):
+        """Test that a retry is re-queued on the queue of the sending task."""
+        import smtplib
+        from unittest import mock
+        from notifications import delivery
+        from notifications.tasks import deliver_email
+        
+        with override_settings(CELERY_TASK_ALWAYS_EAGER=False), \
+                mock.patch.object(deliver_email, 'apply_async') as apply_async, \
+                self._send_messages(smtplib.SMTPServerDisconnected('gone')):
+            delivery.send_many([delivery.make_email('test@example.com', 'Subject', 'Body')], queue='bulk')
+        
+        email = apply_async.call_args.kwargs['args'][0]
+        apply_async.assert_called_once_with(args=[email, 1, 'bulk'], queue='bulk', countdown=0)
+    
+    def test_permanent_failure_is_dead_lettered(self):
+        """Test that a permanent rejection is dead-lettered without retries."""
+        import smtplib
+        from django.core import mail
+        from notifications import delivery
+        from notifications.models import EmailDeadLetter
+        
+        with self._send_messages(smtplib.SMTPDataError(550, b'mailbox unavailable')):
+            delivery.send('test@example.com', 'Subject', 'Body')
+        
+        self.assertEqual(len(mail.outbox), 0)
+        letter = EmailDeadLetter.objects.get()
+        self.assertEqual(letter.attempts, 1)
+        self.assertEqual(letter.recipient, 'test@example.com')
+    
+    def test_exhausted_retries_are_dead_lettered_and_replayed(self):
+        """Test dead-lettering after the last attempt and replaying it."""
+        import smtplib
+        from io import StringIO
+        from django.core import mail
+        from django.core.management import call_command
+        from django.test import override_settings
+        from notifications import delivery
+        from notifications.outbox import relay
+        from notifications.models import EmailDeadLetter
+        
+        failures = [smtplib.SMTPServerDisconnected('gone')] * 3
+        with override_settings(EMAIL_MAX_ATTEMPTS=3), self._send_messages(*failures):
+            delivery.send('test@example.com', 'Subject', 'Body')
+            while relay():
+                pass
+        
+        letter = EmailDeadLetter.objects.get()
+        self.assertEqual(letter.attempts, 3)
+        
+        call_command('replay_dead_letters', stdout=StringIO())
+        
+        self.assertEqual(len(mail.outbox), 1)
+        letter.refresh_from_db()
+        self.assertIsNotNone(letter.replayed_at)
+    
+    def _bucket(self, rate, burst=1):
+        from django.core.cache import cache
+        from notifications.delivery import TokenBucket
+        cache.clear()
+        return TokenBucket(rate, burst, key='test-rate')
+    
+    def test_token_bucket_refills_at_rate(self):
+        """Test that the token bucket hands out its burst, then `rate` tokens per second."""
+        from unittest import mock
+        bucket = self._bucket(2, burst=2)
+        
+        with mock.patch('notifications.delivery.time.time', return_value=1000.9):
+            self.assertEqual(bucket.try_acquire(), 0)
+            self.assertEqual(bucket.try_acquire(), 0)
+            self.assertAlmostEqual(bucket.try_acquire(), 0.5)
+        # A new second does not bring a new allowance, only what has refilled.
+        with mock.patch('notifications.delivery.time.time', return_value=1001.0):
+            self.assertAlmostEqual(bucket.try_acquire(), 0.4)
+        with mock.patch('notifications.delivery.time.time', return_value=1001.5):
+            self.assertEqual(bucket.try_acquire(), 0)
+    
+    def test_token_bucket_never_exceeds_rate_across_seconds(self):
+        """Test that no one-second interval gets more than `rate` tokens, wherever it starts."""
+        from unittest import mock
+        bucket = self._bucket(5)
+        granted = []
+        
+        for step in range(500):
+            now = 1000 + step / 100
+            with mock.patch('notifications.delivery.time.time', return_value=now):
+                while bucket.try_acquire() == 0:
+                    granted.append(now)
+        
+        self.assertGreaterEqual(len(granted), 5 * 5 - 1)
+        for start in granted:
+            in_window = [moment for moment in granted if start <= moment < start + 1 - 1e-9]
+            self.assertLessEqual(len(in_window), 5)
+
+
+class EmailTemplateTest(TestCase):
+    """Test cases for templated notification emails."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            first_name='Test <b>',
+            last_name='User',
+            password='testpass123'
+        )
+        
+        self.event = Event.objects.create(
+            title='Test & Event',
+            description='A test event description',
+            date=timezone.now().date() + timezone.timedelta(days=7),
+            time=timezone.now().time(),
+            location='Test Location',
+            created_by=self.user
+        )
+    
+    def test_prepared_email_matches_full_render(self):
+        """Test that per-recipient substitution equals a full render."""
+        from django.template.loader import render_to_string
+        from notifications import emails
+        context = {'event': self.event, 'update_message': 'New room'}
+        
+        email = emails.prepare('event_update', context).for_recipient(self.user)
+        
+        full_context = {**context, 'recipient': self.user}
+        self.assertEqual(email['body'], render_to_string('notifications/email/event_update.txt', full_context))
+        self.assertEqual(email['html'], render_to_string('notifications/email/event_update.html', full_context))
+        self.assertEqual(email['subject'], 'Event Update - Test & Event')
+        self.assertIn('Hello Test <b>,', email['body'])
+        self.assertIn('Hello Test &lt;b&gt;,', email['html'])
+    
+    def test_registration_confirmation_is_multipart(self):
+        """Test that notification emails carry text and HTML parts."""
+        from django.core import mail
+        from events.models import EventParticipant
+        from notifications.tasks import send_registration_confirmation
+        participant = EventParticipant.objects.create(event=self.event, user=self.user)
+        
+        send_registration_confirmation(participant.id)
+        
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, 'Registration Confirmed - Test & Event')
+        self.assertIn('"Test & Event" has been confirmed', message.body)
+        self.assertEqual(message.alternatives[0][1], 'text/html')
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=False)
+class EventUpdateCoalescingTest(TestCase):
+    """Test cases for coalesced event update notifications."""
+    
+    def setUp(self):
+        """Set up test data."""
+        from events.models import EventParticipant
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            first_name='Test',
+            last_name='User',
+            password='testpass123'
+        )
+        
+        self.event = Event.objects.create(
+            title='Test Event',
+            description='A test event description',
+            date=timezone.now().date() + timezone.timedelta(days=7),
+            time=timezone.now().time(),
+            location='Test Location',
+            created_by=self.user
+        )
+        EventParticipant.objects.create(event=self.event, user=self.user)
+        
+        # Windows are flushed by a countdown task, which eager mode skips.
+        from unittest import mock
+        from notifications.tasks import flush_event_updates
+        patcher = mock.patch.object(flush_event_updates, 'apply_async')
+        self.scheduled_flush = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def _close_window(self):
+        """Move the event's coalescing window into the past."""
+        from notifications.models import PendingEventUpdate
+        PendingEventUpdate.objects.filter(event=self.event).update(
+            flush_at=timezone.now() - timezone.timedelta(seconds=1)
+        )
+    
+    def test_updates_in_window_are_merged(self):
+        """Test that several updates produce one notification and email."""
+        from django.core import mail
+        from notifications.tasks import send_event_update_notification, flush_event_updates
+        
+        send_event_update_notification(self.event.id, 'New room')
+        send_event_update_notification(self.event.id, 'New time')
+        flush_event_updates()
+        self.assertFalse(Notification.objects.exists())
+        self.scheduled_flush.assert_called_once_with(args=[self.event.id], countdown=900)
+        
+        self._close_window()
+        flush_event_updates()
+        flush_event_updates()
+        
+        notification = Notification.objects.get(user=self.user, notification_type='event_update')
+        self.assertIn('New room', notification.message)
+        self.assertIn('New time', notification.message)
+        self.assertEqual(len(mail.outbox), 1)
+    
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_eager_window_is_closed_by_the_outbox_relay(self):
+        """Test that eager mode keeps the window open and parks its flush in the outbox."""
+        from django.core import mail
+        from notifications import outbox
+        from notifications.models import OutboxMessage
+        from notifications.tasks import flush_event_updates, send_event_update_notification
+        self.scheduled_flush.side_effect = lambda args: flush_event_updates(*args)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            send_event_update_notification(self.event.id, 'New room')
+            send_event_update_notification(self.event.id, 'New time')
+        outbox.relay()
+        self.assertFalse(Notification.objects.exists())
+        
+        message = OutboxMessage.objects.get(task_name=flush_event_updates.name)
+        self.assertEqual(message.args, [self.event.id])
+        self.assertGreater(message.available_at, timezone.now() + timezone.timedelta(seconds=800))
+        
+        self._close_window()
+        OutboxMessage.objects.update(available_at=timezone.now())
+        outbox.relay()
+        notification = Notification.objects.get(user=self.user, notification_type='event_update')
+        self.assertIn('New room', notification.message)
+        self.assertIn('New time', notification.message)
+        self.assertEqual(len(mail.outbox), 1)
+    
+    def test_digest_users_get_daily_email(self):
+        """Test that digest subscribers get updates in the daily digest."""
+        from django.core import mail
+        from notifications.tasks import (
+            send_event_update_notification, flush_event_updates, send_daily_digests
+        )
+        self.user.email_digest = True
+        self.user.save()
+        
+        send_event_update_notification(self.event.id, 'New room')
+        self._close_window()
+        flush_event_updates()
+        
+        self.assertTrue(Notification.objects.filter(user=self.user).exists())
+        self.assertEqual(len(mail.outbox), 0)
+        
+        send_daily_digests()
+        send_daily_digests()
+        
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('New room', mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].subject, 'Your event updates (1)')
+    
+    def test_digest_does_not_need_in_app_notifications(self):
+        """Test that digest subscribers with in-app updates off still get the digest."""
+        from django.core import mail
+        from notifications.tasks import (
+            send_event_update_notification, flush_event_updates, send_daily_digests
+        )
+        self.user.email_digest = True
+        self.user.set_preference('event_update', 'in_app', False)
+        self.user.save()
+        
+        send_event_update_notification(self.event.id, 'New room')
+        self._close_window()
+        flush_event_updates()
+        send_daily_digests()
+        
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('New room', mail.outbox[0].body)
+
+
+class NotificationPreferenceTest(TestCase):
+    """Test cases for per-user notification preferences."""
+    
+    def setUp(self):
+        """Set up test data."""
+        from events.models import EventParticipant
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            first_name='Test',
+            last_name='User',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            first_name='Other',
+            last_name='User',
+            password='testpass123'
+        )
+        
+        self.event = Event.objects.create(
+            title='Test Event',
+            description='A test event description',
+            date=timezone.now().date() + timezone.timedelta(days=7),
+            time=timezone.now().time(),
+            location='Test Location',
+            created_by=self.user
+        )
+        EventParticipant.objects.create(event=self.event, user=self.user)
+        EventParticipant.objects.create(event=self.event, user=self.other_user)
+    
+    def test_defaults_to_all_channels(self):
+        """Test that new users receive every type on every channel."""
+        from users.models import NotificationPreference
+        for notification_type in NotificationPreference.TYPES:
+            for channel in NotificationPreference.CHANNELS:
+                self.assertTrue(self.user.wants(notification_type, channel))
+    
+    @override_settings(NOTIFICATION_COALESCE_WINDOW_SECONDS=0)
+    def test_opted_out_user_is_skipped(self):
+        """Test that fully opted-out users get no notification rows or emails."""
+        from django.core import mail
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from notifications.tasks import send_event_update_notification
+        self.other_user.set_preference('event_update', 'in_app', False)
+        self.other_user.set_preference('event_update', 'email', False)
+        self.other_user.save()
+        
+        with CaptureQueriesContext(connection) as queries:
+            send_event_update_notification(self.event.id, 'New room')
+        
+        inserts = [query['sql'] for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            list(Notification.objects.values_list('user_id', flat=True)),
+            [self.user.id]
+        )
+        self.assertEqual([message.to for message in mail.outbox], [[self.user.email]])
+    
+    def test_channels_are_independent(self):
+        """Test that opting out of one channel keeps the other."""
+        from django.core import mail
+        from notifications.tasks import send_event_cancellation_notification
+        self.other_user.set_preference('event_cancellation', 'email', False)
+        self.other_user.save()
+        
+        send_event_cancellation_notification(self.event.id)
+        
+        self.assertEqual(
+            Notification.objects.filter(notification_type='event_cancellation').count(),
+            2
+        )
+        self.assertEqual([message.to for message in mail.outbox], [[self.user.email]])
+    
+    def test_registration_confirmation_respects_preferences(self):
+        """Test that registration confirmations honour the in-app opt-out."""
+        from django.core import mail
+        from events.models import EventParticipant
+        from notifications.tasks import send_registration_confirmation
+        self.user.set_preference('registration_confirmation', 'in_app', False)
+        self.user.save()
+        participant = EventParticipant.objects.get(event=self.event, user=self.user)
+        
+        send_registration_confirmation(participant.id)
+        
+        self.assertFalse(Notification.objects.filter(user=self.user).exists())
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class EventChangeNotificationTest(TestCase):
+    """Test cases for change-aware event update notifications."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            first_name='Test',
+            last_name='User',
+            password='testpass123'
+        )
+        
+        self.event = Event.objects.create(
+            title='Test Event',
+            description='A test event description',
+            date=timezone.now().date() + timezone.timedelta(days=7),
+            time=timezone.datetime(2026, 1, 1, 10, 0).time(),
+            location='Test Location',
+            created_by=self.user
+        )
+    
+    def _update_messages(self):
+        from notifications.models import OutboxMessage
+        return list(OutboxMessage.objects.filter(
+            task_name='notifications.tasks.send_event_update_notification'
+        ))
+    
+    def test_untracked_field_does_not_notify(self):
+        """Test that description edits enqueue nothing."""
+        event = Event.objects.get(id=self.event.id)
+        event.description = 'Fixed a typo'
+        event.save()
+        
+        self.assertEqual(self._update_messages(), [])
+    
+    def test_tracked_field_enqueues_diff(self):
+        """Test that a location change enqueues a describing message."""
+        event = Event.objects.get(id=self.event.id)
+        event.location = 'Main Hall'
+        event.save()
+        
+        messages = self._update_messages()
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0].args, [
+            event.id,
+            'Location changed from "Test Location" to "Main Hall".'
+        ])
+    
+    def test_update_fields_limit_the_changes(self):
+        """Test that only the fields written by save(update_fields=...) are reported."""
+        event = Event.objects.get(id=self.event.id)
+        event.title = 'Renamed Event'
+        event.save(update_fields=['is_active'])
+        
+        self.assertEqual(self._update_messages(), [])
+        
+        event.save()
+        messages = self._update_messages()
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0].args[1], 'Title changed from "Test Event" to "Renamed Event".')
+    
+    def test_refresh_from_db_resets_the_changes(self):
+        """Test that values reloaded from the database are not reported as changes."""
+        event = Event.objects.get(id=self.event.id)
+        Event.objects.filter(id=self.event.id).update(location='Main Hall')
+        event.refresh_from_db()
+        event.save()
+        
+        self.assertEqual(self._update_messages(), [])
+    
+    def test_saves_in_transaction_are_coalesced(self):
+        """Test that several saves in one transaction enqueue one message."""
+        from django.db import transaction
+        with transaction.atomic():
+            event = Event.objects.get(id=self.event.id)
+            event.location = 'Room 1'
+            event.save()
+            event.location = 'Room 2'
+            event.time = timezone.datetime(2026, 1, 1, 11, 30).time()
+            event.save()
+        
+        messages = self._update_messages()
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(
+            messages[0].args[1],
+            'Time changed from 10:00 to 11:30; Location changed from "Test Location" to "Room 2".'
+        )
+    
+    def test_reverted_change_is_dropped(self):
+        """Test that restoring the original values removes the message."""
+        from django.db import transaction
+        with transaction.atomic():
+            event = Event.objects.get(id=self.event.id)
+            event.title = 'Renamed Event'
+            event.save()
+            event.title = 'Test Event'
+            event.save()
+        
+        self.assertEqual(self._update_messages(), [])
+    
+    def test_rolled_back_save_leaves_nothing_pending(self):
+        """Test that a savepoint rollback discards the pending update."""
+        from django.db import transaction
+        from notifications import changes
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    event = Event.objects.get(id=self.event.id)
+                    event.title = 'Renamed Event'
+                    event.save()
+                    self.assertIsNotNone(changes._pending(event.id))
+                    raise RuntimeError('rolled back')
+            except RuntimeError:
+                pass
+            
+            self.assertIsNone(changes._pending(self.event.id))
+            event = Event.objects.get(id=self.event.id)
+            event.location = 'Main Hall'
+            event.save()
+        
+        messages = self._update_messages()
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0].args[1], 'Location changed from "Test Location" to "Main Hall".')
+    
+    def test_released_savepoint_keeps_its_changes(self):
+        """Test that changes saved in a committed savepoint stay in the message."""
+        from django.db import transaction
+        with transaction.atomic():
+            event = Event.objects.get(id=self.event.id)
+            event.title = 'Renamed Event'
+            event.save()
+            with transaction.atomic():
+                event.location = 'Main Hall'
+                event.save()
+            event.time = timezone.datetime(2026, 1, 1, 11, 30).time()
+            event.save()
+        
+        messages = self._update_messages()
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(
+            messages[0].args[1],
+            'Title changed from "Test Event" to "Renamed Event"; Time changed from 10:00 to 11:30; '
+            'Location changed from "Test Location" to "Main Hall".'
+        )
+    
+    @override_settings(OUTBOX_RELAY_IN_BACKGROUND=False)
+    def test_commit_clears_pending_updates(self):
+        """Test that the next transaction starts a new message."""
+        from django.db import transaction
+        from notifications import changes
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                event = Event.objects.get(id=self.event.id)
+                event.title = 'Renamed Event'
+                event.save()
+        
+        with transaction.atomic():
+            self.assertIsNone(changes._pending(self.event.id))
+    
+    def test_api_update_notifies(self):
+        """Test that updating an event through the API enqueues a message."""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('event-detail', kwargs={'pk': self.event.pk})
+        new_date = self.event.date + timezone.timedelta(days=1)
+        response = self.client.patch(url, {'date': new_date.isoformat()}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        messages = self._update_messages()
+        self.assertEqual(len(messages), 1)
+        self.assertIn(f'to {new_date.isoformat()}', messages[0].args[1])
+
+
+class CancellationSnapshotTest(TestCase):
+    """Test cases for snapshot-based cancellation fan-out."""
+    
+    def setUp(self):
+        """Set up test data."""
+        from events.models import EventParticipant
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            first_name='Test',
+            last_name='User',
+            password='testpass123'
+        )
+        
+        self.event = Event.objects.create(
+            title='Test Event',
+            description='A test event description',
+            date=timezone.now().date() + timezone.timedelta(days=7),
+            time=timezone.now().time(),
+            location='Test Location',
+            created_by=self.user
+        )
+        self.participants = []
+        for index in range(5):
+            user = User.objects.create_user(
+                username=f'participant{index}',
+                email=f'participant{index}@example.com',
+                first_name='Participant',
+                last_name=str(index),
+                password='testpass123'
+            )
+            self.participants.append(user)
+            EventParticipant.objects.create(event=self.event, user=user, is_active=index != 4)
+    
+    @override_settings(CANCELLATION_CHUNK_SIZE=2)
+    def test_fan_out_after_delete(self):
+        """Test that the snapshot reaches active participants after the delete."""
+        from django.core import mail
+        from notifications import cancellations
+        from notifications.models import CancellationSnapshot, CancellationRecipient
+        from notifications.tasks import send_event_cancellation_notification
+        snapshot = cancellations.capture(self.event)
+        event_id = self.event.id
+        self.event.delete()
+        
+        send_event_cancellation_notification(event_id, snapshot.id)
+        
+        self.assertEqual(
+            set(Notification.objects.filter(
+                notification_type='event_cancellation',
+                event_id=event_id,
+                event_title='Test Event'
+            ).values_list('user_id', flat=True)),
+            {user.id for user in self.participants[:4]}
+        )
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertFalse(CancellationSnapshot.objects.exists())
+        self.assertFalse(CancellationRecipient.objects.exists())
+    
+    @override_settings(CANCELLATION_CHUNK_SIZE=2)
+    def test_rerun_resumes_remaining_recipients(self):
+        """Test that recipients already notified are not notified again."""
+        from notifications import cancellations
+        from notifications.models import CancellationRecipient
+        from notifications.tasks import send_event_cancellation_notification
+        snapshot = cancellations.capture(self.event)
+        first_chunk = list(snapshot.recipients.order_by('id')[:2])
+        CancellationRecipient.objects.filter(id__in=[recipient.id for recipient in first_chunk]).delete()
+        
+        send_event_cancellation_notification(self.event.id, snapshot.id)
+        
+        self.assertEqual(
+            Notification.objects.filter(notification_type='event_cancellation').count(),
+            2
+        )
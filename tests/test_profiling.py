@@ -0,0 +1,201 @@
+"""
+Tests for on-demand request profiling.
+"""
+
+import json
+import pstats
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTest(TestCase):
+    """Test cases for the staff profiling switch."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        override = override_settings(PROFILE_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+        
+        self.staff = User.objects.create_user(
+            username='staff',
+            email='staff@example.com',
+            password='testpass123',
+            is_staff=True
+        )
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+    
+    def _files(self):
+        return sorted(path.name for path in Path(self.directory).iterdir())
+    
+    def test_cprofile_by_query_param(self):
+        """Test that staff get a stored pstats profile and SQL timeline."""
+        self.client.force_login(self.staff)
+        
+        response = self.client.get(reverse('event-list'), {'profile': 'cprofile'})
+        
+        profile_id = response['X-Profile-Id']
+        self.assertEqual(self._files(), [f'{profile_id}.pstats', f'{profile_id}.sql.json'])
+        stats = pstats.Stats(str(Path(self.directory) / f'{profile_id}.pstats'))
+        self.assertGreater(stats.total_calls, 0)
+        
+        timeline = json.loads((Path(self.directory) / f'{profile_id}.sql.json').read_text())
+        self.assertEqual(timeline['mode'], 'cprofile')
+        self.assertEqual(timeline['status'], 200)
+        self.assertEqual(timeline['user'], self.staff.pk)
+        self.assertTrue(timeline['queries'])
+        self.assertEqual(
+            sorted(timeline['queries'], key=lambda query: query['start_ms']),
+            timeline['queries']
+        )
+        self.assertIn('sql', timeline['queries'][0])
+    
+    def test_sampling_by_header(self):
+        """Test that the X-Profile header selects the sampling profiler."""
+        self.client.force_login(self.staff)
+        
+        response = self.client.get(reverse('event-list'), HTTP_X_PROFILE='sample')
+        
+        profile_id = response['X-Profile-Id']
+        self.assertEqual(self._files(), [f'{profile_id}.collapsed', f'{profile_id}.sql.json'])
+    
+    def test_non_staff_not_profiled(self):
+        """Test that the switch is ignored for other users."""
+        self.client.force_login(self.user)
+        
+        response = self.client.get(reverse('event-list'), {'profile': 'cprofile'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(self._files(), [])
+    
+    def test_api_authenticated_staff_profiled(self):
+        """Test that staff authenticated by DRF rather than a session are profiled."""
+        import base64
+        from django.conf import settings
+        auth = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.BasicAuthentication'],
+        }
+        
+        def credentials(email):
+            token = base64.b64encode(f'{email}:testpass123'.encode()).decode()
+            return f'Basic {token}'
+        
+        with override_settings(REST_FRAMEWORK=auth):
+            response = self.client.get(
+                reverse('event-list'),
+                {'profile': 'cprofile'},
+                HTTP_AUTHORIZATION=credentials('staff@example.com')
+            )
+            other = self.client.get(
+                reverse('event-list'),
+                {'profile': 'cprofile'},
+                HTTP_AUTHORIZATION=credentials('test@example.com')
+            )
+        
+        profile_id = response['X-Profile-Id']
+        timeline = json.loads((Path(self.directory) / f'{profile_id}.sql.json').read_text())
+        self.assertEqual(timeline['user'], self.staff.pk)
+        self.assertNotIn('X-Profile-Id', other)
+    
+    def test_api_authenticated_post_keeps_csrf_exemption(self):
+        """Test that profiling a Basic-auth POST does not make it CSRF checked."""
+        import base64
+        from datetime import date, time as time_of_day
+        from unittest import mock
+        from django.conf import settings
+        from django.test import Client
+        from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+        from events.models import Event
+        from events.views import EventViewSet
+        authentication_classes = [SessionAuthentication, BasicAuthentication]
+        auth = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_AUTHENTICATION_CLASSES': [
+                'rest_framework.authentication.SessionAuthentication',
+                'rest_framework.authentication.BasicAuthentication',
+            ],
+        }
+        event = Event.objects.create(
+            title='Test Event',
+            description='Test Description',
+            date=date(2030, 1, 1),
+            time=time_of_day(10, 0),
+            location='Test Location',
+            created_by=self.user
+        )
+        client = Client(enforce_csrf_checks=True)
+        token = base64.b64encode(b'staff@example.com:testpass123').decode()
+        
+        # The viewset read its authentication classes when it was imported,
+        # so overriding the setting only reaches the profiling middleware.
+        with override_settings(REST_FRAMEWORK=auth), \
+                mock.patch.object(EventViewSet, 'authentication_classes', authentication_classes):
+            response = client.post(
+                reverse('event-register', args=[event.id]) + '?profile=cprofile',
+                HTTP_AUTHORIZATION=f'Basic {token}'
+            )
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('X-Profile-Id', response)
+    
+    def test_not_profiled_without_switch(self):
+        """Test that staff requests without the switch are not profiled."""
+        self.client.force_login(self.staff)
+        
+        response = self.client.get(reverse('event-list'))
+        
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(self._files(), [])
+    
+    @override_settings(PROFILE_KEEP=2)
+    def test_old_profiles_pruned(self):
+        """Test that only the newest PROFILE_KEEP profiles are kept."""
+        self.client.force_login(self.staff)
+        
+        for _ in range(3):
+            self.client.get(reverse('event-list'), {'profile': 'cprofile'})
+        
+        self.assertEqual(len(self._files()), 4)
+    
+    @override_settings(REQUEST_PROFILING=False)
+    def test_disabled_middleware_removed(self):
+        """Test that the middleware leaves the stack when profiling is off."""
+        from django.core.exceptions import MiddlewareNotUsed
+        from event_management.profiling import ProfilingMiddleware
+        
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: None)
+    
+    def test_sampling_profiler_collapsed_stacks(self):
+        """Test that the sampling profiler writes collapsed stacks."""
+        from event_management.profiling import SamplingProfiler
+        
+        def busy():
+            deadline = time.perf_counter() + 0.1
+            while time.perf_counter() < deadline:
+                pass
+        
+        with SamplingProfiler(0.005) as profiler:
+            busy()
+        
+        lines = profiler.collapsed().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertIn('busy (test_profiling.py:', stack)
+        self.assertGreater(int(count), 0)
@@ -0,0 +1,396 @@
+"""
+Tests for per-request SQL query instrumentation and endpoint query budgets.
+"""
+
+import json
+from datetime import date, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from events.models import ArchivedEvent, ArchivedEventParticipant, Event, EventParticipant
+from notifications.models import Notification
+
+from .query_budget import QueryBudgetMixin
+
+User = get_user_model()
+
+
+class QueryCountMiddlewareTest(TestCase):
+    """Test cases for the per-request query report."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        for index in range(3):
+            Event.objects.create(
+                title=f'Event {index}',
+                description='Description',
+                date=date.today() + timedelta(days=7),
+                time=time(18, 0),
+                location='Hall',
+                created_by=self.user
+            )
+    
+    def test_query_shape_strips_literals(self):
+        """Test that queries differing only in values share a shape."""
+        from event_management.middleware import query_shape
+        
+        self.assertEqual(
+            query_shape('SELECT * FROM "events" WHERE "id" = 1 AND "title" = \'A\''),
+            query_shape('SELECT * FROM "events" WHERE "id" = 42 AND "title" = \'B\'')
+        )
+        self.assertEqual(
+            query_shape('SELECT * FROM "events" WHERE "id" IN (%s, %s, %s)'),
+            query_shape('SELECT * FROM "events" WHERE "id" IN (%s)')
+        )
+    
+    def test_stats_count_duplicates(self):
+        """Test that repeated query shapes are counted as duplicates."""
+        from event_management.middleware import QueryStats
+        
+        stats = QueryStats()
+        with stats.record():
+            for event in Event.objects.all():
+                User.objects.get(id=event.created_by_id)
+        
+        self.assertEqual(stats.count, 4)
+        self.assertEqual(stats.duplicate_count, 2)
+        self.assertEqual(list(stats.duplicates.values()), [3])
+        self.assertGreaterEqual(stats.duration_ms, 0)
+    
+    def test_headers_for_staff(self):
+        """Test that staff users get the query report headers."""
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+        
+        response = self.client.get(reverse('event-list'))
+        
+        self.assertGreater(int(response['X-DB-Query-Count']), 0)
+        self.assertIn('X-DB-Time-Ms', response)
+        self.assertIn('X-DB-Duplicate-Queries', response)
+    
+    def _basic_auth(self, email):
+        """Return Basic-auth settings, patches and header for `email`."""
+        import base64
+        from contextlib import ExitStack
+        from unittest import mock
+        from django.conf import settings
+        from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+        from events.views import EventViewSet
+        stack = ExitStack()
+        stack.enter_context(override_settings(REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_AUTHENTICATION_CLASSES': [
+                'rest_framework.authentication.SessionAuthentication',
+                'rest_framework.authentication.BasicAuthentication',
+            ],
+        }))
+        # EventViewSet read its authentication classes when it was imported.
+        stack.enter_context(mock.patch.object(
+            EventViewSet, 'authentication_classes', [SessionAuthentication, BasicAuthentication]
+        ))
+        token = base64.b64encode(f'{email}:testpass123'.encode()).decode()
+        return stack, {'HTTP_AUTHORIZATION': f'Basic {token}'}
+    
+    def test_headers_for_api_authenticated_staff(self):
+        """Test that staff authenticated by API credentials get the headers."""
+        self.user.is_staff = True
+        self.user.save()
+        patches, headers = self._basic_auth(self.user.email)
+        
+        with patches:
+            api_response = self.client.get(reverse('event-list'), **headers)
+            plain_response = self.client.get(reverse('health_check'), **headers)
+        
+        self.assertIn('X-DB-Query-Count', api_response)
+        self.assertIn('X-DB-Query-Count', plain_response)
+    
+    def test_no_headers_for_api_authenticated_users(self):
+        """Test that API credentials of non-staff users do not show the headers."""
+        patches, headers = self._basic_auth(self.user.email)
+        
+        with patches:
+            response = self.client.get(reverse('event-list'), **headers)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-DB-Query-Count', response)
+    
+    def test_no_headers_for_other_users(self):
+        """Test that the headers are hidden outside DEBUG from non-staff users."""
+        self.client.force_authenticate(user=self.user)
+        
+        response = self.client.get(reverse('event-list'))
+        
+        self.assertNotIn('X-DB-Query-Count', response)
+    
+    @override_settings(DEBUG=True)
+    def test_headers_in_debug(self):
+        """Test that DEBUG shows the headers to anyone."""
+        response = self.client.get(reverse('event-list'))
+        
+        self.assertIn('X-DB-Query-Count', response)
+    
+    def test_request_is_logged(self):
+        """Test that each request is logged as structured JSON."""
+        with self.assertLogs('event_management.queries', level='INFO') as logs:
+            response = self.client.get(reverse('event-list'))
+        
+        payload = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(payload['method'], 'GET')
+        self.assertEqual(payload['route'], 'event-list')
+        self.assertEqual(payload['status'], response.status_code)
+        self.assertGreater(payload['queries'], 0)
+        self.assertIn('db_time_ms', payload)
+        self.assertIn('duplicates', payload)
+    
+    @override_settings(QUERY_COUNT_WARNING=0)
+    def test_warning_over_threshold(self):
+        """Test that requests over QUERY_COUNT_WARNING are logged at WARNING."""
+        with self.assertLogs('event_management.queries', level='WARNING') as logs:
+            self.client.get(reverse('event-list'))
+        
+        self.assertEqual(logs.records[-1].levelname, 'WARNING')
+
+
+class EndpointQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Test that every API endpoint stays within its query budget."""
+    
+    # Apart from deleting a user, budgets hold for any number of rows; setUp
+    # creates several of each so that a query per row overruns them.
+    query_budgets = {
+        # events/urls.py
+        ('get', 'event-list'): 3,
+        ('post', 'event-list'): 4,
+        ('get', 'event-detail'): 2,
+        ('put', 'event-detail'): 7,
+        ('patch', 'event-detail'): 6,
+        ('delete', 'event-detail'): 12,
+        ('post', 'event-register'): 8,
+        ('post', 'event-unregister'): 4,
+        ('get', 'event-participants'): 4,
+        ('get', 'event-report'): 3,
+        ('get', 'event-my-events'): 3,
+        ('get', 'event-registered-events'): 2,
+        ('get', 'participant-list'): 3,
+        ('get', 'participant-detail'): 2,
+        ('get', 'archived-event-list'): 2,
+        ('get', 'archived-event-detail'): 1,
+        ('get', 'archived-event-participants'): 2,
+        ('get', 'archived-participant-list'): 2,
+        ('get', 'archived-participant-detail'): 1,
+        # users/urls.py
+        ('get', 'user-list'): 2,
+        ('post', 'user-list'): 3,
+        ('get', 'user-detail'): 1,
+        ('put', 'user-detail'): 2,
+        ('patch', 'user-detail'): 2,
+        # Cascades through the user's events, revoking each one's reminders,
+        # and through their queued digest items
+        ('delete', 'user-detail'): 19,
+        ('get', 'user-me'): 0,
+        ('post', 'user-change-password'): 1,
+        ('post', 'user-login'): 9,
+        ('post', 'user-logout'): 0,
+        # notifications/urls.py
+        ('get', 'notification-list'): 2,
+        ('post', 'notification-list'): 1,
+        ('get', 'notification-detail'): 1,
+        ('put', 'notification-detail'): 2,
+        ('patch', 'notification-detail'): 2,
+        ('delete', 'notification-detail'): 2,
+        ('post', 'notification-mark-as-read'): 2,
+        ('post', 'notification-mark-all-as-read'): 1,
+        ('get', 'notification-unread-count'): 1,
+        ('get', 'notification-recent'): 1,
+    }
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            first_name='Test',
+            last_name='User',
+            password='testpass123'
+        )
+        self.others = [
+            User.objects.create_user(
+                username=f'user{index}',
+                email=f'user{index}@example.com',
+                password='testpass123'
+            )
+            for index in range(3)
+        ]
+        self.client.force_authenticate(user=self.user)
+        
+        self.events = []
+        for index in range(3):
+            mine = Event.objects.create(
+                title=f'My Event {index}',
+                description='Description',
+                date=date.today() + timedelta(days=7 + index),
+                time=time(18, 0),
+                location='Hall',
+                max_participants=50,
+                created_by=self.user
+            )
+            theirs = Event.objects.create(
+                title=f'Their Event {index}',
+                description='Description',
+                date=date.today() + timedelta(days=7 + index),
+                time=time(19, 0),
+                location='Hall',
+                created_by=self.others[index]
+            )
+            EventParticipant.objects.create(event=theirs, user=self.user)
+            for other in self.others:
+                EventParticipant.objects.create(event=mine, user=other)
+            self.events.append(mine)
+        self.event = self.events[0]
+        self.registration = EventParticipant.objects.filter(user=self.user).first()
+        self.open_event = Event.objects.exclude(participants__user=self.user).exclude(
+            created_by=self.user
+        ).first() or Event.objects.create(
+            title='Open Event',
+            description='Description',
+            date=date.today() + timedelta(days=14),
+            time=time(18, 0),
+            location='Hall',
+            created_by=self.others[0]
+        )
+        
+        self.archived_event = ArchivedEvent.objects.create(
+            id=10000,
+            title='Archived Event',
+            description='Description',
+            date=date.today() - timedelta(days=200),
+            time=time(18, 0),
+            location='Hall',
+            created_by=self.user,
+            created_at=self.event.created_at,
+            updated_at=self.event.updated_at,
+            is_active=True
+        )
+        for index, user in enumerate([self.user] + self.others):
+            ArchivedEventParticipant.objects.create(
+                id=10000 + index,
+                event_id=self.archived_event.id,
+                user=user,
+                registered_at=self.event.created_at,
+                is_active=True
+            )
+        self.archived_registration = ArchivedEventParticipant.objects.get(user=self.user)
+        
+        self.notifications = [
+            Notification.objects.create(
+                user=self.user,
+                notification_type='event_update',
+                title=f'Notification {index}',
+                message='Message'
+            )
+            for index in range(3)
+        ]
+        self.notification = self.notifications[0]
+    
+    def _check(self, method, url_name, args=None, data=None):
+        """Request an endpoint within its budget, rolling back its writes."""
+        with transaction.atomic():
+            response = self.request_within_budget(method, url_name, args=args, data=data)
+            transaction.set_rollback(True)
+        self.assertLess(response.status_code, 500, f'{method.upper()} {url_name}')
+        return response
+    
+    def test_budgets_cover_every_route(self):
+        """Test that every routed endpoint declares a query budget."""
+        import events.urls
+        import notifications.urls
+        import users.urls
+        
+        self.assertBudgetsCover(events.urls, users.urls, notifications.urls)
+    
+    def test_event_endpoints(self):
+        """Test the events app endpoints against their budgets."""
+        event_data = {
+            'title': 'New Event',
+            'description': 'Description',
+            'date': str(date.today() + timedelta(days=30)),
+            'time': '18:00',
+            'location': 'Room 1'
+        }
+        self._check('get', 'event-list')
+        self._check('post', 'event-list', data=event_data)
+        self._check('get', 'event-detail', args=[self.event.id])
+        self._check('put', 'event-detail', args=[self.event.id], data=event_data)
+        self._check('patch', 'event-detail', args=[self.event.id], data={'location': 'Room 2'})
+        self._check('delete', 'event-detail', args=[self.event.id])
+        self._check('post', 'event-register', args=[self.open_event.id])
+        self._check('post', 'event-unregister', args=[self.registration.event_id])
+        self._check('get', 'event-participants', args=[self.event.id])
+        self._check('get', 'event-report', args=[self.event.id])
+        self._check('get', 'event-my-events')
+        self._check('get', 'event-registered-events')
+        self._check('get', 'participant-list')
+        self._check('get', 'participant-detail', args=[self.registration.id])
+        self._check('get', 'archived-event-list')
+        self._check('get', 'archived-event-detail', args=[self.archived_event.id])
+        self._check('get', 'archived-event-participants', args=[self.archived_event.id])
+        self._check('get', 'archived-participant-list')
+        self._check('get', 'archived-participant-detail', args=[self.archived_registration.id])
+    
+    def test_user_endpoints(self):
+        """Test the users app endpoints against their budgets."""
+        user_data = {
+            'first_name': 'Changed',
+            'last_name': 'Name',
+            'email': 'changed@example.com'
+        }
+        self._check('get', 'user-list')
+        self._check('get', 'user-detail', args=[self.user.id])
+        self._check('put', 'user-detail', args=[self.user.id], data=user_data)
+        self._check('patch', 'user-detail', args=[self.user.id], data={'first_name': 'Changed'})
+        self._check('delete', 'user-detail', args=[self.user.id])
+        self._check('get', 'user-me')
+        self._check('post', 'user-change-password', data={
+            'old_password': 'testpass123',
+            'new_password': 'newpass12345',
+            'new_password_confirm': 'newpass12345'
+        })
+        self._check('post', 'user-logout')
+        
+        self.client.force_authenticate(user=None)
+        self._check('post', 'user-list', data={
+            'username': 'newuser',
+            'email': 'new@example.com',
+            'first_name': 'New',
+            'last_name': 'User',
+            'password': 'newpass12345',
+            'password_confirm': 'newpass12345'
+        })
+        self._check('post', 'user-login', data={
+            'username': 'test@example.com',
+            'password': 'testpass123'
+        })
+    
+    def test_notification_endpoints(self):
+        """Test the notifications app endpoints against their budgets."""
+        self._check('get', 'notification-list')
+        self._check('post', 'notification-list', data={'title': 'New', 'message': 'Message'})
+        self._check('get', 'notification-detail', args=[self.notification.id])
+        self._check('put', 'notification-detail', args=[self.notification.id], data={'is_read': True})
+        self._check('patch', 'notification-detail', args=[self.notification.id], data={'is_read': True})
+        self._check('delete', 'notification-detail', args=[self.notification.id])
+        self._check('post', 'notification-mark-as-read', args=[self.notification.id])
+        self._check('post', 'notification-mark-all-as-read')
+        self._check('get', 'notification-unread-count')
+        self._check('get', 'notification-recent')
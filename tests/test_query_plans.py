@@ -0,0 +1,122 @@
+"""
+Query plan regression tests: the key API queries must keep using the
+indexes designed for them.
+"""
+
+from datetime import date, time, timedelta
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from event_management.db.slow_queries import explain
+from events.models import Event, EventParticipant
+from notifications.models import Notification
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Plans are asserted in the SQLite EXPLAIN QUERY PLAN format')
+class QueryPlanTest(TestCase):
+    """Test cases for the indexes used by the events and notifications APIs."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.events = [
+            Event.objects.create(
+                title=f'Event {index}',
+                description='Description',
+                date=date.today() + timedelta(days=index + 1),
+                time=time(18, 0),
+                location='Hall',
+                created_by=self.user
+            )
+            for index in range(3)
+        ]
+        for event in self.events:
+            EventParticipant.objects.create(event=event, user=self.user)
+            Notification.objects.create(
+                user=self.user,
+                notification_type='event_update',
+                title='Update',
+                message='Message',
+                event_id=event.id
+            )
+    
+    def _plans(self, url, **params):
+        """Return `[(sql, plan)]` for the SELECTs a GET request runs."""
+        queries = []
+        
+        def collect(execute, sql, sql_params, many, context):
+            queries.append((sql, sql_params))
+            return execute(sql, sql_params, many, context)
+        
+        with connection.execute_wrapper(collect):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [(sql, explain(connection, sql, sql_params)) for sql, sql_params in queries if sql.startswith('SELECT')]
+    
+    def assertUsesIndex(self, plans, selects, index):
+        """Assert that the queries containing all of `selects` search `index`."""
+        matching = [(sql, plan) for sql, plan in plans if all(text in sql for text in selects)]
+        self.assertTrue(matching, f'No query matching {selects}')
+        for sql, plan in matching:
+            self.assertTrue(any(index in line for line in plan), f'{index} not used by {sql}: {plan}')
+            self.assertFalse(any('TEMP B-TREE FOR ORDER BY' in line for line in plan), f'{sql} sorts: {plan}')
+    
+    def test_events_list(self):
+        """Test that the events list reads live events in date order."""
+        plans = self._plans(reverse('event-list'))
+        
+        self.assertUsesIndex(plans, ['FROM "events"', 'ORDER BY "events"."date" DESC'], 'events_live_date_idx')
+    
+    def test_active_events_list(self):
+        """Test that filtering on is_active uses the active events index."""
+        plans = self._plans(reverse('event-list'), is_active='true')
+        
+        self.assertUsesIndex(plans, ['FROM "events"', 'ORDER BY "events"."date" DESC'], 'events_live_active_date_idx')
+    
+    def test_event_participants(self):
+        """Test that an event's participants come from the active registrations index."""
+        plans = self._plans(reverse('event-participants', kwargs={'pk': self.events[0].pk}))
+        
+        self.assertUsesIndex(
+            plans,
+            ['FROM "event_participants"', '"event_participants"."event_id" = %s'],
+            'event_part_active_event_idx'
+        )
+    
+    def test_registered_events(self):
+        """Test that a user's registrations come from the active registrations index."""
+        plans = self._plans(reverse('event-registered-events'))
+        
+        self.assertUsesIndex(
+            plans,
+            ['FROM "event_participants"', '"event_participants"."user_id" = %s'],
+            'event_part_active_user_idx'
+        )
+    
+    def test_unread_count(self):
+        """Test that unread notifications are counted from the unread index."""
+        plans = self._plans(reverse('notification-unread-count'))
+        
+        self.assertUsesIndex(plans, ['FROM "notifications"', 'NOT "notifications"."is_read"'], 'notifications_unread_idx')
+    
+    def test_notifications_of_event(self):
+        """Test that event-scoped notification lookups use the event_id index."""
+        index = next(index for index in Notification._meta.indexes if index.fields == ['event_id'])
+        sql, params = Notification.objects.filter(event_id=self.events[0].id).order_by().query.sql_with_params()
+        
+        plan = explain(connection, sql, params)
+        
+        self.assertTrue(any(index.name in line for line in plan), plan)
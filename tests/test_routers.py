@@ -0,0 +1,193 @@
+"""
+Tests for read-replica database routing.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from event_management import routers
+
+User = get_user_model()
+
+
+class ReplicaRoutingTest(TestCase):
+    """Test cases for routing reads to replicas."""
+    
+    def setUp(self):
+        """Set up test data."""
+        cache.clear()
+        routers._unavailable.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            first_name='Test',
+            last_name='User',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+    
+    def _request(self, method, url, data=None):
+        """Make a request and return the response and the read aliases it used."""
+        seen = []
+        
+        def db_for_read(router, model, **hints):
+            seen.append(routers._read_database.get())
+            return 'default'
+        
+        with mock.patch.object(routers, 'choose_replica', return_value='replica_0'), \
+                mock.patch.object(routers.ReplicaRouter, 'db_for_read', db_for_read):
+            response = getattr(self.client, method)(url, data, format='json')
+        return response, seen
+    
+    def test_router_defaults_to_primary(self):
+        """Test that reads outside opted-in views use the primary."""
+        router = routers.ReplicaRouter()
+        self.assertEqual(router.db_for_read(User), 'default')
+        with routers.reading_from('replica_0'):
+            self.assertEqual(router.db_for_read(User), 'replica_0')
+            self.assertEqual(router.db_for_write(User), 'default')
+        self.assertEqual(router.db_for_read(User), 'default')
+    
+    def test_safe_request_reads_from_replica(self):
+        """Test that GET requests read from the chosen replica."""
+        response, seen = self._request('get', reverse('user-detail', kwargs={'pk': self.user.pk}))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('replica_0', seen)
+        self.assertIsNone(routers._read_database.get())
+    
+    def test_reads_stick_to_primary_after_write(self):
+        """Test that a user's reads stay on the primary right after a write."""
+        url = reverse('user-detail', kwargs={'pk': self.user.pk})
+        response, seen = self._request('patch', url, {'first_name': 'Updated'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('replica_0', seen)
+        
+        response, seen = self._request('get', url)
+        self.assertEqual(response.data['first_name'], 'Updated')
+        self.assertNotIn('replica_0', seen)
+    
+    def test_pin_holds_without_shared_cache(self):
+        """Test that the signed pin cookie works when the cache is per process."""
+        url = reverse('user-detail', kwargs={'pk': self.user.pk})
+        response, seen = self._request('patch', url, {'first_name': 'Updated'})
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+        
+        # Another process would not see this process's cache.
+        cache.clear()
+        response, seen = self._request('get', url)
+        self.assertNotIn('replica_0', seen)
+        
+        self.client.cookies[routers.PIN_COOKIE] = 'forged'
+        response, seen = self._request('get', url)
+        self.assertIn('replica_0', seen)
+    
+    @override_settings(REPLICA_DATABASES=['replica_0'])
+    def test_unreachable_replica_falls_back_to_primary(self):
+        """Test that a failing replica is skipped for the retry window."""
+        replica = mock.Mock()
+        replica.ensure_connection.side_effect = OperationalError('unreachable')
+        with mock.patch.object(routers, 'connections', {'replica_0': replica}):
+            self.assertIsNone(routers.choose_replica())
+            self.assertIsNone(routers.choose_replica())
+        
+        self.assertEqual(replica.ensure_connection.call_count, 1)
+
+
+REPLICA = 'replica_test'
+
+
+@override_settings(REPLICA_DATABASES=[REPLICA])
+class SQLiteReplicaRoutingTest(TransactionTestCase):
+    """
+    Test cases for routing between two real SQLite files.
+
+    The replica is its own database, not a test mirror of the primary, and
+    nothing replicates to it: rows that differ between the two show where
+    each query went.
+    """
+    
+    databases = {'default', REPLICA}
+    
+    @classmethod
+    def setUpClass(cls):
+        """Add the replica database and create its tables."""
+        cls.directory = tempfile.mkdtemp()
+        databases = {
+            'default': connections.settings['default'],
+            REPLICA: {
+                'ENGINE': connections['default'].settings_dict['ENGINE'],
+                'NAME': str(Path(cls.directory) / 'replica.sqlite3'),
+            },
+        }
+        connections.settings[REPLICA] = connections.configure_settings(databases)[REPLICA]
+        call_command('migrate', database=REPLICA, run_syncdb=True, verbosity=0)
+        super().setUpClass()
+    
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the replica database."""
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        shutil.rmtree(cls.directory)
+    
+    def setUp(self):
+        """Set up a user that the replica has not caught up with."""
+        cache.clear()
+        routers._unavailable.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            first_name='Primary',
+            password='testpass123'
+        )
+        User.objects.using(REPLICA).create(
+            id=self.user.id,
+            username='testuser',
+            email='test@example.com',
+            first_name='Replica'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('user-detail', kwargs={'pk': self.user.pk})
+    
+    def test_safe_request_reads_from_replica(self):
+        """Test that a GET is served from the replica file."""
+        response = self.client.get(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['first_name'], 'Replica')
+    
+    def test_writes_and_pinned_reads_use_primary(self):
+        """Test that writes land on the primary and pin the writer's reads to it."""
+        response = self.client.patch(self.url, {'first_name': 'Updated'}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(User.objects.using('default').get(id=self.user.id).first_name, 'Updated')
+        self.assertEqual(User.objects.using(REPLICA).get(id=self.user.id).first_name, 'Replica')
+        self.assertEqual(self.client.get(self.url).data['first_name'], 'Updated')
+    
+    def test_signed_pin_cookie_is_honoured(self):
+        """Test that the pin cookie alone keeps reads on the primary, unless forged."""
+        self.client.patch(self.url, {'first_name': 'Updated'}, format='json')
+        
+        # Another process would not see this process's cache.
+        cache.clear()
+        self.assertEqual(self.client.get(self.url).data['first_name'], 'Updated')
+        
+        self.client.cookies[routers.PIN_COOKIE] = str(self.user.pk)
+        self.assertEqual(self.client.get(self.url).data['first_name'], 'Replica')
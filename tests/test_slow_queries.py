@@ -0,0 +1,221 @@
+"""
+Tests for the slow query log.
+"""
+
+import json
+import shutil
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from event_management.db.slow_queries import REDACTED, aggregate, fingerprint, log_files, recording, redact
+
+User = get_user_model()
+
+
+@override_settings(SLOW_QUERY_LOG=True, SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_RATE=1)
+class SlowQueryLogTest(TestCase):
+    """Test cases for recording slow statements."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+    
+    def _entries(self, logs):
+        return [json.loads(record.getMessage()) for record in logs.records]
+    
+    def test_view_queries_are_logged_with_origin_and_plan(self):
+        """Test that a request's queries carry its view, stack and plan."""
+        self.client.force_login(self.user)
+        
+        with self.assertLogs('event_management.slow_queries', 'WARNING') as logs:
+            response = self.client.get(reverse('event-list'))
+        
+        self.assertEqual(response.status_code, 200)
+        entries = [entry for entry in self._entries(logs) if 'FROM "events"' in entry['sql']]
+        self.assertTrue(entries)
+        entry = entries[0]
+        self.assertEqual(entry['origin'], 'view:event-list')
+        self.assertEqual(entry['fingerprint'], fingerprint(entry['sql']))
+        self.assertTrue(entry['frame'].startswith('tests/test_slow_queries.py'))
+        self.assertTrue(any('paginate_queryset' in frame for frame in entry['stack']))
+        self.assertTrue(entry['plan'])
+        self.assertFalse(any(line.startswith('EXPLAIN failed') for line in entry['plan']))
+    
+    def test_text_parameters_are_redacted(self):
+        """Test that text parameters are redacted and numbers and timestamps kept."""
+        with self.assertLogs('event_management.slow_queries', 'WARNING') as logs, recording():
+            User.objects.filter(username='testuser', id__gte=1, date_joined__gte='2026-01-01 00:00:00').exists()
+        
+        entry = self._entries(logs)[-1]
+        self.assertCountEqual(entry['params'], [REDACTED, 1, '2026-01-01 00:00:00', 1])
+        self.assertNotIn('testuser', json.dumps(entry))
+    
+    def test_password_hashes_are_not_logged(self):
+        """Test that saving a user leaves its password hash out of the log."""
+        with self.assertLogs('event_management.slow_queries', 'WARNING') as logs, recording():
+            self.user.set_password('another-pass123')
+            self.user.save()
+        
+        self.assertNotIn(self.user.password, ''.join(record.getMessage() for record in logs.records))
+    
+    def test_redact(self):
+        """Test which parameter values survive redaction."""
+        self.assertEqual(redact('test@example.com'), REDACTED)
+        self.assertEqual(redact(b'secret'), REDACTED)
+        self.assertEqual(redact('2026-10-19T08:00:00.123+00:00'), '2026-10-19T08:00:00.123+00:00')
+        self.assertEqual(redact(3), 3)
+        self.assertIsNone(redact(None))
+    
+    def test_task_queries_carry_task_name(self):
+        """Test that queries run by a Celery task are attributed to it."""
+        from notifications.tasks import cleanup_old_notifications
+        
+        with self.assertLogs('event_management.slow_queries', 'WARNING') as logs:
+            cleanup_old_notifications.delay()
+        
+        origins = {entry['origin'] for entry in self._entries(logs)}
+        self.assertIn('task:notifications.tasks.cleanup_old_notifications', origins)
+    
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=60000)
+    def test_fast_queries_are_not_logged(self):
+        """Test that statements under the threshold are left out."""
+        with self.assertNoLogs('event_management.slow_queries', 'WARNING'), recording():
+            User.objects.filter(username='testuser').exists()
+    
+    def test_plans_are_sampled(self):
+        """Test that no plan is captured with a zero explain rate."""
+        with override_settings(SLOW_QUERY_EXPLAIN_RATE=0):
+            with self.assertLogs('event_management.slow_queries', 'WARNING') as logs, recording():
+                User.objects.filter(username='testuser').exists()
+        
+        self.assertNotIn('plan', self._entries(logs)[-1])
+    
+    def test_queries_outside_a_recording_are_not_logged(self):
+        """Test that the wrapper is only installed while a request, task or command runs."""
+        from django.db import connection
+        
+        self.client.force_login(self.user)
+        self.client.get(reverse('event-list'))
+        
+        self.assertEqual(connection.execute_wrappers, [])
+        with self.assertNoLogs('event_management.slow_queries', 'WARNING'):
+            User.objects.filter(username='testuser').exists()
+    
+    def test_recording_nests_with_other_wrappers(self):
+        """Test that other execute_wrapper blocks can open and close inside a recording."""
+        from django.db import connection
+        
+        def outer(execute, sql, params, many, context):
+            return execute(sql, params, many, context)
+        
+        with connection.execute_wrapper(outer):
+            with recording('command:test'):
+                with self.assertLogs('event_management.slow_queries', 'WARNING') as logs:
+                    User.objects.filter(username='testuser').exists()
+            self.assertEqual(connection.execute_wrappers, [outer])
+        
+        self.assertEqual(self._entries(logs)[-1]['origin'], 'command:test')
+
+
+class SlowQueriesCommandTest(TestCase):
+    """Test cases for the slow_queries management command."""
+    
+    def setUp(self):
+        """Set up test data."""
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = self.directory / 'slow_queries.jsonl'
+    
+    def _entry(self, sql, duration_ms, origin='view:event-list', **extra):
+        return {
+            'time': extra.pop('time', time.time()),
+            'fingerprint': fingerprint(sql),
+            'duration_ms': duration_ms,
+            'sql': sql,
+            'params': [],
+            'origin': origin,
+            'frame': 'events/views.py:10 in list',
+            'stack': ['django/core/paginator.py:93 in count'],
+            **extra
+        }
+    
+    def _write(self, path, entries):
+        path.write_text(''.join(json.dumps(entry) + '\n' for entry in entries))
+    
+    def test_rotated_backups_are_read_oldest_first(self):
+        """Test that the log and its numbered backups are all read."""
+        for name in ('slow_queries.jsonl', 'slow_queries.jsonl.1', 'slow_queries.jsonl.2'):
+            (self.directory / name).write_text('')
+        
+        self.assertEqual(
+            [path.name for path in log_files(self.path)],
+            ['slow_queries.jsonl.2', 'slow_queries.jsonl.1', 'slow_queries.jsonl']
+        )
+    
+    def test_aggregates_by_fingerprint(self):
+        """Test that queries differing only in literals are grouped."""
+        self._write(self.directory / 'slow_queries.jsonl.1', [
+            self._entry('SELECT * FROM "events" WHERE "id" = 1', 120),
+        ])
+        self._write(self.path, [
+            self._entry('SELECT * FROM "events" WHERE "id" = 2', 300, plan=['SCAN events']),
+            self._entry('SELECT * FROM "events" WHERE "id" = 3', 180, origin='task:notifications.tasks.relay_outbox'),
+            self._entry('SELECT * FROM "users"', 500),
+        ])
+        with open(self.path, 'a') as log:
+            log.write('{"truncated\n')
+        
+        out = StringIO()
+        call_command('slow_queries', file=str(self.path), json=True, stdout=out)
+        
+        summaries = json.loads(out.getvalue())
+        self.assertEqual([summary['count'] for summary in summaries], [3, 1])
+        events = summaries[0]
+        self.assertEqual(events['shape'], 'SELECT * FROM "events" WHERE "id" = ?')
+        self.assertEqual(events['total_ms'], 600)
+        self.assertEqual(events['max_ms'], 300)
+        self.assertEqual(events['origins'], {'view:event-list': 2, 'task:notifications.tasks.relay_outbox': 1})
+        self.assertEqual(events['plan'], ['SCAN events'])
+        self.assertEqual(events['slowest']['sql'], 'SELECT * FROM "events" WHERE "id" = 2')
+    
+    def test_hours_filters_old_entries(self):
+        """Test that --hours leaves out older entries."""
+        self._write(self.path, [
+            self._entry('SELECT * FROM "events"', 120, time=time.time() - 7200),
+            self._entry('SELECT * FROM "users"', 120),
+        ])
+        
+        out = StringIO()
+        call_command('slow_queries', file=str(self.path), hours=1, stdout=out)
+        
+        self.assertIn('SELECT * FROM "users"', out.getvalue())
+        self.assertIn('from: events/views.py:10 in list', out.getvalue())
+        self.assertNotIn('SELECT * FROM "events"', out.getvalue())
+    
+    def test_empty_log(self):
+        """Test the output when nothing has been logged."""
+        out = StringIO()
+        call_command('slow_queries', file=str(self.path), stdout=out)
+        
+        self.assertEqual(out.getvalue().strip(), 'No slow queries logged')
+    
+    def test_summary_ordering(self):
+        """Test that the summary puts the most expensive fingerprint first."""
+        summaries = aggregate([
+            self._entry('SELECT 1', 50),
+            self._entry('SELECT 1', 50),
+            self._entry('SELECT * FROM "users"', 90),
+        ])
+        
+        self.assertEqual([summary['total_ms'] for summary in summaries], [100, 90])
@@ -156,6 +156,32 @@ class UserAPITest(TestCase):
         self.assertEqual(self.user.first_name, 'Updated')
         self.assertEqual(self.user.last_name, 'Name')
     
+    def test_update_notification_preferences(self):
+        """Test that a partial preference update keeps the other entries."""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('user-detail', kwargs={'pk': self.user.pk})
+        update_data = {
+            'notification_preferences': {'event_update': {'email': False}}
+        }
+        response = self.client.patch(url, update_data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.wants('event_update', 'email'))
+        self.assertTrue(self.user.wants('event_update', 'in_app'))
+        self.assertTrue(self.user.wants('reminder', 'email'))
+    
+    def test_update_notification_preferences_unknown_type(self):
+        """Test that unknown notification types are rejected."""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('user-detail', kwargs={'pk': self.user.pk})
+        update_data = {
+            'notification_preferences': {'newsletter': {'email': False}}
+        }
+        response = self.client.patch(url, update_data, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
     def test_change_password_success(self):
         """Test successful password change."""
         self.client.force_authenticate(user=self.user)
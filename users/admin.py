@@ -6,21 +6,25 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth import get_user_model
 
+from event_management.admin import PrefixAutocompleteMixin
+
 User = get_user_model()
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(PrefixAutocompleteMixin, BaseUserAdmin):
     """
     Admin interface for User model.
     """
     list_display = ['email', 'username', 'first_name', 'last_name', 'is_staff', 'date_created']
     list_filter = ['is_staff', 'is_superuser', 'is_active', 'date_created']
     search_fields = ['email', 'username', 'first_name', 'last_name']
+    autocomplete_search_fields = ['email', 'username']
     ordering = ['-date_created']
     
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Profile', {'fields': ('image', 'date_created', 'date_updated')}),
+        ('Notifications', {'fields': ('notification_preferences', 'email_digest', 'last_digest_at')}),
     )
     
     readonly_fields = ['date_created', 'date_updated'] 
\ No newline at end of file
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_digest',
+            field=models.BooleanField(default=False, help_text='Receive event update emails as one daily digest', verbose_name='daily email digest'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_digest_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='last digest at'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_email_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='notification_preferences',
+            field=models.PositiveIntegerField(default=255, help_text='Bitmask of the channels each notification type is delivered on', verbose_name='notification preferences'),
+        ),
+    ]
@@ -4,9 +4,50 @@ User models for the event management system.
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
 
+class NotificationPreference:
+    """
+    Bit layout of `User.notification_preferences`.
+    
+    Each notification type gets one bit per channel, so every preference
+    fits in one integer column that fan-out queries can test in SQL.
+    """
+    TYPES = ('event_update', 'event_cancellation', 'registration_confirmation', 'reminder')
+    CHANNELS = ('in_app', 'email')
+    ALL = (1 << (len(TYPES) * len(CHANNELS))) - 1
+    
+    @classmethod
+    def bit(cls, notification_type, channel):
+        """Return the bit for one type and channel."""
+        return 1 << (cls.TYPES.index(notification_type) * len(cls.CHANNELS) + cls.CHANNELS.index(channel))
+    
+    @classmethod
+    def mask(cls, notification_type, channel=None):
+        """Return the bits of a type on one channel, or on any channel."""
+        channels = cls.CHANNELS if channel is None else (channel,)
+        mask = 0
+        for name in channels:
+            mask |= cls.bit(notification_type, name)
+        return mask
+
+
+def filter_by_preference(queryset, notification_type, channel=None, prefix=''):
+    """
+    Keep rows whose user receives `notification_type` on `channel`.
+    
+    With no channel, keeps users receiving the type on any channel. `prefix`
+    is the lookup path to the user, e.g. 'user__'.
+    """
+    mask = NotificationPreference.mask(notification_type, channel)
+    return queryset.alias(
+        preference_bits=F(f'{prefix}notification_preferences').bitand(mask)
+    ).filter(preference_bits__gt=0)
+
+
 class User(AbstractUser):
     """
     Custom User model with additional fields for event management.
@@ -21,6 +62,17 @@ class User(AbstractUser):
         blank=True,
         help_text=_('Profile image for the user')
     )
+    notification_preferences = models.PositiveIntegerField(
+        _('notification preferences'),
+        default=NotificationPreference.ALL,
+        help_text=_('Bitmask of the channels each notification type is delivered on')
+    )
+    email_digest = models.BooleanField(
+        _('daily email digest'),
+        default=False,
+        help_text=_('Receive event update emails as one daily digest')
+    )
+    last_digest_at = models.DateTimeField(_('last digest at'), null=True, blank=True)
     date_created = models.DateTimeField(_('date created'), auto_now_add=True)
     date_updated = models.DateTimeField(_('date updated'), auto_now=True)
 
@@ -31,6 +83,12 @@ class User(AbstractUser):
         verbose_name = _('user')
         verbose_name_plural = _('users')
         db_table = 'users'
+        indexes = [
+            # Admin autocomplete searches emails and usernames by prefix,
+            # ignoring case
+            models.Index(Upper('email'), name='users_email_upper_idx'),
+            models.Index(Upper('username'), name='users_username_upper_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
@@ -40,6 +98,18 @@ class User(AbstractUser):
         """Return the full name of the user."""
         return f"{self.first_name} {self.last_name}"
 
+    def wants(self, notification_type, channel):
+        """Check if the user receives a notification type on a channel."""
+        return bool(self.notification_preferences & NotificationPreference.bit(notification_type, channel))
+    
+    def set_preference(self, notification_type, channel, enabled):
+        """Enable or disable a notification type on a channel."""
+        bit = NotificationPreference.bit(notification_type, channel)
+        if enabled:
+            self.notification_preferences |= bit
+        else:
+            self.notification_preferences &= ~bit
+    
     def get_absolute_url(self):
         """Return the URL to access a particular user instance."""
         from django.urls import reverse
@@ -6,20 +6,61 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 
+from .models import NotificationPreference
+
 User = get_user_model()
 
 
+class NotificationPreferencesField(serializers.Field):
+    """
+    Exposes the preference bitmask as `{type: {channel: bool}}`.
+    
+    Updates may list only the types and channels they change; the rest keep
+    their current value.
+    """
+    
+    def to_representation(self, value):
+        return {
+            notification_type: {
+                channel: bool(value & NotificationPreference.bit(notification_type, channel))
+                for channel in NotificationPreference.CHANNELS
+            }
+            for notification_type in NotificationPreference.TYPES
+        }
+    
+    def to_internal_value(self, data):
+        if not isinstance(data, dict):
+            raise serializers.ValidationError('Expected an object of notification types.')
+        instance = getattr(self.parent, 'instance', None)
+        value = instance.notification_preferences if instance else NotificationPreference.ALL
+        for notification_type, channels in data.items():
+            if notification_type not in NotificationPreference.TYPES:
+                raise serializers.ValidationError(f'Unknown notification type "{notification_type}".')
+            if not isinstance(channels, dict):
+                raise serializers.ValidationError(f'Expected an object of channels for "{notification_type}".')
+            for channel, enabled in channels.items():
+                if channel not in NotificationPreference.CHANNELS:
+                    raise serializers.ValidationError(f'Unknown channel "{channel}".')
+                if not isinstance(enabled, bool):
+                    raise serializers.ValidationError(f'Expected a boolean for "{notification_type}.{channel}".')
+                bit = NotificationPreference.bit(notification_type, channel)
+                value = value | bit if enabled else value & ~bit
+        return value
+
+
 class UserSerializer(serializers.ModelSerializer):
     """
     Serializer for User model with basic fields.
     """
     full_name = serializers.ReadOnlyField()
+    notification_preferences = NotificationPreferencesField(required=False)
     
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name',
-            'full_name', 'image', 'date_created', 'date_updated'
+            'full_name', 'image', 'email_digest', 'notification_preferences',
+            'date_created', 'date_updated'
         ]
         read_only_fields = ['id', 'date_created', 'date_updated']
 
@@ -59,9 +100,11 @@ class UserUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for updating user information.
     """
+    notification_preferences = NotificationPreferencesField(required=False)
+    
     class Meta:
         model = User
-        fields = ['first_name', 'last_name', 'image']
+        fields = ['first_name', 'last_name', 'image', 'email_digest', 'notification_preferences']
     
     def update(self, instance, validated_data):
         """Update user instance."""
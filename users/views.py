@@ -10,6 +10,8 @@ from django.contrib.auth import login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.shortcuts import get_object_or_404
 
+from event_management.routers import ReplicaReadMixin
+
 from .serializers import (
     UserSerializer,
     UserCreateSerializer,
@@ -20,7 +22,7 @@ from .serializers import (
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for User CRUD operations.
     """